@@ -0,0 +1,67 @@
+# coding: utf-8
+"""
+Compares the JSON codecs available in current environment (see
+L{comodit_client.util.jsoncodec}) on a synthetic host listing, with and
+without key order preservation.
+
+Usage (from repository's root):
+
+    python -m benchmarks.json_codec [--items N] [--repeat R]
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from comodit_client.util.jsoncodec import JsonCodec, available_backends
+
+
+def synthetic_listing(count):
+    items = []
+    for i in range(count):
+        items.append({"name": "host-%05d" % i,
+                      "description": "Synthetic host number %d" % i,
+                      "organization": "Benchmark",
+                      "environment": "Default",
+                      "platform": {"name": "Demo Platform", "settings": [{"key": "memory", "value": 1024}]},
+                      "distribution": {"name": "Demo Distribution"},
+                      "state": "READY",
+                      "applications": ["app-%d" % j for j in range(i % 5)],
+                      "settings": [{"key": "k%d" % j, "value": {"enabled": j % 2 == 0, "weight": j * 0.5}}
+                                   for j in range(10)]})
+    return {"count": count, "items": items}
+
+
+def best_time(function, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        function()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark of JSON codecs.")
+    parser.add_argument("--items", type = int, default = 20000, help = "number of hosts in listing")
+    parser.add_argument("--repeat", type = int, default = 5, help = "number of runs per measure")
+    args = parser.parse_args()
+
+    data = synthetic_listing(args.items)
+    document = JsonCodec("json").dumps(data)
+    size = len(document) / (1024.0 * 1024.0)
+    print("Payload: %d items, %.1f MB" % (args.items, size))
+    print("%-8s %-10s %10s %10s %12s" % ("backend", "key order", "loads (s)", "dumps (s)", "loads (MB/s)"))
+    for backend in available_backends():
+        for keep_key_order in (True, False):
+            codec = JsonCodec(backend, keep_key_order)
+            loads = best_time(lambda: codec.loads(document), args.repeat)
+            dumps = best_time(lambda: codec.dumps(data), args.repeat)
+            print("%-8s %-10s %10.3f %10.3f %12.1f" % (backend, "ordered" if keep_key_order else "plain",
+                                                      loads, dumps, size / loads))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+# coding: utf-8
+"""
+End-to-end benchmarks of client operations. Each benchmark runs in its own
+process against a L{StandInServer<test.mock.standin.StandInServer>} filled
+with a synthetic fleet (see L{test.mock.fleet}) or against recorded traffic,
+and measures wall time, number of requests, bytes transferred (response and
+request bodies, as sent on the wire; file uploads, which bypass client's
+transport, are not counted) and peak RSS of the client.
+
+Results are written as JSON in order to compare releases.
+
+Usage (from repository's root):
+
+    python -m benchmarks.suite [--preset small|large] [--output FILE]
+                               [--only NAME]... [--record DIR | --replay DIR]
+
+With C{--record}, the traffic of each benchmark is recorded in a cassette
+(C{DIR/<name>.jsonl.gz}) which may later be replayed with C{--replay},
+without stand-in server.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+from comodit_client.api import Client
+from comodit_client.api.exporter import Export
+from comodit_client.api.importer import Import
+from comodit_client.api.sync import SyncEngine
+from comodit_client.control.tree_rendering import TreeRenderer
+from comodit_client.rest.cassette import Cassette, RecordingTransport, ReplayTransport
+from comodit_client.rest.pool import ConnectionPool
+import comodit_client.version as version
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRESETS = {
+    # Fleet options (see test.mock.fleet.generate_fleet) and number of hosts
+    # of the listed environment.
+    "small": {"fleet": {"organizations": 2, "environments": 2, "hosts": 20, "applications": 10,
+                        "files": 5, "file_size": 2048},
+              "list_size": 2000},
+    "large": {"fleet": {"organizations": 50, "environments": 4, "hosts": 100, "applications": 20,
+                        "files": 20, "file_size": 8192},
+              "list_size": 20000},
+}
+
+ORG = "org-000"
+
+LARGE_ORG = "org-large"
+
+
+class Counter(object):
+    """
+    Request listener counting requests and bytes.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def __call__(self, event):
+        self.requests += 1
+        self.bytes_in += event.bytes_in
+        self.bytes_out += event.bytes_out
+
+
+# Benchmarks: a setup function (not measured) returning the state given to
+# the measured function.
+
+def setup_none(client, workdir):
+    return None
+
+
+def setup_workdir(client, workdir):
+    return workdir
+
+
+def bench_collection_list(client, state):
+    hosts = client.hosts(LARGE_ORG, "env-00").list()
+    return {"entities": len(hosts)}
+
+
+def bench_export_organization(client, state):
+    Export(force = True).export_organization(client.get_organization(ORG), os.path.join(state, "org"))
+
+
+def setup_import(client, workdir):
+    folder = os.path.join(workdir, "org")
+    Export(force = True).export_organization(client.get_organization(ORG), folder)
+    definition = os.path.join(folder, "definition.json")
+    with open(definition) as f:
+        data = json.load(f)
+    data["name"] = "org-imported"
+    with open(definition, "w") as f:
+        json.dump(data, f)
+    return folder
+
+
+def bench_import_organization(client, state):
+    Import().import_organization(client, state)
+
+
+def bench_import_organization_queued(client, state):
+    importer = Import(queue_actions = True)
+    importer.import_organization(client, state)
+    importer.execute_queue()
+
+
+def setup_sync(client, workdir):
+    folder = os.path.join(workdir, "app")
+    app = client.get_application(ORG, "app-000")
+    Export(force = True).export_application(app, folder)
+    return (folder, app)
+
+
+def setup_pull(client, workdir):
+    (folder, app) = setup_sync(client, workdir)
+    # Remote changes: description and half of the files
+    app.description = "Changed remotely"
+    app.update()
+    upload = os.path.join(workdir, "upload")
+    with open(upload, "w") as f:
+        f.write("Changed remotely\n")
+    for f in app.files_f[::2]:
+        app.get_file(f.name).set_content(upload)
+    return (folder, app)
+
+
+def bench_sync_pull(client, state):
+    (folder, app) = state
+    app.refresh()
+    SyncEngine(folder).pull(app)
+
+
+def setup_push(client, workdir):
+    (folder, app) = setup_sync(client, workdir)
+    # Local changes: description and half of the files
+    definition = os.path.join(folder, "definition.json")
+    with open(definition) as f:
+        data = json.load(f)
+    data["description"] = "Changed locally"
+    with open(definition, "w") as f:
+        json.dump(data, f)
+    for name in sorted(os.listdir(os.path.join(folder, "files")))[::2]:
+        with open(os.path.join(folder, "files", name), "w") as f:
+            f.write("Changed locally\n")
+    return (folder, app)
+
+
+def bench_sync_push(client, state):
+    (folder, app) = state
+    app.refresh()
+    SyncEngine(folder).push(app)
+
+
+def bench_tree_render(client, state):
+    TreeRenderer(client, ORG, "env-00", "host-00000").render(os.path.join(state, "tree"), True, True)
+
+
+BENCHMARKS = OrderedDict([
+    ("collection_list", (setup_none, bench_collection_list)),
+    ("export_organization", (setup_workdir, bench_export_organization)),
+    ("import_organization", (setup_import, bench_import_organization)),
+    ("import_organization_queued", (setup_import, bench_import_organization_queued)),
+    ("sync_pull", (setup_pull, bench_sync_pull)),
+    ("sync_push", (setup_push, bench_sync_push)),
+    ("tree_render", (setup_workdir, bench_tree_render)),
+    ("cli_hosts_list", (None, None)),
+])
+
+# File uploads do not go through client's transport (see
+# comodit_client.util.fileupload), they cannot be replayed.
+NOT_REPLAYABLE = set(["import_organization", "import_organization_queued", "sync_pull", "sync_push"])
+
+
+# Peak RSS measurement
+
+def reset_peak_rss():
+    """
+    Resets the peak RSS of current process (Linux only).
+
+    @return: True if peak RSS could be reset.
+    """
+
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except (IOError, OSError):
+        return False
+
+
+def peak_rss(who = resource.RUSAGE_SELF):
+    """
+    Provides peak RSS in bytes.
+    """
+
+    if who == resource.RUSAGE_SELF:
+        try:
+            with open("/proc/self/status") as f:
+                match = re.search(r"VmHWM:\s+(\d+) kB", f.read())
+            if match:
+                return int(match.group(1)) * 1024
+        except (IOError, OSError):
+            pass
+    maxrss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is expressed in bytes on macOS, in kilobytes elsewhere
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+# Child process side
+
+def new_client(api, record, replay):
+    if record:
+        transport = RecordingTransport(Cassette(record), ConnectionPool())
+    elif replay:
+        transport = ReplayTransport(Cassette(replay).load())
+    else:
+        transport = "urllib"
+    return Client(api, "benchmark", "benchmark", None, transport = transport)
+
+
+def run_benchmark(name, api, workdir, record, replay):
+    (setup, function) = BENCHMARKS[name]
+    client = new_client(api, record, replay)
+    counter = Counter()
+    client.add_request_listener(counter)
+    try:
+        state = setup(client, workdir)
+        counter.reset()
+        reset_peak_rss()
+        start = time.time()
+        details = function(client, state)
+        wall_time = time.time() - start
+    finally:
+        client.close()
+
+    result = {"wall_time": wall_time,
+              "requests": counter.requests,
+              "bytes_in": counter.bytes_in,
+              "bytes_out": counter.bytes_out,
+              "peak_rss": peak_rss()}
+    if details:
+        result.update(details)
+    return result
+
+
+def run_cli(api, workdir, record, replay):
+    """
+    Measures the startup and execution of C{comodit hosts list} in a new
+    process. Client is configured through a profile file in process' working
+    directory.
+    """
+
+    os.makedirs(os.path.join(workdir, "conf"))
+    os.symlink(os.path.join(ROOT, "templates"), os.path.join(workdir, "templates"))
+    with open(os.path.join(workdir, "conf", "comodit-client.conf"), "w") as f:
+        f.write("[client]\ndefault_profile = default\n\n[default]\n")
+        f.write("api = %s\nusername = benchmark\npassword = benchmark\n" % api)
+        if record:
+            f.write("cassette = %s\ncassette_mode = record\n" % record)
+        elif replay:
+            f.write("cassette = %s\ncassette_mode = replay\n" % replay)
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    command = [sys.executable, os.path.join(ROOT, "comodit"), "--timing", "hosts", "list", LARGE_ORG, "env-00"]
+    start = time.time()
+    process = subprocess.Popen(command, cwd = workdir, env = env, stdout = subprocess.PIPE,
+                               stderr = subprocess.PIPE)
+    (output, errors) = process.communicate()
+    wall_time = time.time() - start
+    if process.returncode != 0:
+        raise RuntimeError("CLI failed: " + errors.decode('utf-8', 'replace'))
+
+    # Number of requests is given by the total line of timing summary
+    match = re.search(r"^\s+(\d+)\s+[\d.]+\s+\(total\)", errors.decode('utf-8', 'replace'), re.MULTILINE)
+    return {"wall_time": wall_time,
+            "requests": int(match.group(1)) if match else None,
+            "bytes_in": None,
+            "bytes_out": None,
+            "peak_rss": peak_rss(resource.RUSAGE_CHILDREN),
+            "entities": len(output.splitlines())}
+
+
+def child_main(args):
+    workdir = tempfile.mkdtemp(prefix = "comodit-bench-")
+    # Progress messages of exporter, importer, etc. are not relevant
+    sys.stdout = open(os.devnull, "w")
+    try:
+        if args.child == "cli_hosts_list":
+            result = run_cli(args.api, workdir, args.record_file, args.replay_file)
+        else:
+            result = run_benchmark(args.child, args.api, workdir, args.record_file, args.replay_file)
+    finally:
+        shutil.rmtree(workdir)
+    with open(args.result, "w") as f:
+        json.dump(result, f)
+
+
+# Parent process side
+
+def start_standin(preset):
+    # Imported here, replay does not need the stand-in server
+    from test.mock.fleet import generate_fleet
+    from test.mock.standin import StandInServer
+
+    server = StandInServer()
+    generate_fleet(server, **preset["fleet"])
+    # Organization holding the large listed environment
+    server.add("organizations/", {"name": LARGE_ORG})
+    server.add("organizations/" + LARGE_ORG + "/environments/", {"name": "env-00"})
+    url = "organizations/" + LARGE_ORG + "/environments/env-00/hosts/"
+    for i in range(preset["list_size"]):
+        server.add(url, {"name": "host-%05d" % i, "description": "Listed host %d" % i,
+                         "platform": "platform", "distribution": "distribution",
+                         "applications": ["app-%03d" % (i % 10)], "state": "READY"})
+    return server.start()
+
+
+def run_child(name, args):
+    cassette = os.path.join(args.record or args.replay or "", name + ".jsonl.gz")
+    server = None
+    if args.replay:
+        api = "http://replay/api"
+    else:
+        server = start_standin(PRESETS[args.preset])
+        api = server.url
+
+    (fd, result) = tempfile.mkstemp(suffix = ".json")
+    os.close(fd)
+    try:
+        command = [sys.executable, "-m", "benchmarks.suite", "--child", name, "--api", api,
+                   "--result", result]
+        if args.record:
+            command += ["--record-file", cassette]
+        elif args.replay:
+            command += ["--replay-file", cassette]
+        subprocess.check_call(command, cwd = ROOT)
+        with open(result) as f:
+            return json.load(f)
+    finally:
+        os.remove(result)
+        if server is not None:
+            server.stop()
+
+
+def print_result(name, result):
+    def value(key, scale = 1, fmt = "%d"):
+        if result.get(key) is None:
+            return "-"
+        return fmt % (result[key] / scale)
+    print("%-28s %9s %9s %11s %11s %9s" % (name, value("wall_time", fmt = "%.3f"),
+                                           value("requests"), value("bytes_in", 1024.0),
+                                           value("bytes_out", 1024.0), value("peak_rss", 1048576.0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "End-to-end benchmarks of client operations.")
+    parser.add_argument("--preset", choices = sorted(PRESETS.keys()), default = "small", help = "size of synthetic fleet")
+    parser.add_argument("--output", default = "benchmark-results.json", help = "JSON results file")
+    parser.add_argument("--only", action = "append", choices = list(BENCHMARKS.keys()), help = "benchmark to run (repeatable)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar = "DIR", help = "record traffic in given directory")
+    group.add_argument("--replay", metavar = "DIR", help = "replay traffic recorded in given directory")
+    # Internal options, used to run a benchmark in a child process
+    parser.add_argument("--child", help = argparse.SUPPRESS)
+    parser.add_argument("--api", help = argparse.SUPPRESS)
+    parser.add_argument("--result", help = argparse.SUPPRESS)
+    parser.add_argument("--record-file", help = argparse.SUPPRESS)
+    parser.add_argument("--replay-file", help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(args)
+        return
+
+    if args.record and not os.path.isdir(args.record):
+        os.makedirs(args.record)
+
+    print("%-28s %9s %9s %11s %11s %9s" % ("BENCHMARK", "TIME (s)", "REQUESTS", "IN (KiB)", "OUT (KiB)", "RSS (MiB)"))
+    results = OrderedDict()
+    for name in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        if args.replay and name in NOT_REPLAYABLE:
+            print("%-28s skipped (uploads files)" % name)
+            continue
+        results[name] = run_child(name, args)
+        print_result(name, results[name])
+
+    report = OrderedDict([("client_version", version.VERSION),
+                          ("python", platform.python_version()),
+                          ("platform", platform.platform()),
+                          ("date", time.strftime("%Y-%m-%dT%H:%M:%S")),
+                          ("preset", args.preset),
+                          ("traffic", "replay" if args.replay else "standin"),
+                          ("benchmarks", results)])
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent = 2)
+    print("Results written to " + args.output)
+
+
+if __name__ == "__main__":
+    main()
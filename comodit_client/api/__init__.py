@@ -89,6 +89,8 @@ from .platform import Platform
 from .environment import Environment
 from .host import Host
 from .orchestration import OrchestrationCollection
+from .identity import IdentityMap
+from .polling import PollingPolicy
 
 
 class Client(object):
@@ -98,12 +100,80 @@ class Client(object):
     access to ComodIT entities.
     """
 
-    def __init__(self, endpoint, username, password, token, insecure_upload = False):
+    def __init__(self, endpoint, username, password, token, insecure_upload = False,
+                 pool_size = 4, pool_idle_timeout = 60, cache_size = 0, cache_dir = None,
+                 compression = True, compress_min_size = 0, retry_policy = None,
+                 rate_limiter = None, transport = "urllib", http2 = True, page_size = 0,
+                 identity_map_ttl = 0, lazy = False, partial_updates = False,
+                 polling_policy = None):
         """
         Client constructor. In order to create a client, the URL to a ComodIT
         server's REST API (e.g. http://my.comodit.com/api) must be provided, in
         addition to connection credentials (username and password).
 
+        Connections to ComodIT server are kept alive and reused by subsequent
+        requests. At most C{pool_size} connections are opened at the same time.
+
+        If C{cache_size} is greater than 0, fetched entities are cached and
+        revalidated with conditional requests: an entity that did not change
+        since last request is not downloaded again. Cache counters are
+        available through L{get_cache_stats}.
+
+        Unless C{compression} is False, responses are requested gzip or deflate
+        compressed. Request bodies larger than C{compress_min_size} bytes are
+        also gzipped (note that ComodIT server must support compressed
+        requests).
+
+        Failed requests are not retried unless a retry policy is given (see
+        L{RetryPolicy<comodit_client.rest.retry.RetryPolicy>}). Retry counters
+        are available through L{get_retry_stats}.
+
+        Requests sent through this client (i.e. by all its collections and
+        entities) may be throttled by a rate limiter (see
+        L{RateLimiter<comodit_client.rest.limiter.RateLimiter>}) bounding the
+        number of requests per second and the number of concurrent requests.
+        The same rate limiter may be shared by several clients.
+
+        Requests are sent with urllib by default. If C{transport} is
+        C{"curl"}, they are sent by libcurl (see
+        L{CurlTransport<comodit_client.rest.curl.CurlTransport>}): requests
+        sent concurrently by several threads are then transferred in parallel
+        and, if C{http2} is True and the server supports it, multiplexed over
+        a single HTTP/2 connection. A transport object may also be given,
+        for instance to record exchanges with the server or replay them
+        (see L{comodit_client.rest.cassette}).
+
+        If C{page_size} is greater than 0, collections iterated with
+        C{for ... in} are fetched page by page (see
+        L{Collection.paginate<comodit_client.api.collection.Collection.paginate>}),
+        next page being fetched while current one is consumed.
+
+        If C{identity_map_ttl} is greater than 0, fetched entities are kept
+        in memory during that number of seconds (see
+        L{IdentityMap<comodit_client.api.identity.IdentityMap>}): getting an
+        entity again (e.g. the organization of each host while navigating a
+        fleet) returns the same object without any request. Entities modified
+        through this client are dropped from the map. Map counters are
+        available through L{get_identity_map_stats}.
+
+        If C{lazy} is True, entities are fetched only when their state is
+        first accessed (see
+        L{Collection.stub<comodit_client.api.collection.Collection.stub>}):
+        C{client.get_host(org, env, name).changes().list()} then sends a
+        single request. Note that a missing entity is only reported when its
+        state is accessed.
+
+        If C{partial_updates} is True, updating an entity only sends its
+        modified fields (with a PATCH request). Partial updates are disabled
+        (i.e. C{partial_updates} is set to False) as soon as the server
+        rejects a PATCH request, whole entities being sent instead.
+
+        Methods waiting for an event (e.g.
+        L{Host.wait_for_state<comodit_client.api.host.Host.wait_for_state>})
+        poll the server with given polling policy (see
+        L{PollingPolicy<comodit_client.api.polling.PollingPolicy>}), or a
+        default one.
+
         @param endpoint: The URL of a ComodIT server's REST API.
         @type endpoint: String
         @param username: A user name
@@ -112,14 +182,152 @@ class Client(object):
         @type password: String
         @param token: A token
         @type token: String
-        """
-
-        self._http_client = HttpClient(endpoint, username, password, token, insecure_upload)
+        @param insecure_upload: If True, server's certificate is not checked
+        when uploading files.
+        @type insecure_upload: bool
+        @param pool_size: Maximum number of persistent connections to the
+        server. 0 disables connection reuse.
+        @type pool_size: int
+        @param pool_idle_timeout: Number of seconds after which an idle
+        connection is closed instead of being reused.
+        @type pool_idle_timeout: float
+        @param cache_size: Maximum number of responses kept in memory by
+        the cache. 0 disables the cache.
+        @type cache_size: int
+        @param cache_dir: Path to a directory where cached responses are
+        also stored (optional).
+        @type cache_dir: string
+        @param compression: If True, compressed responses are accepted.
+        @type compression: bool
+        @param compress_min_size: Minimum size in bytes of a request body
+        to be compressed. 0 disables request compression.
+        @type compress_min_size: int
+        @param retry_policy: Policy applied to failed requests (optional).
+        @type retry_policy: L{RetryPolicy<comodit_client.rest.retry.RetryPolicy>}
+        @param rate_limiter: Limits applied to sent requests (optional).
+        @type rate_limiter: L{RateLimiter<comodit_client.rest.limiter.RateLimiter>}
+        @param transport: C{"urllib"}, C{"curl"} or a transport object.
+        @type transport: string or transport
+        @param http2: If True, HTTP/2 is negotiated when using curl transport.
+        @type http2: bool
+        @param page_size: Number of entities per page when iterating
+        collections. 0 disables paging.
+        @type page_size: int
+        @param identity_map_ttl: Number of seconds fetched entities are kept
+        in memory. 0 disables the identity map.
+        @type identity_map_ttl: float
+        @param lazy: If True, fetched entities are lazy.
+        @type lazy: bool
+        @param partial_updates: If True, only modified fields are sent
+        when updating entities.
+        @type partial_updates: bool
+        @param polling_policy: Delays between polls when waiting for an
+        event (optional).
+        @type polling_policy: L{PollingPolicy<comodit_client.api.polling.PollingPolicy>}
+        """
+
+        self._http_client = HttpClient(endpoint, username, password, token, insecure_upload,
+                                       pool_size = pool_size,
+                                       pool_idle_timeout = pool_idle_timeout,
+                                       cache_size = cache_size,
+                                       cache_dir = cache_dir,
+                                       compression = compression,
+                                       compress_min_size = compress_min_size,
+                                       retry_policy = retry_policy,
+                                       rate_limiter = rate_limiter,
+                                       transport = transport,
+                                       http2 = http2)
+        self.page_size = page_size
+        self.lazy = lazy
+        self.partial_updates = partial_updates
+        self.polling_policy = polling_policy or PollingPolicy()
+        if identity_map_ttl:
+            self.identity_map = IdentityMap(identity_map_ttl)
+            self._http_client.add_invalidation_listener(self.identity_map.invalidate)
+        else:
+            self.identity_map = None
         self._organizations = OrganizationCollection(self)
         self._flavors = FlavorCollection(self)
         self._app_store = AppStoreCollection(self)
         self._dist_store = DistStoreCollection(self)
 
+    def get_cache_stats(self):
+        """
+        Provides the counters of the response cache (see L{ResponseCache.stats<comodit_client.rest.cache.ResponseCache.stats>}).
+
+        @return: Cache counters or None if the cache is disabled.
+        @rtype: dict
+        """
+
+        if self._http_client.cache is None:
+            return None
+        return self._http_client.cache.stats()
+
+    def get_identity_map_stats(self):
+        """
+        Provides the counters of the identity map (see L{IdentityMap.stats<comodit_client.api.identity.IdentityMap.stats>}).
+
+        @return: Identity map counters or None if the identity map is disabled.
+        @rtype: dict
+        """
+
+        if self.identity_map is None:
+            return None
+        return self.identity_map.stats()
+
+    def close(self):
+        """
+        Closes the connections to the server. Recorded exchanges, if any, are
+        flushed to their cassette.
+        """
+
+        self._http_client.close()
+
+    def add_request_listener(self, listener):
+        """
+        Registers a function called each time a request sent by this client
+        completes or fails. The function is given a
+        L{RequestEvent<comodit_client.rest.instrumentation.RequestEvent>}
+        describing the request (method, URL template, status, transferred
+        bytes, time to first byte and total time).
+
+        @param listener: A function taking an event as argument.
+        @type listener: function
+        """
+
+        self._http_client.add_listener(listener)
+
+    def remove_request_listener(self, listener):
+        """
+        Unregisters a request listener (see L{add_request_listener}).
+        """
+
+        self._http_client.remove_listener(listener)
+
+    def get_retry_stats(self):
+        """
+        Provides the counters of the retry policy (see L{RetryPolicy.stats<comodit_client.rest.retry.RetryPolicy.stats>}).
+
+        @return: Retry counters or None if no retry policy is set.
+        @rtype: dict
+        """
+
+        if self._http_client.retry_policy is None:
+            return None
+        return self._http_client.retry_policy.stats()
+
+    def get_rate_limiter_stats(self):
+        """
+        Provides the counters of the rate limiter (see L{RateLimiter.stats<comodit_client.rest.limiter.RateLimiter.stats>}).
+
+        @return: Rate limiter counters or None if no rate limiter is set.
+        @rtype: dict
+        """
+
+        if self._http_client.rate_limiter is None:
+            return None
+        return self._http_client.rate_limiter.stats()
+
     # Flavors helpers
 
     def flavors(self):
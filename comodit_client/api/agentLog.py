@@ -15,6 +15,8 @@ class AgentLog(JsonWrapper):
     An Agent log. An agent log describes actions received by user
     """
 
+    __slots__ = ()
+
     @property
     def timestamp(self):
         """
@@ -0,0 +1,460 @@
+# coding: utf-8
+"""
+Provides an asyncio facade to ComodIT API (L{AsyncClient}). Collections
+obtained through this facade (see L{AsyncCollection}) send their requests
+with an L{AsyncHttpClient<comodit_client.rest.aio.AsyncHttpClient>}: their
+methods are coroutines and L{AsyncCollection.list} is an asynchronous
+iterator.
+
+Returned entities are the usual entity representations (L{Host},
+L{Organization}, etc.). They are bound to the synchronous L{Client} available
+through L{AsyncClient.sync_client}, calling their methods therefore sends
+blocking requests.
+
+Below script prints the name of all hosts of an environment and
+concurrently fetches their instances.
+
+    >>> import asyncio
+    ... from comodit_client.api.aio import AsyncClient
+    ...
+    ... async def main():
+    ...     async with AsyncClient('https://my.comodit.com/api', 'UUU', 'PPP', None) as client:
+    ...         hosts = [h async for h in client.hosts('OOO', 'Default')]
+    ...         instances = await asyncio.gather(*[client.instance(h).get() for h in hosts])
+    ...
+    ... asyncio.run(main())
+
+This module requires Python 3.6 or later.
+"""
+
+from comodit_client.api import Client
+from comodit_client.api.exceptions import PythonApiException
+from comodit_client.rest.aio import AsyncHttpClient
+from comodit_client.rest.exceptions import ApiException
+
+
+class AsyncCollection(object):
+    """
+    Asynchronous view of a L{Collection}. The wrapped collection is used to
+    build URLs and instantiate entities, requests are sent by owning
+    L{AsyncClient}.
+    """
+
+    def __init__(self, client, collection):
+        """
+        Creates an asynchronous view of a collection.
+
+        @param client: The asynchronous client.
+        @type client: L{AsyncClient}
+        @param collection: The wrapped collection.
+        @type collection: L{Collection}
+        """
+
+        self.client = client
+        self.collection = collection
+
+    @property
+    def url(self):
+        """
+        URL of remote collection.
+
+        @rtype: string
+        """
+
+        return self.collection.url
+
+    @property
+    def _http_client(self):
+        return self.client._http_client
+
+    def new(self, *args, **kwargs):
+        """
+        Instantiates a new local entity. Arguments are the same as those of
+        wrapped collection's C{new} method. No request is sent to the server.
+        """
+
+        return self.collection.new(*args, **kwargs)
+
+    async def list(self, parameters = {}):
+        """
+        Fetches the entities in this collection.
+
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+
+        @return: An asynchronous iterator over the entities.
+        @rtype: asynchronous iterator of L{Entity}
+        """
+
+        try:
+            result = await self._http_client.read(self.url, parameters = parameters)
+        except ApiException as e:
+            raise PythonApiException("Could not get elements: " + e.message)
+
+        if int(result["count"]) > 0:
+            for json_res in result["items"]:
+                yield self.collection._new(json_res)
+
+    def __aiter__(self):
+        """
+        Provides an asynchronous iterator on the entities of this collection.
+        """
+
+        return self.list()
+
+    async def get(self, identifier = "", parameters = {}):
+        """
+        Retrieves a particular entity of this collection.
+
+        @param identifier: The identifier of the entity to retrieve.
+        @type identifier: string
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+        @rtype: L{Entity}
+
+        @raise EntityNotFoundException: If the entity was not found on the
+        server.
+        """
+
+        if not identifier and not self.collection.accept_empty_id:
+            raise PythonApiException("Cannot get entity: identifier is empty")
+
+        try:
+            result = await self._http_client.read(self.url + identifier, parameters = parameters)
+        except ApiException as e:
+            self.collection._handle_error(e, identifier)
+        return self.collection._new(result)
+
+    async def create(self, entity, parameters = {}):
+        """
+        Creates a remote entity given a local representation (see L{new}) and
+        updates the local representation with newly created remote entity.
+
+        @param entity: Entity's local representation.
+        @type entity: L{Entity}
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+        @rtype: L{Entity}
+        """
+
+        try:
+            result = await self._http_client.create(self.url, entity.get_json(),
+                                                    parameters = parameters)
+        except ApiException as e:
+            raise PythonApiException("Could not create entity: " + e.message)
+        entity.set_json(result)
+        return entity
+
+    async def update(self, entity, force = False):
+        """
+        Updates a remote entity with a local representation and updates the
+        local representation of remote entity.
+
+        @param entity: Entity's local representation.
+        @type entity: L{Entity}
+        @param force: Update is forced.
+        @type force: bool
+        @rtype: L{Entity}
+
+        @raise EntityNotFoundException: If the entity was not found on the
+        server.
+        """
+
+        entity_id = entity.identifier
+        if not entity_id and not self.collection.accept_empty_id:
+            raise PythonApiException("Cannot update entity: identifier is empty")
+
+        parameters = {}
+        if force:
+            parameters["force"] = "true"
+        try:
+            result = await self._http_client.update(self.url + entity_id, entity.get_json(),
+                                                    parameters = parameters)
+        except ApiException as e:
+            self.collection._handle_error(e, entity_id)
+        entity.set_json(result)
+        return entity
+
+    async def refresh(self, entity, parameters = {}):
+        """
+        Updates the local representation of a remote entity.
+
+        @param entity: Entity's local representation.
+        @type entity: L{Entity}
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+        @rtype: L{Entity}
+        """
+
+        try:
+            result = await self._http_client.read(self.url + entity.identifier,
+                                                  parameters = parameters)
+        except ApiException as e:
+            raise PythonApiException("Could not refresh entity: " + e.message)
+        entity.set_json(result)
+        return entity
+
+    async def delete(self, identifier, parameters = {}):
+        """
+        Deletes a particular entity in this collection.
+
+        @param identifier: The identifier of the entity to delete.
+        @type identifier: string
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+        """
+
+        if not identifier and not self.collection.accept_empty_id:
+            raise PythonApiException("Cannot delete entity: identifier is empty")
+
+        try:
+            await self._http_client.delete(self.url + identifier, parameters = parameters)
+        except ApiException as e:
+            if e.code != 404:
+                self.collection._handle_error(e, identifier)
+
+    async def clear(self, parameters = {}):
+        """
+        Deletes all entities of the collection.
+
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+        """
+
+        await self._http_client.delete(self.url, parameters = parameters)
+
+
+class AsyncClient(object):
+    """
+    Asynchronous connection to a particular ComodIT server. It mirrors the
+    helpers of L{Client}: methods returning a collection return an
+    L{AsyncCollection} and methods fetching an entity are coroutines.
+    """
+
+    def __init__(self, endpoint, username, password, token, insecure_upload = False,
+                 pool_size = 10, pool_idle_timeout = 60):
+        """
+        Client constructor.
+
+        @param endpoint: The URL of a ComodIT server's REST API.
+        @type endpoint: String
+        @param username: A user name
+        @type username: String
+        @param password: A password
+        @type password: String
+        @param token: A token
+        @type token: String
+        @param insecure_upload: If True, server's certificate is not checked
+        when uploading files.
+        @type insecure_upload: bool
+        @param pool_size: Maximum number of concurrent connections to the
+        server.
+        @type pool_size: int
+        @param pool_idle_timeout: Number of seconds after which an idle
+        connection is closed instead of being reused.
+        @type pool_idle_timeout: float
+        """
+
+        self._http_client = AsyncHttpClient(endpoint, username, password, token, insecure_upload,
+                                            pool_size = pool_size,
+                                            pool_idle_timeout = pool_idle_timeout)
+        self._sync_client = Client(endpoint, username, password, token, insecure_upload)
+
+    @property
+    def sync_client(self):
+        """
+        Synchronous client entities returned by this client are bound to.
+
+        @rtype: L{Client}
+        """
+
+        return self._sync_client
+
+    def wrap(self, collection):
+        """
+        Provides the asynchronous view of a collection, for instance a
+        collection returned by an entity (e.g. C{host.changes()}).
+
+        @param collection: A collection.
+        @type collection: L{Collection}
+        @rtype: L{AsyncCollection}
+        """
+
+        return AsyncCollection(self, collection)
+
+    async def close(self):
+        """
+        Closes the connections to the server.
+        """
+
+        await self._http_client.close()
+        self._sync_client._http_client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    # Flavors helpers
+
+    def flavors(self):
+        """
+        @rtype: L{AsyncCollection} of L{Flavor}
+        """
+
+        return self.wrap(self._sync_client.flavors())
+
+    async def get_flavor(self, name):
+        """
+        @rtype: L{Flavor}
+        """
+
+        return await self.flavors().get(name)
+
+    # Organizations helpers
+
+    def organizations(self):
+        """
+        @rtype: L{AsyncCollection} of L{Organization}
+        """
+
+        return self.wrap(self._sync_client.organizations())
+
+    async def get_organization(self, name):
+        """
+        @rtype: L{Organization}
+        """
+
+        return await self.organizations().get(name)
+
+    # Organization's collections helpers
+
+    def applications(self, org_name):
+        """
+        @rtype: L{AsyncCollection} of L{Application}
+        """
+
+        return self.wrap(self._sync_client.applications(org_name))
+
+    async def get_application(self, org_name, name):
+        """
+        @rtype: L{Application}
+        """
+
+        return await self.applications(org_name).get(name)
+
+    def distributions(self, org_name):
+        """
+        @rtype: L{AsyncCollection} of L{Distribution}
+        """
+
+        return self.wrap(self._sync_client.distributions(org_name))
+
+    async def get_distribution(self, org_name, name):
+        """
+        @rtype: L{Distribution}
+        """
+
+        return await self.distributions(org_name).get(name)
+
+    def platforms(self, org_name):
+        """
+        @rtype: L{AsyncCollection} of L{Platform}
+        """
+
+        return self.wrap(self._sync_client.platforms(org_name))
+
+    async def get_platform(self, org_name, name):
+        """
+        @rtype: L{Platform}
+        """
+
+        return await self.platforms(org_name).get(name)
+
+    def environments(self, org_name):
+        """
+        @rtype: L{AsyncCollection} of L{Environment}
+        """
+
+        return self.wrap(self._sync_client.environments(org_name))
+
+    async def get_environment(self, org_name, name):
+        """
+        @rtype: L{Environment}
+        """
+
+        return await self.environments(org_name).get(name)
+
+    def jobs(self, org_name):
+        """
+        @rtype: L{AsyncCollection} of L{Job}
+        """
+
+        return self.wrap(self._sync_client.jobs(org_name))
+
+    def orchestrations(self, org_name):
+        """
+        @rtype: L{AsyncCollection} of L{Orchestration}
+        """
+
+        return self.wrap(self._sync_client.orchestrations(org_name))
+
+    def notifications(self, org_name):
+        """
+        @rtype: L{AsyncCollection} of L{Notification}
+        """
+
+        return self.wrap(self._sync_client.notifications(org_name))
+
+    def application_keys(self, org_name):
+        """
+        @rtype: L{AsyncCollection} of L{ApplicationKey}
+        """
+
+        return self.wrap(self._sync_client.application_keys(org_name))
+
+    async def get_application_key(self, org_name, token):
+        """
+        @rtype: L{ApplicationKey}
+        """
+
+        return await self.application_keys(org_name).get(token)
+
+    # Hosts helpers
+
+    def hosts(self, org_name, env_name):
+        """
+        @rtype: L{AsyncCollection} of L{Host}
+        """
+
+        return self.wrap(self._sync_client.hosts(org_name, env_name))
+
+    async def get_host(self, org_name, env_name, name):
+        """
+        @rtype: L{Host}
+        """
+
+        return await self.hosts(org_name, env_name).get(name)
+
+    def instance(self, host):
+        """
+        Provides the instance collection of a host.
+
+        @param host: A host.
+        @type host: L{Host}
+        @rtype: L{AsyncCollection} of L{Instance}
+        """
+
+        return self.wrap(host.instance())
+
+    def changes(self, host):
+        """
+        Provides the changes collection of a host.
+
+        @param host: A host.
+        @type host: L{Host}
+        @rtype: L{AsyncCollection} of L{Change}
+        """
+
+        return self.wrap(host.changes())
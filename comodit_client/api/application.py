@@ -83,6 +83,8 @@ class ApplicationResource(JsonWrapper):
     Base application resource representation.
     """
 
+    __slots__ = ()
+
     @property
     def name(self):
         """
@@ -121,6 +123,8 @@ class Package(ApplicationResource):
     DEB, etc.) associated to the application.
     """
 
+    __slots__ = ()
+
     pass
 
 
@@ -130,6 +134,8 @@ class Repository(ApplicationResource):
     repository. A repository is generally described by a name and a URL.
     """
 
+    __slots__ = ()
+
     @property
     def location(self):
         """
@@ -170,6 +176,8 @@ class User(ApplicationResource):
     system the application might be installed on.
     """
 
+    __slots__ = ()
+
     @property
     def login_group(self):
         """
@@ -398,6 +406,8 @@ class Group(ApplicationResource):
     system the application might be installed on.
     """
 
+    __slots__ = ()
+
     @property
     def gid(self):
         """
@@ -438,6 +448,8 @@ class Service(ApplicationResource):
     operating system.
     """
 
+    __slots__ = ()
+
     @property
     def enabled(self):
         """
@@ -592,6 +604,8 @@ class ApplicationFileCollection(Collection):
 
 
 class Action(JsonWrapper):
+
+    __slots__ = ()
     @property
     def type(self):
         """
@@ -640,6 +654,8 @@ class Handler(JsonWrapper):
     @see: L{Application}
     """
 
+    __slots__ = ()
+
     @property
     def name(self):
         """
@@ -753,6 +769,8 @@ class Handler(JsonWrapper):
 
 class CompatibilityRule(JsonWrapper):
 
+    __slots__ = ()
+
     @property
     def os_type(self):
         """
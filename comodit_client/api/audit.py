@@ -18,6 +18,8 @@ class AuditLog(JsonWrapper):
     L{message} property.
     """
 
+    __slots__ = ()
+
     @property
     def timestamp(self):
         """
@@ -1,13 +1,35 @@
 # coding: utf-8
 """
-Provides collections base class (L{Collection}) and related exceptions.
+Provides collections base class (L{Collection}), the outcome of bulk
+operations on collections (L{BulkResult}), the helper running them
+(L{run_many}) and related exceptions.
 """
 
 from builtins import str
 from builtins import object
+from builtins import range
+import threading
+
+from comodit_client.api.entity import make_stub
 from comodit_client.api.exceptions import PythonApiException
+from comodit_client.api.table import Table
 from comodit_client.rest.exceptions import ApiException
 
+OFFSET_PARAMETER = "start"
+"""
+Query parameter giving the index of the first entity of a page.
+"""
+
+LIMIT_PARAMETER = "num"
+"""
+Query parameter giving the maximum number of entities of a page.
+"""
+
+BULK_WORKERS = 4
+"""
+Default maximum number of concurrent requests sent by bulk operations.
+"""
+
 class EntityNotFoundException(PythonApiException):
     """
     Exception raised when an entity was not found in a collection.
@@ -22,6 +44,79 @@ class EntityNotFoundException(PythonApiException):
         """
         super(EntityNotFoundException, self).__init__("Entity not found: " + identifier)
 
+class BulkResult(object):
+    """
+    Outcome of a bulk operation (see L{Collection.get_many}). For each item
+    of the operation, in the same order, C{results} holds the result (or
+    None if the operation failed on the item) and C{errors} the raised
+    exception (or None).
+
+    Results may be iterated and indexed like a list.
+    """
+
+    def __init__(self, items, results, errors):
+        """
+        Creates a bulk result.
+
+        @param items: Operation's items (identifiers or entities).
+        @type items: list
+        @param results: Results.
+        @type results: list
+        @param errors: Exceptions.
+        @type errors: list
+        """
+
+        self.items = items
+        self.results = results
+        self.errors = errors
+
+    @property
+    def succeeded(self):
+        """
+        Results of successful operations.
+
+        @rtype: list
+        """
+
+        return [r for (r, e) in zip(self.results, self.errors) if e is None]
+
+    @property
+    def failed(self):
+        """
+        Items on which the operation failed, with associated exception.
+
+        @rtype: list of (item, exception) pairs
+        """
+
+        return [(i, e) for (i, e) in zip(self.items, self.errors) if e is not None]
+
+    def has_errors(self):
+        """
+        Tells if the operation failed on at least one item.
+
+        @rtype: bool
+        """
+
+        return any(e is not None for e in self.errors)
+
+    def raise_first(self):
+        """
+        Raises the first exception of the operation, if any.
+        """
+
+        for e in self.errors:
+            if e is not None:
+                raise e
+
+    def __len__(self):
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
 class Collection(object):
     """
     Collections base class. ComodIT server maintains collections of entities.
@@ -47,6 +142,23 @@ class Collection(object):
     Above snippet is equivalent to:
         >>> for r in c.list():
         ...    print r.name
+
+    unless client's page size is set (see L{Client<comodit_client.api.Client>}),
+    in which case entities are fetched page by page while iterating (see
+    L{paginate}).
+
+    If client's identity map is enabled, entities retrieved with L{get}
+    (without query parameters), created, updated or refreshed are mapped
+    and returned by subsequent calls to L{get}.
+
+    If client is lazy, L{get} returns lazy entities (see L{stub}).
+
+    Large collections may be fetched into a compact column store with
+    L{to_table}.
+
+    Several entities may be retrieved, created, updated or deleted at once
+    with concurrent requests (see L{get_many}, L{create_many}, L{update_many}
+    and L{delete_many}).
     """
 
     def __init__(self, client, url):
@@ -74,6 +186,24 @@ class Collection(object):
 
         return self.client._http_client
 
+    @property
+    def _identity_map(self):
+        """
+        Identity map of the client, None if disabled.
+        """
+
+        return getattr(self.client, "identity_map", None)
+
+    def _entity_url(self, identifier):
+        if identifier:
+            return self.url + identifier + "/"
+        return self.url
+
+    def _remember(self, entity, url = None):
+        identity_map = self._identity_map
+        if identity_map is not None:
+            identity_map.put(url or entity.url, entity)
+
     def _handle_error(self, e, identifier):
         if e.code == 404:
             raise EntityNotFoundException(identifier)
@@ -98,11 +228,18 @@ class Collection(object):
         except ApiException as e:
             raise PythonApiException("Could not create entity: " + e.message)
         entity.set_json(result)
+        entity._mark_clean()
+        self._remember(entity)
 
     def _update(self, entity, parameters = {}):
         """
         Updates a remote entity with a local representation and updates the
-        local representation of remote entity.
+        local representation of remote entity. If client's partial updates
+        are enabled and the modified fields of the local representation are
+        known (see L{get_changes<comodit_client.util.json_wrapper.JsonWrapper.get_changes>}),
+        only these fields are sent (with a PATCH request). If server does not
+        support PATCH requests, the whole representation is sent (with a PUT
+        request) and partial updates are disabled.
 
         @param entity: Entity's local representation.
         @type entity: L{Entity}
@@ -118,12 +255,31 @@ class Collection(object):
             raise PythonApiException("Cannot update entity: identifier is empty")
 
         try:
-            result = self.client._http_client.update(self.url + entity_id,
-                                                   entity.get_json(),
-                                                   parameters = parameters)
+            result = None
+            if getattr(self.client, "partial_updates", False):
+                result = self._patch(entity, entity_id, parameters)
+            if result is None:
+                result = self.client._http_client.update(self.url + entity_id,
+                                                       entity.get_json(),
+                                                       parameters = parameters)
         except ApiException as e:
             self._handle_error(e, entity.identifier)
         entity.set_json(result)
+        entity._mark_clean()
+        self._remember(entity)
+
+    def _patch(self, entity, entity_id, parameters):
+        changes = entity.get_changes()
+        if changes is None:
+            return None
+        try:
+            return self.client._http_client.patch(self.url + entity_id, changes,
+                                                  parameters = parameters)
+        except ApiException as e:
+            if e.code not in (405, 501):
+                raise
+            self.client.partial_updates = False
+            return None
 
     def refresh(self, entity, parameters = {}):
         """
@@ -144,6 +300,8 @@ class Collection(object):
         except ApiException as e:
             raise PythonApiException("Could not refresh entity: " + e.message)
         entity.set_json(result)
+        entity._mark_clean()
+        self._remember(entity)
 
     def list(self, parameters = {}):
         """
@@ -169,6 +327,144 @@ class Collection(object):
         except ApiException as e:
             raise PythonApiException("Could not get elements: " + e.message)
 
+    def iter(self, parameters = {}):
+        """
+        Fetches the entities in this collection. Contrary to L{list}, entities
+        are decoded while the listing is being received and yielded one at a
+        time: memory usage does not depend on the size of the collection.
+        Note that the request is only sent when iteration starts.
+
+        The listing holds a pooled connection until iteration is over. If no
+        other connection would be left for requests sent while iterating (see
+        L{HttpClient.can_stream<comodit_client.rest.client.HttpClient.can_stream>}),
+        the listing is entirely received before first entity is yielded.
+
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+
+        @rtype: iterator of L{Entity}
+        """
+
+        _http_client = self.client._http_client
+        try:
+            items = _http_client.read_items(self.url, parameters = parameters)
+            if not _http_client.can_stream():
+                items = list(items)
+            for json_res in items:
+                yield self._new(json_res)
+        except ApiException as e:
+            raise PythonApiException("Could not get elements: " + e.message)
+
+    def to_table(self, fields, parameters = {}):
+        """
+        Fetches selected fields of the entities in this collection into a
+        compact column store. Entities are decoded while the listing is being
+        received and no entity object is instantiated: this is much lighter
+        than L{list} for large collections (e.g. when reporting on thousands
+        of hosts).
+
+        @param fields: Fields to keep (top-level fields of entities' JSON
+        representation or dotted paths to nested fields).
+        @type fields: list of strings
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+
+        @rtype: L{Table<comodit_client.api.table.Table>}
+        """
+
+        table = Table(fields)
+        try:
+            for json_res in self.client._http_client.read_items(self.url, parameters = parameters):
+                table.append(json_res)
+        except ApiException as e:
+            raise PythonApiException("Could not get elements: " + e.message)
+        return table
+
+    def iter_pages(self, page_size = 100, parameters = {}, prefetch = False):
+        """
+        Fetches the entities in this collection page by page: a page of at
+        most C{page_size} entities is requested only when previous page has
+        been consumed. If C{prefetch} is True, next page is requested in the
+        background while current page is being consumed.
+
+        Iteration stops with the first page holding less than C{page_size}
+        entities. If server does not support paging (i.e. returns more
+        entities than requested), the whole collection is yielded as a single
+        page.
+
+        @param page_size: Maximum number of entities per page.
+        @type page_size: int
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+        @param prefetch: If True, next page is fetched in advance.
+        @type prefetch: bool
+
+        @rtype: iterator of lists of L{Entity}
+        """
+
+        if page_size < 1:
+            raise ValueError("Page size must be greater than 0")
+
+        offset = 0
+        pending = None
+        first = None
+        while True:
+            if pending is not None:
+                items = pending.get()
+                pending = None
+            else:
+                items = self._read_page(offset, page_size, parameters)
+
+            # Guard against servers ignoring paging parameters and returning
+            # exactly page_size entities.
+            if not items or items[0] == first:
+                return
+            first = items[0]
+            last = len(items) != page_size
+            offset += len(items)
+            if prefetch and not last:
+                pending = _PageRequest(self._read_page, offset, page_size, parameters)
+
+            yield [self._new(json_res) for json_res in items]
+            if last:
+                return
+
+    def paginate(self, page_size = 100, parameters = {}, prefetch = False):
+        """
+        Fetches the entities in this collection page by page (see
+        L{iter_pages}) and yields them one at a time.
+
+        @param page_size: Maximum number of entities per page.
+        @type page_size: int
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+        @param prefetch: If True, next page is fetched in advance.
+        @type prefetch: bool
+
+        @rtype: iterator of L{Entity}
+        """
+
+        for page in self.iter_pages(page_size, parameters, prefetch):
+            for entity in page:
+                yield entity
+
+    def _read_page(self, offset, page_size, parameters):
+        params = dict(parameters)
+        params[OFFSET_PARAMETER] = offset
+        params[LIMIT_PARAMETER] = page_size
+        try:
+            result = self.client._http_client.read(self.url, parameters = params)
+        except ApiException as e:
+            raise PythonApiException("Could not get elements: " + e.message)
+        return result.get("items") or []
+
+    def _list_parameters(self):
+        """
+        Query parameters sent when the collection is iterated.
+        """
+
+        return {}
+
     def __iter__(self):
         """
         Provides an iterator on the entities of this collection.
@@ -177,7 +473,10 @@ class Collection(object):
         @rtype: iterator
         """
 
-        return self.list().__iter__()
+        page_size = getattr(self.client, "page_size", 0)
+        if page_size:
+            return self.paginate(page_size, self._list_parameters(), prefetch = True)
+        return self.list(self._list_parameters()).__iter__()
 
     def get(self, identifier = "", parameters = {}):
         """
@@ -198,11 +497,46 @@ class Collection(object):
         if not identifier and not self.accept_empty_id:
             raise PythonApiException("Cannot get entity: identifier is empty")
 
+        # Entities fetched with query parameters may differ, they are not
+        # mapped.
+        identity_map = self._identity_map
+        if identity_map is not None and not parameters:
+            entity = identity_map.get(self._entity_url(identifier))
+            if entity is not None:
+                return entity
+        if not parameters and getattr(self.client, "lazy", False):
+            return make_stub(self._new(), identifier)
+
         try:
             result = self.client._http_client.read(self.url + identifier, parameters = parameters)
-            return self._new(result)
+            entity = self._new(result)
         except ApiException as e:
             self._handle_error(e, identifier)
+        if not parameters:
+            self._remember(entity, self._entity_url(identifier))
+        return entity
+
+    def stub(self, identifier = ""):
+        """
+        Provides a lazy representation of a particular entity of this
+        collection: no request is sent until the state of the entity is
+        accessed. For instance, listing the changes of a host with
+        C{hosts.stub("my-host").changes().list()} sends a single request.
+
+        @param identifier: The identifier of the entity.
+        @type identifier: string
+
+        @return: A lazy entity representation.
+        @rtype: L{Entity}
+
+        @raise EntityNotFoundException: When the state of the entity is
+        accessed, if the entity was not found on the server.
+        """
+
+        if not identifier and not self.accept_empty_id:
+            raise PythonApiException("Cannot get entity: identifier is empty")
+
+        return make_stub(self._new(), identifier)
 
     def delete(self, identifier, parameters = {}):
         """
@@ -223,6 +557,84 @@ class Collection(object):
             if e.code != 404:
                 self._handle_error(e, identifier)
 
+    def get_many(self, identifiers, parameters = {}, workers = BULK_WORKERS):
+        """
+        Retrieves several entities of this collection. Requests are sent
+        concurrently by at most C{workers} threads. A failure (for instance,
+        an entity not found) does not stop the retrieval of other entities:
+        it is reported in returned result.
+
+        @param identifiers: The identifiers of the entities to retrieve.
+        @type identifiers: list of strings
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+        @param workers: Maximum number of concurrent requests.
+        @type workers: int
+
+        @return: Retrieved entities, in the order of C{identifiers}.
+        @rtype: L{BulkResult}
+        """
+
+        return run_many(lambda identifier: self.get(identifier, parameters),
+                         identifiers, workers)
+
+    def create_many(self, entities, workers = BULK_WORKERS):
+        """
+        Creates several remote entities given their local representations
+        (see L{Entity.create<comodit_client.api.entity.Entity.create>}).
+        Requests are sent concurrently by at most C{workers} threads.
+
+        @param entities: Local representations of the entities.
+        @type entities: list of L{Entity}
+        @param workers: Maximum number of concurrent requests.
+        @type workers: int
+
+        @return: Created entities, in the order of C{entities}.
+        @rtype: L{BulkResult}
+        """
+
+        return run_many(_create_entity, entities, workers)
+
+    def update_many(self, entities, force = False, workers = BULK_WORKERS):
+        """
+        Updates several remote entities with their local representations
+        (see L{Entity.update<comodit_client.api.entity.Entity.update>}).
+        Requests are sent concurrently by at most C{workers} threads.
+
+        @param entities: Local representations of the entities.
+        @type entities: list of L{Entity}
+        @param force: Updates are forced.
+        @type force: bool
+        @param workers: Maximum number of concurrent requests.
+        @type workers: int
+
+        @return: Updated entities, in the order of C{entities}.
+        @rtype: L{BulkResult}
+        """
+
+        return run_many(lambda entity: _update_entity(entity, force), entities, workers)
+
+    def delete_many(self, identifiers, parameters = {}, workers = BULK_WORKERS):
+        """
+        Deletes several entities of this collection. Requests are sent
+        concurrently by at most C{workers} threads.
+
+        @param identifiers: The identifiers of the entities to delete.
+        @type identifiers: list of strings
+        @param parameters: Query parameters to send to ComodIT server.
+        @type parameters: dict of strings
+        @param workers: Maximum number of concurrent requests.
+        @type workers: int
+
+        @return: Deleted identifiers, in the order of C{identifiers}.
+        @rtype: L{BulkResult}
+        """
+
+        def delete(identifier):
+            self.delete(identifier, parameters)
+            return identifier
+        return run_many(delete, identifiers, workers)
+
     def clear(self, parameters = {}):
         """
         Clears the content of the collection i.e. deletes all entities of the
@@ -234,3 +646,86 @@ class Collection(object):
         """
 
         self.client._http_client.delete(self.url, parameters = parameters)
+
+
+class _PageRequest(object):
+    """
+    Page fetched in a background thread.
+    """
+
+    def __init__(self, function, *args):
+        self._function = function
+        self._args = args
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target = self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self._result = self._function(*self._args)
+        except Exception as e:
+            self._error = e
+
+    def get(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def _create_entity(entity):
+    entity.create()
+    return entity
+
+
+def _update_entity(entity, force):
+    entity.update(force)
+    return entity
+
+
+def run_many(function, items, workers):
+    """
+    Applies a function to each item using at most C{workers} threads and
+    collects results and exceptions in a L{BulkResult}. Calling thread also
+    applies the function.
+
+    @param function: A function taking an item.
+    @type function: function
+    @param items: The items.
+    @type items: list
+    @param workers: Maximum number of concurrent calls.
+    @type workers: int
+    @rtype: L{BulkResult}
+    """
+
+    if workers < 1:
+        raise ValueError("Number of workers must be greater than 0")
+
+    items = list(items)
+    results = [None] * len(items)
+    errors = [None] * len(items)
+    indexes = iter(range(len(items)))
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                index = next(indexes, None)
+            if index is None:
+                return
+            try:
+                results[index] = function(items[index])
+            except Exception as e:
+                errors[index] = e
+
+    threads = [threading.Thread(target = work) for _ in range(min(workers, len(items)) - 1)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    # Calling thread also processes items
+    work()
+    for thread in threads:
+        thread.join()
+    return BulkResult(items, results, errors)
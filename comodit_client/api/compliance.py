@@ -25,6 +25,8 @@ class State(JsonWrapper):
     Base class of an application resource's state.
     """
 
+    __slots__ = ()
+
     pass
 
 
@@ -33,6 +35,8 @@ class ServiceState(State):
     State of a service.
     """
 
+    __slots__ = ()
+
     @property
     def running(self):
         """
@@ -72,6 +76,8 @@ class FileState(State):
     State of a file.
     """
 
+    __slots__ = ()
+
     @property
     def creation_time(self):
         """
@@ -167,6 +173,8 @@ class PackageState(State):
     State of a package.
     """
 
+    __slots__ = ()
+
     @property
     def installed(self):
         """
@@ -194,6 +202,8 @@ class UserState(State):
     State of a user.
     """
 
+    __slots__ = ()
+
     @property
     def present(self):
         """
@@ -298,6 +308,8 @@ class GroupState(State):
     State of a group.
     """
 
+    __slots__ = ()
+
     @property
     def present(self):
         """
@@ -347,6 +359,8 @@ class RepositoryState(State):
     State of a repository.
     """
 
+    __slots__ = ()
+
     @property
     def present(self):
         """
@@ -1,11 +1,15 @@
 # coding: utf-8
 """
-Provides entities base class (L{Entity}).
+Provides entities base class (L{Entity}) and lazy entities helper
+(L{make_stub}).
 """
 from __future__ import print_function
 
 import os
+import threading
 
+from comodit_client.api.polling import poll
+from comodit_client.rest.exceptions import ApiException
 from comodit_client.util.json_wrapper import JsonWrapper
 import comodit_client.util.path as path
 
@@ -26,6 +30,9 @@ class Entity(JsonWrapper):
     without collection, in which case you will still be able to alter object's
     state. However, it will be impossible to commit these changes unless
     L{collection} field is set.
+
+    An entity may also be lazy (see L{Collection.stub<collection.Collection.stub>}):
+    its state is only fetched when first accessed.
     """
 
     def __init__(self, collection, json_data = None):
@@ -188,10 +195,13 @@ class Entity(JsonWrapper):
         current_url = self.url
         self._set_field("name",new_name)
         self.set_json(self._http_client.update(current_url, self.get_json()))
+        self._mark_clean()
+        self.collection._remember(self)
 
     def update(self, force = False):
         """
-        Updates remote entity with this object's state.
+        Updates remote entity with this object's state. If client's partial
+        updates are enabled, only modified fields are sent.
 
         @param force: Update is forced (optional)
         @type force: bool
@@ -274,3 +284,82 @@ class Entity(JsonWrapper):
         """
         self.load_json(os.path.join(input_folder, "definition.json"))
 
+    def _poll(self, condition, time_out = 0, deadline = None, cancel = None):
+        """
+        Checks a condition with client's polling policy (see
+        L{poll<comodit_client.api.polling.poll>}).
+        """
+
+        policy = getattr(self.client, "polling_policy", None)
+        return poll(condition, policy, time_out, deadline, cancel)
+
+
+
+class _Stub(object):
+    """
+    Mixin of lazy entities. A lazy entity only knows its identifier, its
+    state is fetched from ComodIT server when first accessed (or replaced
+    when set). The entity is then turned into a regular instance of its
+    class.
+    """
+
+    @property
+    def _json_data(self):
+        self._resolve()
+        return self._json_data
+
+    @_json_data.setter
+    def _json_data(self, json_data):
+        self._unstub(json_data)
+
+    @property
+    def identifier(self):
+        return self._stub_identifier
+
+    @property
+    def url(self):
+        return self.collection._entity_url(self._stub_identifier)
+
+    def _resolve(self):
+        collection = self.collection
+        identifier = self._stub_identifier
+        try:
+            json_data = collection._http_client.read(collection.url + identifier)
+        except ApiException as e:
+            collection._handle_error(e, identifier)
+        self._unstub(json_data)
+        collection._remember(self)
+
+    def _unstub(self, json_data):
+        self.__class__ = self._entity_class
+        del self._stub_identifier
+        self._json_data = json_data
+
+
+_stub_classes = {}
+_stub_classes_lock = threading.Lock()
+
+def make_stub(entity, identifier):
+    """
+    Turns an entity into a lazy entity: no request is sent until entity's
+    state is accessed. Entity's L{url<Entity.url>} and
+    L{identifier<Entity.identifier>} are available without fetching its
+    state, sub-collections and actions may therefore be used right away.
+
+    @param entity: An entity without state, associated to a collection.
+    @type entity: L{Entity}
+    @param identifier: The identifier of the entity in its collection.
+    @type identifier: string
+    @return: The lazy entity.
+    @rtype: L{Entity}
+    """
+
+    cls = entity.__class__
+    with _stub_classes_lock:
+        stub_class = _stub_classes.get(cls)
+        if stub_class is None:
+            stub_class = type(cls.__name__, (_Stub, cls), {"_entity_class": cls})
+            _stub_classes[cls] = stub_class
+    entity._stub_identifier = identifier
+    entity.__class__ = stub_class
+    return entity
@@ -20,6 +20,8 @@ class Delimiter(JsonWrapper):
     the following string: '${foo}'.
     """
 
+    __slots__ = ()
+
     @property
     def start(self):
         """
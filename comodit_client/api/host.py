@@ -2,7 +2,8 @@
 """
 Provides the classes related to host entity, in particular L{Host}
 and L{HostCollection}. L{Host instance entity class<Instance>} is also provided by this
-module.
+module, as well as L{FleetWaiter} which waits for many hosts at once and
+L{ProvisioningPipeline} which provisions many hosts at once.
 """
 from __future__ import print_function
 from __future__ import absolute_import
@@ -10,10 +11,14 @@ from __future__ import absolute_import
 from builtins import str
 from builtins import object
 from .exceptions import PythonApiException
+import heapq
+import itertools
+import threading
 import time
+from six.moves import queue
 
 from comodit_client.api.audit import AuditLogCollection
-from comodit_client.api.collection import Collection
+from comodit_client.api.collection import Collection, BulkResult, EntityNotFoundException
 from comodit_client.api.compliance import ComplianceCollection
 from comodit_client.api.contexts import ApplicationContextCollection, \
     PlatformContextCollection, DistributionContextCollection
@@ -25,6 +30,7 @@ from comodit_client.api.notificationLog import NotificationLogCollection
 from comodit_client.api.agentLog import AgentLogCollection
 from comodit_client.api.otherLog import OtherLogCollection
 from comodit_client.api.orchestration import OrchestrationCollection
+from comodit_client.api.polling import PollingPolicy
 
 
 class HostCollection(Collection):
@@ -103,6 +109,8 @@ class Property(JsonWrapper):
     A host instance property. A property is composed of a key and a value.
     """
 
+    __slots__ = ()
+
     @property
     def key(self):
         """
@@ -141,6 +149,8 @@ class Vnc(JsonWrapper):
     A host instance's VNC connection data.
     """
 
+    __slots__ = ()
+
     @property
     def hostname(self):
         """
@@ -214,6 +224,17 @@ class Instance(Entity):
     handling: start, pause, resume, power-off and shutdown.
     """
 
+    class State(object):
+        """
+        The states an instance can be in (see L{state}).
+        """
+
+        UNDEFINED = "UNDEFINED"
+        PENDING = "PENDING"
+        RUNNING = "RUNNING"
+        PAUSED = "PAUSED"
+        STOPPED = "STOPPED"
+
     @property
     def name(self):
         return ""
@@ -269,8 +290,7 @@ class Instance(Entity):
     @property
     def state(self):
         """
-        Instance's state. Possible values are: UNDEFINED, PENDING, RUNNING,
-        PAUSED, STOPPED.
+        Instance's state (see L{Instance.State}).
 
         @rtype: string
         """
@@ -485,32 +505,36 @@ class Instance(Entity):
         for p in props:
             print(" "*(indent + 2), p.key, ":", p.value)
 
-    def wait_for_property(self, key, time_out = 0):
+    def wait_for_property(self, key, time_out = 0, deadline = None, cancel = None):
         """
         Waits until a property with given key appears (or a time-out occurs) in
-        remote instance's state and returns its value. If a time-out occurred, the
-        method returns None.
+        remote instance's state and returns its value. If a time-out occurred or
+        the wait was cancelled, the method returns None. Instance is polled as
+        described in L{comodit_client.api.polling}.
 
         @param key: Property's key.
         @type key: string
         @param time_out: A time-out expressed in seconds. A time-out of 0 seconds
         means no time-out (method can wait forever).
         @type time_out: int
+        @param deadline: Time (as returned by C{time.time()}) after which the
+        method stops waiting (optional).
+        @type deadline: float
+        @param cancel: An event cancelling the wait when set (optional).
+        @type cancel: C{threading.Event}
         @return: The value associated to given key.
         @rtype: string
         """
 
-        self.refresh()
-        start_time = time.time()
-        while not self.get_property(key):
-            time.sleep(3)
-            now = time.time()
-            if time_out > 0 and (now - start_time) > time_out:
-                return None
+        def has_property():
             self.refresh()
+            return bool(self.get_property(key))
+
+        if not self._poll(has_property, time_out, deadline, cancel):
+            return None
         return self.get_property(key)
 
-    def wait_for_address(self, time_out = 0):
+    def wait_for_address(self, time_out = 0, deadline = None, cancel = None):
         """
         Waits until remote instance's IP address or DNS name is known. If a
         time-out occurred, the method may return None. The returned value is
@@ -523,11 +547,16 @@ class Instance(Entity):
         @param time_out: A time-out expressed in seconds. A time-out of 0 seconds
         means no time-out (method can wait forever).
         @type time_out: int
+        @param deadline: Time (as returned by C{time.time()}) after which the
+        method stops waiting (optional).
+        @type deadline: float
+        @param cancel: An event cancelling the wait when set (optional).
+        @type cancel: C{threading.Event}
         @return: The instance's address.
         @rtype: string
         """
 
-        ip = self.wait_for_property("ip.eth0", time_out)
+        ip = self.wait_for_property("ip.eth0", time_out, deadline, cancel)
         hostname = self.get_property("publicDnsName")
         publicip = self.get_property("publicIp")
         if hostname:
@@ -537,25 +566,30 @@ class Instance(Entity):
         else:
             return ip
 
-    def wait_for_state(self, state, time_out = 0):
+    def wait_for_state(self, state, time_out = 0, deadline = None, cancel = None):
         """
-        Waits until instance has requested state.
+        Waits until instance has requested state. Instance is polled as
+        described in L{comodit_client.api.polling}.
 
         @param state: The expected state (see L{Instance.State}).
         @type state: string
         @param time_out: A time-out expressed in seconds. A time-out of 0 seconds
         means no time-out (method can wait forever).
         @type time_out: int
+        @param deadline: Time (as returned by C{time.time()}) after which the
+        method stops waiting (optional).
+        @type deadline: float
+        @param cancel: An event cancelling the wait when set (optional).
+        @type cancel: C{threading.Event}
+        @return: False if a time-out occurred or the wait was cancelled.
+        @rtype: bool
         """
 
-        start_time = time.time()
-        self.refresh()
-        while self.state != state:
-            time.sleep(3)
-            now = time.time()
-            if time_out > 0 and (now - start_time) > time_out:
-                break
+        def has_state():
             self.refresh()
+            return self.state == state
+
+        return self._poll(has_state, time_out, deadline, cancel)
 
     def create_image(self, image):
         """
@@ -575,6 +609,8 @@ class Task(JsonWrapper):
     Represents a task of a L{host<Host>}'s particular L{change<Change>}.
     """
 
+    __slots__ = ()
+
     @property
     def order_num(self):
         """
@@ -747,6 +783,107 @@ class ChangeCollection(Collection):
         params["show_processed"] = show_processed
         return super(ChangeCollection, self).list(parameters = params)
 
+    def _list_parameters(self):
+        return {"show_processed": False}
+
+
+class ChangeTracker(object):
+    """
+    Tracks the changes of a host without listing its whole change history on
+    each poll. An unknown change is looked up among host's pending changes
+    and, only if it is not pending anymore, among all host's changes. Once
+    known, a change is fetched alone (by its order number) and, when its
+    tasks terminated, its state is kept and not fetched anymore. Waiting for
+    a change (see L{is_terminated}) therefore costs a single small request
+    per poll, whatever the length of host's change history.
+
+    A tracker is provided by L{Host.change_tracker}.
+    """
+
+    def __init__(self, host):
+        """
+        Creates a change tracker.
+
+        @param host: The host whose changes are tracked.
+        @type host: L{Host}
+        """
+
+        self.host = host
+        self.last_order_num = None
+        self._changes = {}
+        self._missing = set()
+        self._terminated = set()
+
+    def _record(self, changes):
+        for change in changes:
+            if change.change_id in self._changes:
+                continue
+            self._changes[change.change_id] = change
+            self._missing.discard(change.change_id)
+            if self.last_order_num is None or change.order_num > self.last_order_num:
+                self.last_order_num = change.order_num
+
+    def update(self, show_processed = False):
+        """
+        Lists host's pending changes (or all host's changes) and starts
+        tracking the ones that were not tracked yet.
+
+        @param show_processed: If True, processed changes are also listed.
+        @type show_processed: bool
+        @return: Listed changes.
+        @rtype: list of L{Change}
+        """
+
+        changes = self.host.changes().list(show_processed = show_processed)
+        self._record(changes)
+        return changes
+
+    def get(self, change_id):
+        """
+        Provides a tracked change, looking it up if it is not tracked yet.
+        Tracked changes are not refreshed.
+
+        @param change_id: The key of the change (see L{Change.change_id}).
+        @type change_id: string
+        @return: The change or None if host has no such change.
+        @rtype: L{Change}
+        """
+
+        if change_id not in self._changes and change_id not in self._missing:
+            self.update()
+            if change_id not in self._changes:
+                self.update(show_processed = True)
+            if change_id not in self._changes:
+                self._missing.add(change_id)
+        return self._changes.get(change_id)
+
+    def is_terminated(self, change_id):
+        """
+        Tells if a change terminated i.e. it has no more pending tasks or
+        one of its tasks failed. The change is fetched unless it was just
+        looked up or it is known to be terminated. A change the host does not
+        have is considered as terminated.
+
+        @param change_id: The key of the change (see L{Change.change_id}).
+        @type change_id: string
+        @rtype: bool
+        """
+
+        if change_id in self._terminated:
+            return True
+        change = self._changes.get(change_id)
+        if change is None:
+            change = self.get(change_id)
+            if change is None:
+                return True
+        else:
+            change.refresh()
+        if change.get_tasks_error() or not change.are_tasks_pending():
+            self._terminated.add(change_id)
+            return True
+        return False
+
+
 class MonitoringAlert(Entity):
     """
     TODO
@@ -1285,6 +1422,22 @@ class Host(HasSettings):
 
         return self.changes().get(num)
 
+    def change_tracker(self):
+        """
+        Provides the tracker of this host's changes (see L{ChangeTracker}).
+        The tracker is created on first call and then shared by all waits
+        on this host object.
+
+        @return: The change tracker.
+        @rtype: L{ChangeTracker}
+        """
+
+        tracker = self.__dict__.get("_change_tracker")
+        if tracker is None:
+            tracker = ChangeTracker(self)
+            self._change_tracker = tracker
+        return tracker
+
     def audit_logs(self):
         """
         Instantiates audit logs collection.
@@ -1352,6 +1505,17 @@ class Host(HasSettings):
 
         return self.compliance().get(identifier)
 
+    def _live_action(self, path, item = None):
+        raw = self._http_client.update(self.url + path, item, decode = False)
+        body = self._http_client.decode(raw)
+        try:
+            result = self._http_client.json_codec.loads(body) if body.strip() else None
+        except ValueError:
+            return None
+        if isinstance(result, dict):
+            return result.get("changeId")
+        return None
+
     def live_update_file(self, app_name, file_name):
         """
         Requests the update of a file on provisioned machine. This may, for
@@ -1363,9 +1527,12 @@ class Host(HasSettings):
         @type app_name: string
         @param file_name: The file's name.
         @type file_name: string
+        @return: The key of the queued change, or None if the server did not
+        return it.
+        @rtype: string
         """
 
-        self._http_client.update(self.url + "applications/" + app_name + "/files/" + file_name + "/_update", decode = False)
+        return self._live_action("applications/" + app_name + "/files/" + file_name + "/_update")
         
     def run_orchestration(self, orchestration_name):
         """
@@ -1397,9 +1564,12 @@ class Host(HasSettings):
         @type app_name: string
         @param svc_name: The service's name.
         @type svc_name: string
+        @return: The key of the queued change, or None if the server did not
+        return it.
+        @rtype: string
         """
 
-        self._http_client.update(self.url + "applications/" + app_name + "/services/" + svc_name + "/_restart", decode = False)
+        return self._live_action("applications/" + app_name + "/services/" + svc_name + "/_restart")
 
     def live_update_service(self, app_name, svc_name):
         """
@@ -1411,9 +1581,12 @@ class Host(HasSettings):
         @type app_name: string
         @param svc_name: The service's name.
         @type svc_name: string
+        @return: The key of the queued change, or None if the server did not
+        return it.
+        @rtype: string
         """
 
-        self._http_client.update(self.url + "applications/" + app_name + "/services/" + svc_name + "/_update", decode = False)
+        return self._live_action("applications/" + app_name + "/services/" + svc_name + "/_update")
 
     def live_enable_service(self, app_name, svc_name):
         """
@@ -1423,9 +1596,12 @@ class Host(HasSettings):
         @type app_name: string
         @param svc_name: The service's name.
         @type svc_name: string
+        @return: The key of the queued change, or None if the server did not
+        return it.
+        @rtype: string
         """
 
-        self._http_client.update(self.url + "applications/" + app_name + "/services/" + svc_name + "/_enable", decode = False)
+        return self._live_action("applications/" + app_name + "/services/" + svc_name + "/_enable")
 
     def live_disable_service(self, app_name, svc_name):
         """
@@ -1435,9 +1611,12 @@ class Host(HasSettings):
         @type app_name: string
         @param svc_name: The service's name.
         @type svc_name: string
+        @return: The key of the queued change, or None if the server did not
+        return it.
+        @rtype: string
         """
 
-        self._http_client.update(self.url + "applications/" + app_name + "/services/" + svc_name + "/_disable", decode = False)
+        return self._live_action("applications/" + app_name + "/services/" + svc_name + "/_disable")
 
     def live_update_package(self, app_name, pkg_name, pkg_version):
         """
@@ -1451,13 +1630,16 @@ class Host(HasSettings):
         @type pkg_name: string
         @param pkg_version: The package's version.
         @type pkg_version: string
+        @return: The key of the queued change, or None if the server did not
+        return it.
+        @rtype: string
         """
 
         res = PackageResource()
         res.name = pkg_name
         res.release = pkg_version
 
-        self._http_client.update(self.url + "applications/" + app_name + "/packages/" + pkg_name, res.get_json(), decode = False)
+        return self._live_action("applications/" + app_name + "/packages/" + pkg_name, res.get_json())
 
     def install(self, name, settings = {}):
         """
@@ -1484,25 +1666,30 @@ class Host(HasSettings):
 
         self.applications().delete(name)
 
-    def wait_for_state(self, state, time_out = 0):
+    def wait_for_state(self, state, time_out = 0, deadline = None, cancel = None):
         """
-        Waits until host has requested state.
+        Waits until host has requested state. Host is polled as described in
+        L{comodit_client.api.polling}.
 
         @param state: The expected state (see L{Host.State}).
         @type state: string
         @param time_out: A time-out expressed in seconds. A time-out of 0 seconds
         means no time-out (method can wait forever).
         @type time_out: int
+        @param deadline: Time (as returned by C{time.time()}) after which the
+        method stops waiting (optional).
+        @type deadline: float
+        @param cancel: An event cancelling the wait when set (optional).
+        @type cancel: C{threading.Event}
+        @return: False if a time-out occurred or the wait was cancelled.
+        @rtype: bool
         """
 
-        start_time = time.time()
-        self.refresh()
-        while self.state != state:
-            time.sleep(3)
-            now = time.time()
-            if time_out > 0 and (now - start_time) > time_out:
-                break
+        def has_state():
             self.refresh()
+            return self.state == state
+
+        return self._poll(has_state, time_out, deadline, cancel)
 
     def _are_changes_pending(self):
         for c in self.changes():
@@ -1510,44 +1697,59 @@ class Host(HasSettings):
                 return True
         return False
 
-    def _change_terminated(self, changeId):
-        for c in self.all_changes():
-            if c.change_id == changeId:
-                taskErrors = c.get_tasks_error()
-                if taskErrors:
-                    for t in taskErrors:
-                        print("error ", t.error)
-                    return True;
-                if c.are_tasks_pending():
-                    return False
-        return True
-
-    def wait_for_pending_changes(self, time_out = 0):
+    def wait_for_pending_changes(self, time_out = 0, deadline = None, cancel = None):
         """
-        Waits until host has no more pending changes.
+        Waits until host has no more pending changes. Changes are polled as
+        described in L{comodit_client.api.polling}.
 
         @param time_out: A time-out expressed in seconds. A time-out of 0 seconds
         means no time-out (method can wait forever).
         @type time_out: int
+        @param deadline: Time (as returned by C{time.time()}) after which the
+        method stops waiting (optional).
+        @type deadline: float
+        @param cancel: An event cancelling the wait when set (optional).
+        @type cancel: C{threading.Event}
+        @return: False if a time-out occurred or the wait was cancelled.
+        @rtype: bool
         """
 
-        start_time = time.time()
-        while self._are_changes_pending():
-            time.sleep(3)
-            now = time.time()
-            if time_out > 0 and (now - start_time) > time_out:
-                break
+        return self._poll(lambda: not self._are_changes_pending(), time_out, deadline, cancel)
 
-    def wait_for_change_terminated(self, change_id, time_out = 0):
-        start_time = time.time()
-        while not self._change_terminated(change_id):
-            time.sleep(3)
-            now = time.time()
-            if time_out > 0 and (now - start_time) > time_out:
-                break
+    def wait_for_change_terminated(self, change_id, time_out = 0, deadline = None, cancel = None):
+        """
+        Waits until a change has no more pending tasks or one of its tasks
+        failed (task errors are then printed to standard output). The change
+        is tracked by host's L{ChangeTracker}: only the change itself is
+        polled (as described in L{comodit_client.api.polling}).
+
+        @param change_id: The key of the change (see L{Change.change_id}).
+        @type change_id: string
+        @param time_out: A time-out expressed in seconds. A time-out of 0 seconds
+        means no time-out (method can wait forever).
+        @type time_out: int
+        @param deadline: Time (as returned by C{time.time()}) after which the
+        method stops waiting (optional).
+        @type deadline: float
+        @param cancel: An event cancelling the wait when set (optional).
+        @type cancel: C{threading.Event}
+        @return: False if a time-out occurred or the wait was cancelled.
+        @rtype: bool
+        """
+
+        terminated = _ChangeTerminated(change_id)
+        if not self._poll(lambda: terminated(self), time_out, deadline, cancel):
+            return False
+        change = self.change_tracker().get(change_id)
+        if change is not None:
+            for t in change.get_tasks_error():
+                print("error ", t.error)
+        return True
 
 
 class PackageResource(JsonWrapper):
+
+    __slots__ = ()
     
     @property
     def name(self):
@@ -1565,4 +1767,565 @@ class PackageResource(JsonWrapper):
     @release.setter
     def release(self, release):
         
-        self._set_field("release", release)
\ No newline at end of file
+        self._set_field("release", release)
+
+
+class _WaitEntry(object):
+    """
+    Steps a L{FleetWaiter} goes through on a host. A step is a
+    (stage, budget, condition) triple: condition is called with the host
+    until it returns True, at most as many conditions of the same budget
+    being called concurrently as allowed by waiter's limits.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.conditions = []
+        self.attempt = 0
+        self.done = False
+        self.error = None
+        self.policy = getattr(host.client, "polling_policy", None) or PollingPolicy()
+
+    @property
+    def stage(self):
+        return self.conditions[0][0]
+
+    @property
+    def budget(self):
+        return self.conditions[0][1]
+
+    def check(self):
+        return self.conditions[0][2](self.host)
+
+
+class ChangeFailedException(PythonApiException):
+    """
+    Exception raised when tasks of a change failed (see
+    L{FleetWaiter.wait_for_change_terminated}).
+    """
+
+    def __init__(self, change, tasks):
+        """
+        Creates a ChangeFailedException instance.
+
+        @param change: The change.
+        @type change: L{Change}
+        @param tasks: Failed tasks.
+        @type tasks: list of L{Task}
+        """
+
+        super(ChangeFailedException, self).__init__("Change %s failed: %s" %
+                                                    (change.order_num, "; ".join(str(t.error) for t in tasks)))
+        self.change = change
+        self.tasks = tasks
+
+
+class _ChangeTerminated(object):
+    """
+    Condition holding when a change terminated (see
+    L{Host.wait_for_change_terminated}). If C{check_tasks} is True, a
+    L{ChangeFailedException} is raised when tasks of the change failed.
+    """
+
+    def __init__(self, change_id, check_tasks = False):
+        self.change_id = change_id
+        self.check_tasks = check_tasks
+
+    def __call__(self, host):
+        tracker = host.change_tracker()
+        if not tracker.is_terminated(self.change_id):
+            return False
+        if self.check_tasks:
+            change = tracker.get(self.change_id)
+            failed = change.get_tasks_error() if change is not None else []
+            if failed:
+                raise ChangeFailedException(change, failed)
+        return True
+
+
+def _has_state(state):
+    def condition(host):
+        host.refresh()
+        return host.state == state
+    return condition
+
+
+def _has_property(key):
+    def condition(host):
+        return bool(host.get_instance().get_property(key))
+    return condition
+
+
+def _no_pending_changes(host):
+    return not host._are_changes_pending()
+
+
+def _instance_has_state(state):
+    def condition(host):
+        try:
+            return host.get_instance().state == state
+        except EntityNotFoundException:
+            return False
+    return condition
+
+
+def _create(host):
+    host.create()
+    return True
+
+
+def _provision(host):
+    host.provision()
+    return True
+
+
+class FleetWaiter(object):
+    """
+    Waits for conditions on many hosts at once: total wait time is the one of
+    the slowest host instead of the sum of all waits. Conditions are
+    registered per host, a host being complete when all its conditions held,
+    in registration order. For instance, the following snippet waits until
+    hosts of an environment are ready and have no pending changes, and prints
+    hosts as soon as they are complete.
+        >>> waiter = FleetWaiter()
+        >>> for host in hosts:
+        ...     waiter.wait_for_state(host, Host.State.READY)
+        ...     waiter.wait_for_pending_changes(host)
+        >>> for (host, error) in waiter.iter_completed(time_out = 600):
+        ...     print host.name, error or "ready"
+
+    Hosts are polled from a single scheduler loop, each host following the
+    polling policy of its client (see
+    L{PollingPolicy<comodit_client.api.polling.PollingPolicy>}). Polls are
+    sent by at most C{max_in_flight} threads and, if C{max_rate} is greater
+    than 0, at most C{max_rate} polls are sent per second for the whole
+    fleet.
+
+    Any step may be registered with L{add_stage}: a stage is a condition
+    called with the host until it returns True. Each stage is charged to a
+    budget (C{"poll"} by default) whose number of concurrent calls may be
+    bounded with C{limits}, e.g. to send at most 2 provisioning requests at
+    a time while polling other hosts.
+    """
+
+    def __init__(self, max_in_flight = 4, max_rate = 0, limits = None, on_step = None):
+        """
+        Creates a fleet waiter.
+
+        @param max_in_flight: Maximum number of concurrent polls.
+        @type max_in_flight: int
+        @param max_rate: Maximum number of polls per second. 0 means no limit.
+        @type max_rate: float
+        @param limits: Maximum number of concurrent calls per budget (see
+        L{add_stage}). Budgets without limit are only bounded by
+        C{max_in_flight}.
+        @type limits: dict
+        @param on_step: A function called with a host and a stage as soon as
+        the host completed the stage (optional).
+        @type on_step: function
+        """
+
+        if max_in_flight < 1:
+            raise ValueError("Number of concurrent polls must be greater than 0")
+
+        self.max_in_flight = max_in_flight
+        self.max_rate = max_rate
+        self._entries = []
+        self._entries_by_url = {}
+        self.limits = dict(limits or {})
+        self.on_step = on_step
+
+    def _entry(self, host):
+        return self._entries_by_url.get(host.url)
+
+    def add_stage(self, host, condition, stage, budget = "poll"):
+        """
+        Waits until a condition holds on a host, after the stages already
+        registered for this host.
+
+        @param host: The host.
+        @type host: L{Host}
+        @param condition: A function called with the host and returning
+        True when the stage is over. An exception raised by the condition
+        makes the host fail.
+        @type condition: function
+        @param stage: The name of the stage (see L{stage}).
+        @type stage: string
+        @param budget: The budget the stage is charged to (see C{limits}).
+        @type budget: string
+        @return: This waiter.
+        @rtype: L{FleetWaiter}
+        """
+
+        entry = self._entry(host)
+        if entry is None:
+            entry = _WaitEntry(host)
+            self._entries.append(entry)
+            self._entries_by_url[host.url] = entry
+        entry.conditions.append((stage, budget, condition))
+        entry.done = False
+        entry.error = None
+        return self
+
+    def wait_for_state(self, host, state):
+        """
+        Waits until a host has given state.
+
+        @param host: The host.
+        @type host: L{Host}
+        @param state: The expected state (see L{Host.State}).
+        @type state: string
+        @return: This waiter.
+        @rtype: L{FleetWaiter}
+        """
+
+        return self.add_stage(host, _has_state(state), "state")
+
+    def wait_for_property(self, host, key):
+        """
+        Waits until a property with given key appears in the state of host's
+        instance (e.g. C{ip.eth0}).
+
+        @param host: The host.
+        @type host: L{Host}
+        @param key: Property's key.
+        @type key: string
+        @return: This waiter.
+        @rtype: L{FleetWaiter}
+        """
+
+        return self.add_stage(host, _has_property(key), "property")
+
+    def wait_for_pending_changes(self, host):
+        """
+        Waits until a host has no more pending changes.
+
+        @param host: The host.
+        @type host: L{Host}
+        @return: This waiter.
+        @rtype: L{FleetWaiter}
+        """
+
+        return self.add_stage(host, _no_pending_changes, "changes")
+
+    def wait_for_change_terminated(self, host, change_id):
+        """
+        Waits until a change of a host terminated (see
+        L{Host.wait_for_change_terminated}). If tasks of the change failed,
+        the host completes with a L{ChangeFailedException}.
+
+        @param host: The host.
+        @type host: L{Host}
+        @param change_id: The key of the change (see L{Change.change_id}).
+        @type change_id: string
+        @return: This waiter.
+        @rtype: L{FleetWaiter}
+        """
+
+        return self.add_stage(host, _ChangeTerminated(change_id, True), "change")
+
+    def stage(self, host):
+        """
+        Provides the stage a host is waiting for or failed.
+
+        @param host: The host.
+        @type host: L{Host}
+        @return: The stage or None if host is complete or was not registered.
+        @rtype: string
+        """
+
+        entry = self._entry(host)
+        if entry is None or not entry.conditions:
+            return None
+        return entry.stage
+
+    @property
+    def pending(self):
+        """
+        Hosts that are not complete yet.
+
+        @rtype: list of L{Host}
+        """
+
+        return [e.host for e in self._entries if not e.done]
+
+    def iter_completed(self, time_out = 0, deadline = None, cancel = None):
+        """
+        Polls hosts and yields them as soon as they are complete, or as soon
+        as a poll failed. Iteration stops when all hosts are complete, when
+        the wait times out or when it is cancelled; hosts that are not
+        complete are then given by L{pending}.
+
+        @param time_out: A time-out expressed in seconds. A time-out of 0
+        seconds means no time-out.
+        @type time_out: float
+        @param deadline: Time (as returned by C{time.time()}) after which the
+        wait is over (optional).
+        @type deadline: float
+        @param cancel: An event cancelling the wait when set (optional).
+        @type cancel: C{threading.Event}
+        @return: Hosts and the exception raised while polling them (None if
+        the host is complete).
+        @rtype: iterator of (L{Host}, exception) pairs
+        """
+
+        if time_out > 0:
+            end = time.time() + time_out
+            deadline = end if deadline is None else min(deadline, end)
+
+        entries = [e for e in self._entries if not e.done]
+        sequence = itertools.count()
+        # Entries waiting for their next step, by budget, ordered by due time
+        waiting = {}
+
+        def schedule(entry, due):
+            heapq.heappush(waiting.setdefault(entry.budget, []), (due, next(sequence), entry))
+
+        now = time.time()
+        for entry in entries:
+            schedule(entry, now)
+        tasks = queue.Queue()
+        results = queue.Queue()
+
+        def work():
+            while True:
+                task = tasks.get()
+                if task is None:
+                    return
+                (entry, budget) = task
+                try:
+                    results.put((entry, budget, entry.check(), None))
+                except Exception as e:
+                    results.put((entry, budget, False, e))
+
+        threads = [threading.Thread(target = work) for _ in range(min(self.max_in_flight, len(entries)))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        in_flight = 0
+        busy = {}
+        next_send = now
+        try:
+            while in_flight or any(waiting.values()):
+                if cancel is not None and cancel.is_set():
+                    return
+                now = time.time()
+                if deadline is not None and now >= deadline:
+                    return
+
+                # Send due steps within the request budgets
+                wake_up = [1.0]
+                for (budget, heap) in waiting.items():
+                    limit = self.limits.get(budget, self.max_in_flight)
+                    while heap and in_flight < self.max_in_flight and busy.get(budget, 0) < limit and \
+                          heap[0][0] <= now and next_send <= now:
+                        tasks.put((heapq.heappop(heap)[2], budget))
+                        in_flight += 1
+                        busy[budget] = busy.get(budget, 0) + 1
+                        if self.max_rate > 0:
+                            next_send = max(next_send, now) + 1.0 / self.max_rate
+                    if heap and in_flight < self.max_in_flight and busy.get(budget, 0) < limit:
+                        wake_up.append(max(heap[0][0], next_send) - now)
+
+                # Sleep until a step returns or next step is due
+                if deadline is not None:
+                    wake_up.append(deadline - now)
+                if cancel is not None:
+                    wake_up.append(0.1)
+                try:
+                    (entry, budget, holds, error) = results.get(True, max(0.001, min(wake_up)))
+                except queue.Empty:
+                    continue
+                in_flight -= 1
+                busy[budget] -= 1
+
+                if error is not None:
+                    entry.done = True
+                    entry.error = error
+                    yield (entry.host, error)
+                    continue
+                if holds:
+                    stage = entry.conditions.pop(0)[0]
+                    entry.attempt = 0
+                    if self.on_step is not None:
+                        self.on_step(entry.host, stage)
+                    if not entry.conditions:
+                        entry.done = True
+                        yield (entry.host, None)
+                        continue
+                    due = time.time()
+                else:
+                    due = time.time() + entry.policy.delay(entry.attempt)
+                    entry.attempt += 1
+                schedule(entry, due)
+        finally:
+            for _ in threads:
+                tasks.put(None)
+            for thread in threads:
+                thread.join()
+
+    def wait(self, time_out = 0, deadline = None, cancel = None, callback = None):
+        """
+        Waits until all hosts are complete, the wait times out or is
+        cancelled (see L{iter_completed}).
+
+        @param time_out: A time-out expressed in seconds. A time-out of 0
+        seconds means no time-out.
+        @type time_out: float
+        @param deadline: Time (as returned by C{time.time()}) after which the
+        wait is over (optional).
+        @type deadline: float
+        @param cancel: An event cancelling the wait when set (optional).
+        @type cancel: C{threading.Event}
+        @param callback: A function called with each host and the exception
+        raised while polling it (None if the host is complete) as soon as it
+        is known (optional).
+        @type callback: function
+        @return: For each host, True if it is complete, False if it is not.
+        @rtype: L{BulkResult<comodit_client.api.collection.BulkResult>}
+        """
+
+        entries = [e for e in self._entries if not e.done]
+        for (host, error) in self.iter_completed(time_out, deadline, cancel):
+            if callback is not None:
+                callback(host, error)
+        return BulkResult([e.host for e in entries],
+                          [None if e.error is not None else e.done for e in entries],
+                          [e.error for e in entries])
+
+
+class ProvisioningException(PythonApiException):
+    """
+    Exception raised when a stage of the provisioning of a host failed (see
+    L{ProvisioningPipeline}).
+    """
+
+    def __init__(self, host, stage, error):
+        """
+        Creates a ProvisioningException instance.
+
+        @param host: The host.
+        @type host: L{Host}
+        @param stage: The stage that failed (see L{ProvisioningPipeline.STAGES}).
+        @type stage: string
+        @param error: The exception raised by the stage.
+        @type error: Exception
+        """
+
+        super(ProvisioningException, self).__init__("%s: %s failed: %s" % (host.name, stage, error))
+        self.host = host
+        self.stage = stage
+        self.error = error
+
+
+class ProvisioningPipeline(object):
+    """
+    Provisions many hosts at once. Each host goes through following stages:
+      1. C{create}: host is created (only if hosts are new, see L{run}),
+      2. C{provision}: host's provisioning is requested,
+      3. C{running}: host's instance is running,
+      4. C{address}: host's instance has an IP address (property C{ip.eth0}),
+      5. C{changes}: host has no more pending changes.
+
+    Stages are pipelined: a host enters next stage as soon as it completed
+    current one, whatever the progress of other hosts. At most
+    C{create_workers} hosts are created and C{provision_workers}
+    provisioning requests are sent at the same time. Waiting stages poll
+    hosts like a L{FleetWaiter}, at most C{max_in_flight} polls being sent at
+    the same time. If C{max_rate} is greater than 0, at most C{max_rate}
+    requests are sent per second.
+
+    A host failing a stage does not stop the provisioning of other hosts.
+    For instance, the following snippet creates and provisions 200 hosts and
+    prints the progress of each host.
+        >>> hosts = [env.hosts().new("web-%d" % i, "", "platform", "distribution", ["app"])
+        ...          for i in range(200)]
+        >>> def progress(host, stage, error):
+        ...     print host.name, stage, error or "done"
+        >>> result = ProvisioningPipeline().run(hosts, callback = progress)
+    """
+
+    STAGES = ["create", "provision", "running", "address", "changes"]
+
+    def __init__(self, create_workers = 4, provision_workers = 4, max_in_flight = 8, max_rate = 0):
+        """
+        Creates a provisioning pipeline.
+
+        @param create_workers: Maximum number of concurrent creations.
+        @type create_workers: int
+        @param provision_workers: Maximum number of concurrent provisioning
+        requests.
+        @type provision_workers: int
+        @param max_in_flight: Maximum number of concurrent polls.
+        @type max_in_flight: int
+        @param max_rate: Maximum number of requests per second. 0 means no
+        limit.
+        @type max_rate: float
+        """
+
+        if create_workers < 1 or provision_workers < 1 or max_in_flight < 1:
+            raise ValueError("Concurrency limits must be greater than 0")
+
+        self.create_workers = create_workers
+        self.provision_workers = provision_workers
+        self.max_in_flight = max_in_flight
+        self.max_rate = max_rate
+
+    def run(self, hosts, create = True, time_out = 0, deadline = None, cancel = None,
+            callback = None):
+        """
+        Provisions hosts.
+
+        @param hosts: The hosts. If C{create} is True, hosts are new host
+        objects (see L{HostCollection.new}), otherwise they are existing
+        hosts and C{create} stage is skipped.
+        @type hosts: list of L{Host}
+        @param create: If True, hosts are created.
+        @type create: bool
+        @param time_out: A time-out expressed in seconds. A time-out of 0
+        seconds means no time-out.
+        @type time_out: float
+        @param deadline: Time (as returned by C{time.time()}) after which the
+        provisioning stops (optional).
+        @type deadline: float
+        @param cancel: An event stopping the provisioning when set (optional).
+        @type cancel: C{threading.Event}
+        @param callback: A function called with a host, a stage and an
+        exception (a L{ProvisioningException}, None if the stage was
+        completed) as soon as a host completed or failed a stage (optional).
+        @type callback: function
+        @return: For each host, True if it is provisioned, False if it is not
+        (time-out or cancellation). Errors are
+        L{ProvisioningException}s.
+        @rtype: L{BulkResult<comodit_client.api.collection.BulkResult>}
+        """
+
+        hosts = list(hosts)
+        on_step = None
+        if callback is not None:
+            on_step = lambda host, stage: callback(host, stage, None)
+        waiter = FleetWaiter(self.create_workers + self.provision_workers + self.max_in_flight,
+                             self.max_rate,
+                             limits = {"create": self.create_workers,
+                                       "provision": self.provision_workers,
+                                       "poll": self.max_in_flight},
+                             on_step = on_step)
+        for host in hosts:
+            if create:
+                waiter.add_stage(host, _create, "create", "create")
+            waiter.add_stage(host, _provision, "provision", "provision")
+            waiter.add_stage(host, _instance_has_state(Instance.State.RUNNING), "running")
+            waiter.add_stage(host, _has_property("ip.eth0"), "address")
+            waiter.add_stage(host, _no_pending_changes, "changes")
+
+        failures = {}
+        def completed(host, error):
+            if error is not None:
+                failure = failures[host.url] = ProvisioningException(host, waiter.stage(host), error)
+                if callback is not None:
+                    callback(host, failure.stage, failure)
+
+        result = waiter.wait(time_out, deadline, cancel, completed)
+        errors = [failures.get(host.url) for host in hosts]
+        return BulkResult(hosts, [None if e is not None else r for (r, e) in zip(result, errors)], errors)
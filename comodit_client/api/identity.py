@@ -0,0 +1,131 @@
+# coding: utf-8
+"""
+Provides the identity map (L{IdentityMap}) a
+L{Client<comodit_client.api.Client>} may use to keep fetched entities in
+memory: while an entity is mapped, fetching it again returns the same
+object without sending any request.
+"""
+
+from builtins import object
+import threading
+import time
+from collections import OrderedDict
+
+
+class IdentityMap(object):
+    """
+    Thread-safe map of entities keyed by their URL (see
+    L{Entity.url<comodit_client.api.entity.Entity.url>}). Entities expire
+    C{ttl} seconds after they were mapped; at most C{max_entries} entities are
+    kept, least recently used ones being dropped first.
+
+    An entity is unmapped when it, or one of its ancestors or descendants, is
+    modified through the client (see L{invalidate}). Changes made by other
+    clients are only seen once mapped entities expired.
+    """
+
+    def __init__(self, ttl = 60, max_entries = 1024, clock = time.time):
+        """
+        Creates an identity map.
+
+        @param ttl: Number of seconds an entity stays mapped.
+        @type ttl: float
+        @param max_entries: Maximum number of mapped entities.
+        @type max_entries: int
+        @param clock: Function returning current time in seconds.
+        @type clock: function
+        """
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """
+        Looks up the entity mapped to given URL.
+
+        @param url: Entity's URL.
+        @type url: string
+        @return: The entity or None if no entity is mapped or if it expired.
+        @rtype: L{Entity<comodit_client.api.entity.Entity>}
+        """
+
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                (entity, expires) = entry
+                if expires > self._clock():
+                    del self._entries[url]
+                    self._entries[url] = entry
+                    self.hits += 1
+                    return entity
+                del self._entries[url]
+            self.misses += 1
+            return None
+
+    def put(self, url, entity):
+        """
+        Maps an entity to given URL.
+
+        @param url: Entity's URL.
+        @type url: string
+        @param entity: The entity.
+        @type entity: L{Entity<comodit_client.api.entity.Entity>}
+        """
+
+        with self._lock:
+            self._entries.pop(url, None)
+            self._entries[url] = (entity, self._clock() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last = False)
+
+    def invalidate(self, url):
+        """
+        Unmaps the entities possibly affected by a modification of given
+        resource: the entity at given URL, its descendants and its ancestors.
+        Trailing action segments (starting with an underscore, e.g.
+        C{_provision}) are ignored.
+
+        @param url: URL of modified resource.
+        @type url: string
+        """
+
+        segments = [s for s in url.split("?", 1)[0].split("/") if s]
+        while segments and segments[-1].startswith("_"):
+            segments.pop()
+        prefix = "/".join(segments) + "/"
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix) or prefix.startswith(k)]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        """
+        Unmaps all entities.
+        """
+
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Provides map counters.
+
+        @return: Number of mapped entities, hits, misses and invalidations.
+        @rtype: dict
+        """
+
+        with self._lock:
+            return {"entries": len(self._entries),
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "invalidations": self.invalidations}
+
+    def __len__(self):
+        return len(self._entries)
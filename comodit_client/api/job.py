@@ -155,6 +155,8 @@ class Operation(JsonWrapper):
         operation of job
     """
 
+    __slots__ = ()
+
     @property
     def description(self):
         return self._get_field("description")
@@ -203,6 +205,8 @@ class Argument(JsonWrapper):
     """
         Argument of operation
     """
+
+    __slots__ = ()
     
     @property
     def description(self):
@@ -113,6 +113,8 @@ class Notifiable(JsonWrapper):
         active notification type
     """
 
+    __slots__ = ()
+
     @property
     def description(self):
         return self._get_field("description")
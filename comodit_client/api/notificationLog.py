@@ -15,6 +15,8 @@ class NotificationLog(JsonWrapper):
     A notification log. An notification log describes all notification received by user
     """
 
+    __slots__ = ()
+
     @property
     def timestamp(self):
         """
@@ -131,6 +131,8 @@ class ApplicationOperation(JsonWrapper):
     """
         ApplicationOperation of orchestration
     """
+
+    __slots__ = ()
     
     @property
     def application(self):
@@ -193,6 +195,8 @@ class ApplicationOperation(JsonWrapper):
         self.serviceAction._show(indent + 2)    
         
 class ServiceAction(JsonWrapper):
+
+    __slots__ = ()
     @property
     def name(self):
         return self._get_field("name")
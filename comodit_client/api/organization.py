@@ -30,6 +30,8 @@ class User(JsonWrapper):
     A ComodIT user's representation.
     """
 
+    __slots__ = ()
+
     @property
     def username(self):
         """
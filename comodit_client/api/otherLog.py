@@ -15,6 +15,8 @@ class OtherLog(JsonWrapper):
     An Other log. An other log describes actions received by user
     """
 
+    __slots__ = ()
+
     @property
     def timestamp(self):
         """
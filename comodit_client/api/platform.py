@@ -79,6 +79,8 @@ class Driver(JsonWrapper):
     @see: L{Platform}
     """
 
+    __slots__ = ()
+
     @property
     def name(self):
         """
@@ -142,6 +144,8 @@ class Image(JsonWrapper):
     @see: L{Instance}
     """
 
+    __slots__ = ()
+
     @property
     def image_id(self):
         """
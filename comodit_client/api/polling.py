@@ -0,0 +1,115 @@
+# coding: utf-8
+"""
+Provides the polling engine used by the C{wait_for_*} methods of
+L{Host<comodit_client.api.host.Host>} and
+L{Instance<comodit_client.api.host.Instance>}: a condition is checked
+repeatedly, first polls being close to each other and following ones being
+more and more spaced (see L{PollingPolicy}). A wait may be bounded by a
+time-out or a deadline and cancelled from another thread.
+
+Polls refresh entities with GET requests. When the client has a response
+cache (see L{Client<comodit_client.api.Client>}), these requests are
+conditional: as long as an entity does not change, the server does not send
+it again.
+"""
+
+from builtins import object
+import random
+import time
+
+
+class PollingPolicy(object):
+    """
+    Delays between the polls of a wait. Delay after poll I{n} (starting at 0)
+    is C{min(max_delay, initial_delay * factor^n)}, randomly increased or
+    decreased by at most C{jitter} times its value so that clients waiting
+    for the same event do not poll in lockstep.
+    """
+
+    def __init__(self, initial_delay = 0.25, max_delay = 10, factor = 1.5, jitter = 0.2):
+        """
+        Creates a polling policy.
+
+        @param initial_delay: Delay in seconds after first poll.
+        @type initial_delay: float
+        @param max_delay: Maximum delay in seconds between two polls.
+        @type max_delay: float
+        @param factor: Growth factor of delays.
+        @type factor: float
+        @param jitter: Maximum relative variation of delays (between 0 and 1).
+        @type jitter: float
+        """
+
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        """
+        Computes the delay after a poll.
+
+        @param attempt: Poll's number, starting at 0.
+        @type attempt: int
+        @return: A delay in seconds.
+        @rtype: float
+        """
+
+        # Exponent is bounded to avoid overflows on (very) long waits
+        delay = self.initial_delay * (self.factor ** min(attempt, 64))
+        delay = min(self.max_delay, delay)
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0, delay)
+
+
+def poll(condition, policy = None, time_out = 0, deadline = None, cancel = None):
+    """
+    Checks a condition until it holds, the wait times out or is cancelled.
+    The condition is checked immediately, then after each delay given by the
+    policy. If a deadline is set, the condition is checked a last time when
+    it is reached.
+
+    @param condition: A function returning True when the wait is over.
+    @type condition: function
+    @param policy: Delays between polls (optional).
+    @type policy: L{PollingPolicy}
+    @param time_out: A time-out expressed in seconds. A time-out of 0 seconds
+    means no time-out.
+    @type time_out: float
+    @param deadline: Time (as returned by C{time.time()}) after which the
+    wait is over (optional).
+    @type deadline: float
+    @param cancel: An event cancelling the wait when set, e.g. by another
+    thread (optional).
+    @type cancel: C{threading.Event}
+    @return: True if the condition holds, False if the wait timed out or was
+    cancelled.
+    @rtype: bool
+    """
+
+    if policy is None:
+        policy = PollingPolicy()
+    if time_out > 0:
+        end = time.time() + time_out
+        deadline = end if deadline is None else min(deadline, end)
+
+    attempt = 0
+    while True:
+        if cancel is not None and cancel.is_set():
+            return False
+        if condition():
+            return True
+
+        delay = policy.delay(attempt)
+        attempt += 1
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            delay = min(delay, remaining)
+        if cancel is not None:
+            if cancel.wait(delay):
+                return False
+        else:
+            time.sleep(delay)
@@ -0,0 +1,285 @@
+# coding: utf-8
+"""
+Provides the rolling execution of live actions on many hosts
+(L{RollingExecution}): hosts are handled batch after batch, the changes
+queued on a batch being terminated before next batch is started. Hosts are
+selected with L{select_hosts} and operations are built with L{restart_service},
+L{update_service}, L{enable_service}, L{disable_service}, L{update_file},
+L{update_package}, L{run_orchestration} or L{run_handler}.
+
+For instance, the following snippet restarts a service on all hosts of an
+environment having application C{web} installed, 5 hosts at a time, and
+stops as soon as 2 hosts failed.
+    >>> hosts = select_hosts(client, "org", "prod", application = "web")
+    >>> rolling = RollingExecution(restart_service("web", "httpd"),
+    ...                            batch_size = 5, max_errors = 1)
+    >>> result = rolling.run(hosts)
+"""
+
+from builtins import object
+from builtins import range
+from builtins import str
+import fnmatch
+import six
+
+from comodit_client.api.collection import BulkResult, run_many
+from comodit_client.api.exceptions import PythonApiException
+from comodit_client.api.host import FleetWaiter
+
+
+def select_hosts(client, organization, environment = None, application = None, name = None):
+    """
+    Selects hosts of an organization. Hosts are listed as compact tables (see
+    L{Collection.to_table<comodit_client.api.collection.Collection.to_table>})
+    and returned as lazy entities (see
+    L{Collection.stub<comodit_client.api.collection.Collection.stub>}): no
+    host is fetched.
+
+    @param client: A client.
+    @type client: L{Client<comodit_client.api.Client>}
+    @param organization: The name of the organization.
+    @type organization: string
+    @param environment: The name of an environment. If None, hosts of all
+    environments are selected.
+    @type environment: string
+    @param application: If given, only hosts having this application
+    installed are selected.
+    @type application: string
+    @param name: If given, a pattern (e.g. C{web-*}, see C{fnmatch} module)
+    host names must match.
+    @type name: string
+    @return: Selected hosts.
+    @rtype: list of L{Host<comodit_client.api.host.Host>}
+    """
+
+    if environment is None:
+        environments = client.environments(organization).to_table(["name"]).column("name")
+    else:
+        environments = [environment]
+
+    hosts = []
+    for env in environments:
+        collection = client.hosts(organization, env)
+        for (host_name, applications) in collection.to_table(["name", "applications"]):
+            if name is not None and not fnmatch.fnmatchcase(host_name, name):
+                continue
+            if application is not None and application not in (applications or []):
+                continue
+            hosts.append(collection.stub(host_name))
+    return hosts
+
+
+def _change_ids(result):
+    if result is None:
+        return []
+    elif isinstance(result, six.string_types):
+        return [result] if result.strip() else []
+    return [str(c) for c in result]
+
+
+def restart_service(app_name, svc_name):
+    """
+    Builds an operation restarting a service (see
+    L{Host.live_restart_service<comodit_client.api.host.Host.live_restart_service>}).
+
+    @rtype: function
+    """
+
+    return lambda host: _change_ids(host.live_restart_service(app_name, svc_name))
+
+
+def update_service(app_name, svc_name):
+    """
+    Builds an operation updating a service (see
+    L{Host.live_update_service<comodit_client.api.host.Host.live_update_service>}).
+
+    @rtype: function
+    """
+
+    return lambda host: _change_ids(host.live_update_service(app_name, svc_name))
+
+
+def enable_service(app_name, svc_name):
+    """
+    Builds an operation enabling a service (see
+    L{Host.live_enable_service<comodit_client.api.host.Host.live_enable_service>}).
+
+    @rtype: function
+    """
+
+    return lambda host: _change_ids(host.live_enable_service(app_name, svc_name))
+
+
+def disable_service(app_name, svc_name):
+    """
+    Builds an operation disabling a service (see
+    L{Host.live_disable_service<comodit_client.api.host.Host.live_disable_service>}).
+
+    @rtype: function
+    """
+
+    return lambda host: _change_ids(host.live_disable_service(app_name, svc_name))
+
+
+def update_file(app_name, file_name):
+    """
+    Builds an operation updating a file (see
+    L{Host.live_update_file<comodit_client.api.host.Host.live_update_file>}).
+
+    @rtype: function
+    """
+
+    return lambda host: _change_ids(host.live_update_file(app_name, file_name))
+
+
+def update_package(app_name, pkg_name, pkg_version):
+    """
+    Builds an operation updating a package (see
+    L{Host.live_update_package<comodit_client.api.host.Host.live_update_package>}).
+
+    @rtype: function
+    """
+
+    return lambda host: _change_ids(host.live_update_package(app_name, pkg_name, pkg_version))
+
+
+def run_orchestration(orchestration_name):
+    """
+    Builds an operation running an orchestration (see
+    L{Host.run_orchestration<comodit_client.api.host.Host.run_orchestration>}).
+
+    @rtype: function
+    """
+
+    return lambda host: _change_ids(host.run_orchestration(orchestration_name))
+
+
+def run_handler(app_name, handler_name):
+    """
+    Builds an operation running the handlers of an application (see
+    L{ApplicationContext.run_handler<comodit_client.api.contexts.ApplicationContext.run_handler>}).
+    Application's context is not fetched.
+
+    @rtype: function
+    """
+
+    return lambda host: _change_ids(host.applications().stub(app_name).run_handler(handler_name))
+
+
+class RollingExecution(object):
+    """
+    Applies an operation to many hosts, C{batch_size} hosts at a time. The
+    operation is applied to the hosts of a batch by at most C{parallelism}
+    threads, then changes queued by the operation are waited for (with a
+    L{FleetWaiter<comodit_client.api.host.FleetWaiter>}) before next batch
+    is started.
+
+    An operation is a function taking a host and returning the keys of the
+    changes it queued (a list or a single key), or None if keys are unknown:
+    host's pending changes are then listed right after the operation and
+    waited for. Note that this fallback may wait for changes queued by
+    others; operations built by this module return actual keys.
+
+    A host fails if the operation raised an exception, if no change to wait
+    for could be found, if one of the tasks of its changes failed (see
+    L{ChangeFailedException<comodit_client.api.host.ChangeFailedException>})
+    or if its changes did not terminate within C{time_out} seconds. No more
+    batch is started once more than C{max_errors} hosts failed (L{stopped}
+    is then True).
+    """
+
+    def __init__(self, operation, batch_size = 10, parallelism = 4, max_errors = 0,
+                 time_out = 0):
+        """
+        Creates a rolling execution.
+
+        @param operation: The operation to apply to each host.
+        @type operation: function
+        @param batch_size: Number of hosts per batch.
+        @type batch_size: int
+        @param parallelism: Maximum number of concurrent requests.
+        @type parallelism: int
+        @param max_errors: Maximum number of failed hosts.
+        @type max_errors: int
+        @param time_out: Maximum number of seconds changes of a batch are
+        waited for. 0 means no time-out.
+        @type time_out: float
+        """
+
+        if batch_size < 1 or parallelism < 1:
+            raise ValueError("Batch size and parallelism must be greater than 0")
+
+        self.operation = operation
+        self.batch_size = batch_size
+        self.parallelism = parallelism
+        self.max_errors = max_errors
+        self.time_out = time_out
+        self.stopped = False
+
+    def run(self, hosts, callback = None, cancel = None):
+        """
+        Applies the operation to given hosts.
+
+        @param hosts: The hosts, in execution order.
+        @type hosts: list of L{Host<comodit_client.api.host.Host>}
+        @param callback: A function called with a host and an exception (None
+        if the host succeeded) when the batch of the host is over (optional).
+        @type callback: function
+        @param cancel: An event stopping the execution when set (optional).
+        @type cancel: C{threading.Event}
+        @return: For each host, True if it succeeded and False if the
+        operation was not applied to it (execution stopped or cancelled).
+        @rtype: L{BulkResult<comodit_client.api.collection.BulkResult>}
+        """
+
+        hosts = list(hosts)
+        results = [False] * len(hosts)
+        errors = [None] * len(hosts)
+        failures = 0
+        self.stopped = False
+        for start in range(0, len(hosts), self.batch_size):
+            if cancel is not None and cancel.is_set():
+                break
+            if failures > self.max_errors:
+                self.stopped = True
+                break
+
+            batch = list(range(start, min(len(hosts), start + self.batch_size)))
+            self._run_batch(hosts, batch, results, errors, cancel)
+            for i in batch:
+                if errors[i] is not None:
+                    results[i] = None
+                    failures += 1
+                if callback is not None and (results[i] or errors[i] is not None):
+                    callback(hosts[i], errors[i])
+        return BulkResult(hosts, results, errors)
+
+    def _apply(self, host):
+        change_ids = _change_ids(self.operation(host))
+        if not change_ids:
+            change_ids = [c.change_id for c in host.change_tracker().update()]
+        return change_ids
+
+    def _run_batch(self, hosts, batch, results, errors, cancel):
+        applied = run_many(self._apply, [hosts[i] for i in batch], self.parallelism)
+        waiter = FleetWaiter(self.parallelism)
+        waited = []
+        for (k, i) in enumerate(batch):
+            if applied.errors[k] is not None:
+                errors[i] = applied.errors[k]
+            elif applied.results[k]:
+                for change_id in applied.results[k]:
+                    waiter.wait_for_change_terminated(hosts[i], change_id)
+                waited.append(i)
+            else:
+                errors[i] = PythonApiException("No change to wait for")
+
+        # Failed tasks are reported as ChangeFailedException
+        terminated = waiter.wait(self.time_out, cancel = cancel)
+        for (i, done, error) in zip(waited, terminated.results, terminated.errors):
+            if error is not None:
+                errors[i] = error
+            elif done:
+                results[i] = True
+            elif cancel is None or not cancel.is_set():
+                errors[i] = PythonApiException("Changes did not terminate")
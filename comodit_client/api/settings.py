@@ -11,6 +11,8 @@ from comodit_client.util.json_wrapper import JsonWrapper
 
 class Schema(JsonWrapper):
 
+    __slots__ = ()
+
     @property
     def multiline(self):
         return self._get_field("multiline")
@@ -293,6 +295,8 @@ class SettingImpactCollection(Collection):
 
 class OrganizationSettingTree(JsonWrapper):
 
+    __slots__ = ()
+
     @property
     def organization(self):
         """
@@ -375,6 +379,8 @@ class OrganizationSettingTree(JsonWrapper):
 
 class EnvironmentSettingTree(JsonWrapper):
 
+    __slots__ = ()
+
     @property
     def environment(self):
         """
@@ -418,6 +424,8 @@ class EnvironmentSettingTree(JsonWrapper):
 
 class DistributionSettingTree(JsonWrapper):
 
+    __slots__ = ()
+
     @property
     def distribution(self):
         """
@@ -446,6 +454,8 @@ class DistributionSettingTree(JsonWrapper):
 
 class PlatformSettingTree(JsonWrapper):
 
+    __slots__ = ()
+
     @property
     def platform(self):
         """
@@ -474,6 +484,8 @@ class PlatformSettingTree(JsonWrapper):
 
 class HostSettingTree(JsonWrapper):
 
+    __slots__ = ()
+
     @property
     def host(self):
         """
@@ -530,6 +542,8 @@ class HostSettingTree(JsonWrapper):
 
 class ApplicationSettingTree(JsonWrapper):
 
+    __slots__ = ()
+
     @property
     def application(self):
         """
@@ -559,6 +573,8 @@ class ApplicationSettingTree(JsonWrapper):
 
 
 class SettingHandlerContext(JsonWrapper):
+
+    __slots__ = ()
     @property
     def application(self):
         """
@@ -627,6 +643,8 @@ class SettingHandlerContext(JsonWrapper):
             h.show(indent)
 
 class HostSettingContext(JsonWrapper):
+
+    __slots__ = ()
     @property
     def name(self):
         """
@@ -665,6 +683,8 @@ class HostSettingContext(JsonWrapper):
         print(" "*(indent + 4), self.environment + "\\" + self.name)
 
 class HandlerSettingContext(JsonWrapper):
+
+    __slots__ = ()
     @property
     def do(self):
         """
@@ -690,6 +710,8 @@ class HandlerSettingContext(JsonWrapper):
             d.show(indent + 2)
 
 class Do(JsonWrapper):
+
+    __slots__ = ()
     @property
     def action(self):
         """
@@ -139,10 +139,10 @@ class LocalFileProvider(FileProvider):
         return os.path.exists(os.path.join(self._folder, "thumb"))
 
     def open(self, name):
-        return open(os.path.join(self._folder, "files", name), "r")
+        return open(os.path.join(self._folder, "files", name), "rb")
 
     def open_thumb(self):
-        return open(os.path.join(self._folder, "thumb"), "r")
+        return open(os.path.join(self._folder, "thumb"), "rb")
 
     def close(self, fd):
         fd.close()
@@ -419,11 +419,11 @@ class SyncEngine(object):
                 os.remove(os.path.join(files_dir, d.key))
             elif d.type == "set_file_content":
                 content_reader = remote_res.get_file(d.key).get_content()
-                with open(os.path.join(files_dir, d.key), "w") as fd:
+                with open(os.path.join(files_dir, d.key), "wb") as fd:
                     fd.write(content_reader.read())
             elif d.type == "set_thumb":
                 content_reader = remote_res.get_thumbnail_content()
-                with open(os.path.join(self._folder_path, "thumb"), "w") as fd:
+                with open(os.path.join(self._folder_path, "thumb"), "wb") as fd:
                     fd.write(content_reader.read())
             elif d.type == "delete_thumb":
                 os.remove(os.path.join(self._folder_path, "thumb"))
@@ -0,0 +1,358 @@
+# coding: utf-8
+"""
+Provides a compact column store (L{Table}) holding selected fields of the
+entities of a collection (see
+L{Collection.to_table<comodit_client.api.collection.Collection.to_table>}).
+No entity object is instantiated: strings are dictionary-encoded (each
+distinct value is stored once per column) and integer, float and boolean
+values are stored in arrays. Tables may be filtered, sorted and grouped.
+"""
+
+from builtins import object
+from builtins import range
+from array import array
+from collections import OrderedDict
+import six
+
+
+class _Column(object):
+    """
+    Column of arbitrary values.
+    """
+
+    def __init__(self, values = None):
+        self._values = [] if values is None else values
+
+    def append(self, value):
+        self._values.append(value)
+        return True
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __len__(self):
+        return len(self._values)
+
+    def take(self, indexes):
+        values = self._values
+        return _Column([values[i] for i in indexes])
+
+    def find(self, value):
+        return [i for (i, v) in enumerate(self._values) if v == value]
+
+
+class _StringColumn(object):
+    """
+    Column of strings, each distinct string being stored once.
+    """
+
+    def __init__(self, strings = None, index = None, codes = None):
+        self._strings = [] if strings is None else strings
+        self._index = {} if index is None else index
+        self._codes = array('l') if codes is None else codes
+
+    def append(self, value):
+        if value is None:
+            self._codes.append(-1)
+            return True
+        if not isinstance(value, six.string_types):
+            return False
+        code = self._index.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._index[value] = code
+        self._codes.append(code)
+        return True
+
+    def __getitem__(self, index):
+        code = self._codes[index]
+        if code < 0:
+            return None
+        return self._strings[code]
+
+    def __len__(self):
+        return len(self._codes)
+
+    def take(self, indexes):
+        codes = self._codes
+        return _StringColumn(self._strings, self._index, array('l', [codes[i] for i in indexes]))
+
+    def find(self, value):
+        if value is None:
+            code = -1
+        else:
+            code = self._index.get(value)
+            if code is None:
+                return []
+        return [i for (i, c) in enumerate(self._codes) if c == code]
+
+
+class _ArrayColumn(object):
+    """
+    Column of integers, floats or booleans backed by an array. Missing values
+    are flagged in a separate mask.
+    """
+
+    def __init__(self, value_type, typecode, values = None, missing = None):
+        self._type = value_type
+        self._typecode = typecode
+        self._values = array(typecode) if values is None else values
+        self._missing = bytearray() if missing is None else missing
+
+    def append(self, value):
+        if value is None:
+            self._values.append(0)
+            self._missing.append(1)
+            return True
+        if type(value) is not self._type:
+            return False
+        try:
+            self._values.append(value)
+        except OverflowError:
+            return False
+        self._missing.append(0)
+        return True
+
+    def __getitem__(self, index):
+        if self._missing[index]:
+            return None
+        return self._type(self._values[index])
+
+    def __len__(self):
+        return len(self._values)
+
+    def take(self, indexes):
+        values = self._values
+        missing = self._missing
+        return _ArrayColumn(self._type, self._typecode,
+                            array(self._typecode, [values[i] for i in indexes]),
+                            bytearray(missing[i] for i in indexes))
+
+    def find(self, value):
+        return [i for i in range(len(self._values)) if self[i] == value]
+
+
+def _new_column(value):
+    if isinstance(value, six.string_types):
+        return _StringColumn()
+    elif type(value) is bool:
+        return _ArrayColumn(bool, 'b')
+    elif type(value) is int:
+        return _ArrayColumn(int, 'q')
+    elif type(value) is float:
+        return _ArrayColumn(float, 'd')
+    return _Column()
+
+
+def _sort_key(value):
+    # Missing values come first, values of different types are grouped by type
+    if value is None:
+        return (0, "", None)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (1, "number", value)
+    return (1, type(value).__name__, value)
+
+
+class Table(object):
+    """
+    Column store of entity fields. A field is the name of a top-level field
+    of entities' JSON representation, or a dotted path to a nested field
+    (e.g. C{"driver.name"}). Missing fields are None.
+
+    Rows are tuples holding field values in the order of L{fields}.
+    L{filter}, L{sort} and L{group_by} return new tables which share string
+    dictionaries with this one.
+    """
+
+    def __init__(self, fields):
+        """
+        Creates an empty table.
+
+        @param fields: Table's fields.
+        @type fields: list of strings
+        """
+
+        self.fields = list(fields)
+        self._paths = [f.split(".") for f in self.fields]
+        self._columns = [None] * len(self.fields)
+        self._length = 0
+
+    def append(self, item):
+        """
+        Appends a row holding the fields of an entity.
+
+        @param item: The JSON representation of an entity.
+        @type item: dict
+        """
+
+        for (i, path) in enumerate(self._paths):
+            value = item
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            self._append_value(i, value)
+        self._length += 1
+
+    def _append_value(self, i, value):
+        column = self._columns[i]
+        if column is None:
+            if value is None:
+                return
+            # Column type is given by the first value
+            column = _new_column(value)
+            for _ in range(self._length):
+                column.append(None)
+            self._columns[i] = column
+        if not column.append(value):
+            column = _Column([column[j] for j in range(len(column))])
+            column.append(value)
+            self._columns[i] = column
+
+    def __len__(self):
+        return self._length
+
+    def column(self, field):
+        """
+        Provides the values of a field.
+
+        @param field: A field of this table.
+        @type field: string
+        @rtype: list
+        """
+
+        column = self._columns[self.fields.index(field)]
+        if column is None:
+            return [None] * self._length
+        return [column[i] for i in range(self._length)]
+
+    def row(self, index):
+        """
+        Provides a row.
+
+        @param index: Row's index.
+        @type index: int
+        @rtype: tuple
+        """
+
+        if index < 0:
+            index += self._length
+        if index < 0 or index >= self._length:
+            raise IndexError("Row index out of range")
+        return tuple(None if c is None else c[index] for c in self._columns)
+
+    def rows(self):
+        """
+        Iterates over the rows of this table.
+
+        @rtype: iterator of tuples
+        """
+
+        for index in range(self._length):
+            yield self.row(index)
+
+    def dicts(self):
+        """
+        Iterates over the rows of this table as dicts mapping fields to
+        values.
+
+        @rtype: iterator of dicts
+        """
+
+        for row in self.rows():
+            yield OrderedDict(zip(self.fields, row))
+
+    def __iter__(self):
+        return self.rows()
+
+    def filter(self, predicate = None, **values):
+        """
+        Selects rows. Rows may be selected by field values, given as keyword
+        arguments (only for fields which are valid Python identifiers), and
+        by a predicate, given the row as a dict mapping fields to values.
+        For instance, C{table.filter(state = "READY")} selects the rows
+        whose C{state} field is C{"READY"}.
+
+        @param predicate: A function taking a dict and returning a bool
+        (optional).
+        @type predicate: function
+        @rtype: L{Table}
+        """
+
+        indexes = None
+        for (field, value) in values.items():
+            column = self._columns[self.fields.index(field)]
+            if column is None:
+                found = list(range(self._length)) if value is None else []
+            else:
+                found = column.find(value)
+            indexes = found if indexes is None else sorted(set(indexes).intersection(found))
+        if indexes is None:
+            indexes = range(self._length)
+        if predicate is not None:
+            indexes = [i for i in indexes if predicate(dict(zip(self.fields, self.row(i))))]
+        return self._take(indexes)
+
+    def sort(self, fields = None, reverse = False):
+        """
+        Sorts rows. Missing values come first (last in descending order).
+
+        @param fields: The field, or list of fields, to sort rows on. Rows
+        are sorted on all fields by default.
+        @type fields: string or list of strings
+        @param reverse: If True, rows are sorted in descending order.
+        @type reverse: bool
+        @rtype: L{Table}
+        """
+
+        if fields is None:
+            fields = self.fields
+        elif isinstance(fields, six.string_types):
+            fields = [fields]
+        columns = [self._columns[self.fields.index(f)] for f in fields]
+        columns = [c for c in columns if c is not None]
+        def key(i):
+            return tuple(_sort_key(c[i]) for c in columns)
+        return self._take(sorted(range(self._length), key = key, reverse = reverse))
+
+    def group_by(self, field):
+        """
+        Groups rows by the value of a field.
+
+        @param field: A field of this table.
+        @type field: string
+        @return: Tables of the rows sharing a value, keyed by that value, in
+        order of first appearance.
+        @rtype: OrderedDict
+        """
+
+        groups = OrderedDict()
+        column = self._columns[self.fields.index(field)]
+        for i in range(self._length):
+            value = None if column is None else column[i]
+            groups.setdefault(value, []).append(i)
+        return OrderedDict((value, self._take(indexes)) for (value, indexes) in groups.items())
+
+    def count_by(self, field):
+        """
+        Counts rows by the value of a field.
+
+        @param field: A field of this table.
+        @type field: string
+        @return: Number of rows sharing a value, keyed by that value, in
+        order of first appearance.
+        @rtype: OrderedDict
+        """
+
+        counts = OrderedDict()
+        column = self._columns[self.fields.index(field)]
+        for i in range(self._length):
+            value = None if column is None else column[i]
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def _take(self, indexes):
+        indexes = list(indexes)
+        table = Table(self.fields)
+        table._columns = [None if c is None else c.take(indexes) for c in self._columns]
+        table._length = len(indexes)
+        return table
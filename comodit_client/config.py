@@ -57,7 +57,10 @@ class Config(object):
             "username": "admin",
             "password": "secret",
             "token": "",
-            "vnc_viewer_call": "vinagre %h:%p"
+            "vnc_viewer_call": "vinagre %h:%p",
+            "pool_size": "4",
+            "pool_idle_timeout": "60",
+            "retries": "3"
             }
         }
     """
@@ -118,6 +121,135 @@ class Config(object):
     def get_vnc_viewer_call(self, profile_name):
         return self.get_value(profile_name, "vnc_viewer_call")
 
+    def get_pool_size(self, profile_name):
+        return self._get_number(profile_name, "pool_size", int)
+
+    def get_pool_idle_timeout(self, profile_name):
+        return self._get_number(profile_name, "pool_idle_timeout", float)
+
+    def get_cache_size(self, profile_name):
+        return self._get_number(profile_name, "cache_size", int)
+
+    def get_cache_dir(self, profile_name):
+        value = self.get_value(profile_name, "cache_dir", True)
+        if not value:
+            return None
+        return os.path.expanduser(value)
+
+    def get_compression(self, profile_name):
+        return self._get_boolean(profile_name, "compression")
+
+    def get_compress_min_size(self, profile_name):
+        return self._get_number(profile_name, "compress_min_size", int)
+
+    def get_retries(self, profile_name):
+        return self._get_number(profile_name, "retries", int)
+
+    def get_retry_backoff(self, profile_name):
+        return self._get_number(profile_name, "retry_backoff", float)
+
+    def get_retry_max_backoff(self, profile_name):
+        return self._get_number(profile_name, "retry_max_backoff", float)
+
+    def get_circuit_failure_threshold(self, profile_name):
+        return self._get_number(profile_name, "circuit_failure_threshold", int)
+
+    def get_circuit_reset_timeout(self, profile_name):
+        return self._get_number(profile_name, "circuit_reset_timeout", float)
+
+    def get_rate_limit(self, profile_name, method = None):
+        return self._get_number(profile_name, self._method_key("rate_limit", method), float)
+
+    def get_rate_burst(self, profile_name, method = None):
+        return self._get_number(profile_name, self._method_key("rate_burst", method), float)
+
+    def get_max_in_flight(self, profile_name, method = None):
+        return self._get_number(profile_name, self._method_key("max_in_flight", method), int)
+
+    def get_transport(self, profile_name):
+        value = self.get_value(profile_name, "transport", True)
+        if not value:
+            return None
+        if value not in ("urllib", "curl"):
+            raise ConfigException("Value of key transport must be urllib or curl")
+        return value
+
+    def get_http2(self, profile_name):
+        return self._get_boolean(profile_name, "http2")
+
+    def get_page_size(self, profile_name):
+        return self._get_number(profile_name, "page_size", int)
+
+    def get_identity_map_ttl(self, profile_name):
+        return self._get_number(profile_name, "identity_map_ttl", float)
+
+    def get_lazy(self, profile_name):
+        return self._get_boolean(profile_name, "lazy")
+
+    def get_partial_updates(self, profile_name):
+        return self._get_boolean(profile_name, "partial_updates")
+
+    def get_poll_initial_delay(self, profile_name):
+        return self._get_number(profile_name, "poll_initial_delay", float)
+
+    def get_poll_max_delay(self, profile_name):
+        return self._get_number(profile_name, "poll_max_delay", float)
+
+    def get_cassette(self, profile_name):
+        value = self.get_value(profile_name, "cassette", True)
+        if not value:
+            return None
+        return os.path.expanduser(value)
+
+    def get_cassette_mode(self, profile_name):
+        value = self.get_value(profile_name, "cassette_mode", True)
+        if not value:
+            return None
+        if value not in ("record", "replay"):
+            raise ConfigException("Value of key cassette_mode must be record or replay")
+        return value
+
+    def get_replay_latency(self, profile_name):
+        return self._get_number(profile_name, "replay_latency", float)
+
+    def get_replay_bandwidth(self, profile_name):
+        return self._get_number(profile_name, "replay_bandwidth", float)
+
+    def get_json_backend(self, profile_name):
+        value = self.get_value(profile_name, "json_backend", True)
+        if not value:
+            return None
+        return value
+
+    def get_json_keep_key_order(self, profile_name):
+        return self._get_boolean(profile_name, "json_keep_key_order")
+
+    def _method_key(self, key, method):
+        if method is None:
+            return key
+        return key + "_" + method.lower()
+
+    def _get_boolean(self, profile_name, key):
+        value = self.get_value(profile_name, key, True)
+        if value is None or value == "":
+            return None
+        if isinstance(value, bool):
+            return value
+        if value.lower() in ("1", "yes", "true", "on"):
+            return True
+        if value.lower() in ("0", "no", "false", "off"):
+            return False
+        raise ConfigException("Value of key " + key + " is not a boolean")
+
+    def _get_number(self, profile_name, key, number_type):
+        value = self.get_value(profile_name, key, True)
+        if value is None or value == "":
+            return None
+        try:
+            return number_type(value)
+        except ValueError:
+            raise ConfigException("Value of key " + key + " is not a number")
+
     def _check_config(self):
         """
         Checks if configuration file could be parsed and contains valid
@@ -197,6 +329,8 @@ class Config(object):
         password = foopass
         token    = token
         api      = url
+        pool_size = 4
+        pool_idle_timeout = 60
 
         becomes :
 
@@ -208,7 +342,9 @@ class Config(object):
                 "api": "http://localhost:8000/api",
                 "username": "admin",
                 "password": "secret",
-                "token": "token"
+                "token": "token",
+                "pool_size": "4",
+                "pool_idle_timeout": "60"
             }
         }
 
@@ -6,9 +6,11 @@
 # authorization from Guardis.
 
 from __future__ import absolute_import
+from comodit_client.api import rolling
 from comodit_client.control.abstract import AbstractController
 from comodit_client.control.doc import ActionDoc
 from comodit_client.control.exceptions import ArgumentException
+from comodit_client.control.rolling import RollingHelper, PATTERN_DOC
 from . import completions
 
 
@@ -17,6 +19,7 @@ class ActionController(AbstractController):
     def __init__(self):
         super(ActionController, self).__init__()
         self._doc = "Action on deployed host."
+        self._rolling = RollingHelper(self)
 
         self._register(["run"], self._run, self._print_host_completions)
         self._register(["impact"], self._impact, self._print_orchestration_completions)
@@ -37,8 +40,12 @@ class ActionController(AbstractController):
         if len(argv) < 4:
             raise ArgumentException("Wrong number of arguments")
 
-        host = self._get_host(argv)
         orch_name = argv[3]
+        if self._rolling.is_pattern(argv[2]):
+            self._rolling.run(argv, rolling.run_orchestration(orch_name))
+            return
+
+        host = self._get_host(argv)
         changes = host.run_orchestration(orch_name)
 
         if self._config.options.wait:
@@ -80,6 +87,6 @@ class ActionController(AbstractController):
 
     def _run_doc(self):
         return ActionDoc("run", "<org_name> <env_name> <host_name> <action_name>", """
-        run action on given host.""")
+        run action on given host.""" + PATTERN_DOC)
 
             
\ No newline at end of file
@@ -6,9 +6,11 @@
 # authorization from Guardis.
 
 from __future__ import absolute_import
+from comodit_client.api import rolling
 from comodit_client.control.abstract import AbstractController
 from comodit_client.control.doc import ActionDoc
 from comodit_client.control.exceptions import ArgumentException
+from comodit_client.control.rolling import RollingHelper, PATTERN_DOC
 from . import completions
 
 
@@ -17,6 +19,7 @@ class ApplicationActionController(AbstractController):
     def __init__(self):
         super(ApplicationActionController, self).__init__()
         self._doc = "Application action on deployed host."
+        self._rolling = RollingHelper(self)
 
         self._register(["impact"], self._impact, self._print_run_completions)
 
@@ -50,9 +53,13 @@ class ApplicationActionController(AbstractController):
         if len(argv) != 5:
             raise ArgumentException("Wrong number of arguments");
 
-        host = self._get_host(argv)
         app_name = argv[3]
         handler_name = argv[4]
+        if self._rolling.is_pattern(argv[2]):
+            self._rolling.run(argv, rolling.run_handler(app_name, handler_name), app_name)
+            return
+
+        host = self._get_host(argv)
 
         changeId = host.get_application(app_name).run_handler(handler_name)
 
@@ -124,82 +131,94 @@ class ApplicationActionController(AbstractController):
         if len(argv) < 4:
             raise ArgumentException("Wrong number of arguments")
 
-        host = self._get_host(argv)
         app_name = argv[3]
         file_name = argv[4]
-        host.live_update_file(app_name, file_name)
+        if self._rolling.is_pattern(argv[2]):
+            self._rolling.run(argv, rolling.update_file(app_name, file_name), app_name)
+        else:
+            self._get_host(argv).live_update_file(app_name, file_name)
 
     def _update_file_doc(self):
         return ActionDoc("udpate-file", "<org_name> <env_name> <host_name> <app_name> <file_name>", """
-        Updates file on given host.""")
+        Updates file on given host.""" + PATTERN_DOC)
 
     def _restart_service(self, argv):
         if len(argv) < 4:
             raise ArgumentException("Wrong number of arguments")
 
-        host = self._get_host(argv)
         app_name = argv[3]
         svc_name = argv[4]
-        host.live_restart_service(app_name, svc_name)
+        if self._rolling.is_pattern(argv[2]):
+            self._rolling.run(argv, rolling.restart_service(app_name, svc_name), app_name)
+        else:
+            self._get_host(argv).live_restart_service(app_name, svc_name)
 
     def _restart_service_doc(self):
         return ActionDoc("restart-service", "<org_name> <env_name> <host_name> <app_name> <svc_name>", """
-        Restarts service on given host.""")
+        Restarts service on given host.""" + PATTERN_DOC)
 
     def _update_service(self, argv):
         if len(argv) < 4:
             raise ArgumentException("Wrong number of arguments")
 
-        host = self._get_host(argv)
         app_name = argv[3]
         svc_name = argv[4]
-        host.live_update_service(app_name, svc_name)
+        if self._rolling.is_pattern(argv[2]):
+            self._rolling.run(argv, rolling.update_service(app_name, svc_name), app_name)
+        else:
+            self._get_host(argv).live_update_service(app_name, svc_name)
 
     def _update_service_doc(self):
         return ActionDoc("update-service", "<org_name> <env_name> <host_name> <app_name> <svc_name>", """
-        Updates service on given host.""")
+        Updates service on given host.""" + PATTERN_DOC)
     
     def _enable_service(self, argv):
         if len(argv) < 4:
             raise ArgumentException("Wrong number of arguments")
 
-        host = self._get_host(argv)
         app_name = argv[3]
         svc_name = argv[4]
-        host.live_enable_service(app_name, svc_name)
+        if self._rolling.is_pattern(argv[2]):
+            self._rolling.run(argv, rolling.enable_service(app_name, svc_name), app_name)
+        else:
+            self._get_host(argv).live_enable_service(app_name, svc_name)
 
     def _enable_service_doc(self):
         return ActionDoc("enable-service", "<org_name> <env_name> <host_name> <app_name> <svc_name>", """
-        Enables service on given host.""")
+        Enables service on given host.""" + PATTERN_DOC)
     
     def _disable_service(self, argv):
         if len(argv) < 4:
             raise ArgumentException("Wrong number of arguments")
 
-        host = self._get_host(argv)
         app_name = argv[3]
         svc_name = argv[4]
-        host.live_disable_service(app_name, svc_name)
+        if self._rolling.is_pattern(argv[2]):
+            self._rolling.run(argv, rolling.disable_service(app_name, svc_name), app_name)
+        else:
+            self._get_host(argv).live_disable_service(app_name, svc_name)
 
     def _disable_service_doc(self):
         return ActionDoc("disable-service", "<org_name> <env_name> <host_name> <app_name> <svc_name>", """
-        Disables service on given host.""")
+        Disables service on given host.""" + PATTERN_DOC)
 
     def _update_package(self, argv):
         if len(argv) < 4:
             raise ArgumentException("Wrong number of arguments")
 
-        host = self._get_host(argv)
         app_name = argv[3]
         pkg_name = argv[4]
         pkg_version = argv[5]
-        host.live_update_package(app_name, pkg_name, pkg_version)
+        if self._rolling.is_pattern(argv[2]):
+            self._rolling.run(argv, rolling.update_package(app_name, pkg_name, pkg_version), app_name)
+        else:
+            self._get_host(argv).live_update_package(app_name, pkg_name, pkg_version)
 
     def _update_package_doc(self):
         return ActionDoc("update-package", "<org_name> <env_name> <host_name> <app_name> <pkg_name> <pkg_version>", """
-        Update package on given host.""")
+        Update package on given host.""" + PATTERN_DOC)
    
     def _run_action_doc(self):
         return ActionDoc("run", "<org_name> <env_name> <host_name> <app_name> <cmd_key>", """
-        Executes handlers associated to given key.""")
+        Executes handlers associated to given key.""" + PATTERN_DOC)
     
\ No newline at end of file
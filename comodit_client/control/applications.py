@@ -23,6 +23,7 @@ from . import completions
 class ApplicationsController(OrganizationEntityController):
 
     _template = "application.json"
+    _label_fields = ["name"]
 
     def __init__(self):
         super(ApplicationsController, self).__init__()
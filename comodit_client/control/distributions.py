@@ -24,6 +24,7 @@ from . import completions
 class DistributionsController(OrganizationEntityController):
 
     _template = "distribution.json"
+    _label_fields = ["name"]
 
     def __init__(self):
         super(DistributionsController, self).__init__()
@@ -10,7 +10,7 @@
 from __future__ import print_function
 
 from collections import OrderedDict
-import json, os
+import json, os, sys
 
 from comodit_client.config import Config
 from comodit_client.control.abstract import AbstractController
@@ -23,6 +23,13 @@ from comodit_client.util.editor import edit_text
 
 class EntityController(AbstractController):
 
+    # Fields composing entity labels. If set, entities are listed from a
+    # table holding these fields only (see Collection.to_table) instead of
+    # entity objects; labels join the fields with " - " and are sorted.
+    # _label and _sort_key are then ignored: only set it on controllers whose
+    # labels are these fields.
+    _label_fields = None
+
     def __init__(self):
         super(EntityController, self).__init__()
         self._register(["list"], self._list, self._print_list_completions)
@@ -54,19 +61,36 @@ class EntityController(AbstractController):
         options = self._config.options
         parameters["secret_only"] = options.secret
         parameters["no_secret"] = options.non_secret
-        if options.key <> None:
+        if options.key != None:
             parameters["key"] = options.key
 
-        entities_list = self._list_entities(argv, parameters=parameters)
         if self._config.options.raw:
-            print(json.dumps([entity.get_json() for entity in entities_list], indent=4))
+            self._print_raw(self._iter_entities(argv, parameters=parameters))
+        elif self._label_fields:
+            table = self.get_collection(argv).to_table(self._label_fields, parameters=parameters)
+            if len(table) == 0:
+                print(self._str_empty)
+            else:
+                for row in table.sort(self._label_fields).rows():
+                    print(" - ".join("%s" % (v,) for v in row))
         else:
+            entities_list = self._list_entities(argv, parameters=parameters)
             if len(entities_list) == 0:
                 print(self._str_empty)
             else:
                 for e in sorted(entities_list, key=self._sort_key()):
                     print(self._label(e))
 
+    def _print_raw(self, entities):
+        # Same output as json.dumps(list, indent=4), written while entities
+        # are received.
+        empty = True
+        for entity in entities:
+            text = json.dumps(entity.get_json(), indent=4)
+            sys.stdout.write(("[\n    " if empty else ",\n    ") + text.replace("\n", "\n    "))
+            empty = False
+        print("[]" if empty else "\n]")
+
     def _sort_key(self):
         return lambda entity : entity.identifier
 
@@ -179,6 +203,9 @@ class EntityController(AbstractController):
     def _list_entities(self, argv, parameters={}):
         return self.get_collection(argv).list(parameters=parameters)
 
+    def _iter_entities(self, argv, parameters={}):
+        return self.get_collection(argv).iter(parameters=parameters)
+
     def get_collection(self, argv):
         raise NotImplementedError
 
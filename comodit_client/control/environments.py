@@ -17,6 +17,7 @@ from comodit_client.control.log import AgentLogHelper
 class EnvironmentsController(OrganizationEntityController):
 
     _template = "environment.json"
+    _label_fields = ["name"]
 
     def __init__(self):
         super(EnvironmentsController, self).__init__()
@@ -5,6 +5,7 @@ from comodit_client.control.root_entity import RootEntityController
 class FlavorsController(RootEntityController):
 
     _template = "user.json"
+    _label_fields = ["name"]
 
     def __init__(self):
         super(FlavorsController, self).__init__()
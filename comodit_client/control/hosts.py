@@ -7,8 +7,12 @@
 # This software cannot be used and/or distributed without prior
 # authorization from Guardis.
 
+from __future__ import print_function
+import json
 import subprocess
+from collections import OrderedDict
 
+from comodit_client.api.host import FleetWaiter, Host, ProvisioningPipeline
 from comodit_client.config import Config
 from comodit_client.control import completions
 from comodit_client.control.alerts import MonitoringAlertController
@@ -33,6 +37,7 @@ from comodit_client.control.actions import ActionController
 class HostsController(EntityController):
 
     _template = "host.json"
+    _label_fields = ["name"]
 
     def __init__(self):
         super(HostsController, self).__init__()
@@ -54,6 +59,7 @@ class HostsController(EntityController):
 
         # actions
         self._register(["provision"], self._provision, self._print_entity_completions)
+        self._register(["provision-many"], self._provision_many, self._print_hosts_completions)
         self._register(["render-tree"], self._render_tree, self._print_tree_completions)
         self._register(["clone"], self._clone, self._print_entity_completions)
         self._register(["audit"], self._audit.audit, self._print_entity_completions)
@@ -69,6 +75,7 @@ class HostsController(EntityController):
         self._update_action_doc_params("update", "<org_name>  <env_name> <res_name>")
         self._update_action_doc_params("show", "<org_name>  <env_name> <res_name>")
         self._register_action_doc(self._provision_doc())
+        self._register_action_doc(self._provision_many_doc())
         self._register_action_doc(self._render_tree_doc())
         self._register_action_doc(self._clone_doc())
         self._register_action_doc(self._audit.audit_doc())
@@ -163,12 +170,85 @@ class HostsController(EntityController):
         Clone a given host.""")
 
     def _provision_doc(self):
-        return ActionDoc("provision", "<org_name> <env_name> <res_name>", """
-        Provision a host.""")
+        return ActionDoc("provision", "<org_name> <env_name> <res_name> [<res_name> ...]", """
+        Provision one or several hosts. With --wait, waits until hosts are
+        ready and have no pending changes, hosts being printed as soon as they
+        are.""")
 
     def _provision(self, argv):
-        host = self._get_entity(argv)
-        host.provision()
+        if len(argv) < 3:
+            raise MissingException("This action takes at least 3 arguments")
+
+        collection = self.get_collection(argv)
+        hosts = []
+        for name in argv[2:]:
+            host = collection.get(name)
+            host.provision()
+            hosts.append(host)
+
+        if self._config.options.wait:
+            self._wait_ready(hosts)
+
+    def _wait_ready(self, hosts):
+        waiter = FleetWaiter()
+        for host in hosts:
+            waiter.wait_for_state(host, Host.State.READY)
+            waiter.wait_for_pending_changes(host)
+
+        failures = 0
+        for (host, error) in waiter.iter_completed():
+            if error is None:
+                print(host.name, "ready")
+            else:
+                print(host.name, "failed:", error)
+                failures += 1
+        if failures:
+            raise ControllerException("%d host(s) failed" % failures)
+
+    def _provision_many_doc(self):
+        return ActionDoc("provision-many", "<org_name> <env_name> [<res_name> ...]", """
+        Provision several hosts concurrently, printing the progress of each
+        host. Hosts given with -f or -j options (a JSON list of hosts) are
+        created first. If no host is given, all hosts of the environment that
+        are not provisioned yet are provisioned.""")
+
+    def _provision_many(self, argv):
+        if len(argv) < 2:
+            raise ArgumentException("Wrong number of arguments")
+
+        options = self._config.options
+        collection = self.get_collection(argv)
+        create = bool(options.filename or options.json)
+        if create:
+            if options.filename:
+                with open(options.filename, 'r') as f:
+                    items = json.load(f, object_pairs_hook=OrderedDict)
+            else:
+                items = json.loads(options.json, object_pairs_hook=OrderedDict)
+            if not isinstance(items, list):
+                raise ArgumentException("A JSON list of hosts is expected")
+            hosts = [collection._new(item) for item in items]
+        elif len(argv) > 2:
+            hosts = [collection.get(name) for name in argv[2:]]
+        else:
+            hosts = [h for h in collection if h.state == Host.State.DEFINED]
+
+        def progress(host, stage, error):
+            if error is None:
+                print(host.name, stage, "done")
+            else:
+                print(error)
+
+        result = ProvisioningPipeline().run(hosts, create, callback = progress)
+        print("%d host(s) provisioned, %d failed" % (len([r for r in result if r]), len(result.failed)))
+        if result.has_errors():
+            raise ControllerException("Provisioning failed for some hosts")
+
+    def _print_hosts_completions(self, param_num, argv):
+        if param_num < 2:
+            self._print_collection_completions(param_num, argv)
+        elif len(argv) > 1:
+            completions.print_identifiers(self.get_collection(argv))
 
     def _prune_json_update(self, json_wrapper):
         super(HostsController, self)._prune_json_update(json_wrapper)
@@ -14,6 +14,7 @@ from comodit_client.util import prompt
 class JobsController(OrganizationEntityController):
 
     _template = "jobs.json"
+    _label_fields = ["name"]
 
     def __init__(self):
         super(JobsController, self).__init__()
@@ -14,6 +14,7 @@ from comodit_client.util import prompt
 class OrchestrationsController(OrganizationEntityController):
 
     _template = "orchestrations.json"
+    _label_fields = ["name"]
 
     def __init__(self):
         super(OrchestrationsController, self).__init__()
@@ -29,6 +29,7 @@ from comodit_client.control.log import AgentLogHelper
 class OrganizationsController(RootEntityController):
 
     _template = "organization.json"
+    _label_fields = ["name"]
 
     def __init__(self):
         super(OrganizationsController, self).__init__()
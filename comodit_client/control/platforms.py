@@ -27,6 +27,7 @@ from . import completions
 class PlatformsController(OrganizationEntityController):
 
     _template = "platform.json"
+    _label_fields = ["name"]
 
     def __init__(self):
         super(PlatformsController, self).__init__()
@@ -0,0 +1,48 @@
+# coding: utf-8
+
+from __future__ import print_function
+from builtins import object
+from comodit_client.api.rolling import RollingExecution, select_hosts
+from comodit_client.control.exceptions import ArgumentException, ControllerException
+
+PATTERN_DOC = """ If host name is a pattern (e.g. web-*),
+        runs on all matching hosts of the environment, --batch-size hosts at a
+        time, and stops once more than --max-errors hosts failed."""
+
+class RollingHelper(object):
+    """
+    Runs a live action on all hosts of an environment whose name matches a
+    pattern (e.g. C{web-*}), batch after batch (see
+    L{RollingExecution<comodit_client.api.rolling.RollingExecution>}).
+    """
+
+    def __init__(self, ctrl):
+        self._ctrl = ctrl
+
+    def is_pattern(self, host_name):
+        return any(c in host_name for c in "*?[")
+
+    def run(self, argv, operation, application = None):
+        options = self._ctrl._config.options
+        hosts = select_hosts(self._ctrl._client, argv[0], argv[1], application, argv[2])
+        if len(hosts) == 0:
+            raise ArgumentException("No host matches " + argv[2])
+
+        def progress(host, error):
+            if error is None:
+                print(host.identifier, "done")
+            else:
+                print(host.identifier, "failed:", error)
+
+        try:
+            rolling = RollingExecution(operation, options.batch_size, options.parallelism, options.max_errors)
+        except ValueError as e:
+            raise ArgumentException(str(e))
+        result = rolling.run(hosts, callback = progress)
+        print("%d host(s) done, %d failed, %d skipped" % (len([r for r in result if r]),
+                                                         len(result.failed),
+                                                         len([r for r in result if r is False])))
+        if rolling.stopped:
+            raise ControllerException("Stopped after %d failed host(s)" % len(result.failed))
+        elif result.has_errors():
+            raise ControllerException("Action failed on some hosts")
@@ -38,7 +38,7 @@ class TreeRenderer(object):
 
                 content = host.render_app_file(app_name, f.name)
                 with open(output_file, "w") as fd:
-                    fd.write(content.read())
+                    fd.write(content)
 
                 if not skip_chmod:
                     try:
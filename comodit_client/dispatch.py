@@ -20,6 +20,7 @@ from comodit_client.api.importer import ImportException
 from comodit_client.control.store import AppStoreController, DistStoreController
 
 from .api import Client
+from .api.polling import PollingPolicy
 from .api.exceptions import PythonApiException
 from .config import Config, ConfigException
 from .control import router
@@ -32,6 +33,13 @@ from .control.hosts import HostsController
 from .control.organizations import OrganizationsController
 from .control.platforms import PlatformsController
 from .rest.exceptions import ApiException
+from .rest.retry import RetryPolicy
+from .rest.limiter import RateLimiter
+from .rest.instrumentation import TimingCollector
+from .rest.cassette import Cassette, RecordingTransport, ReplayTransport
+from .rest.curl import CurlTransport
+from .rest.pool import ConnectionPool
+from .util.jsoncodec import JsonCodec, get_default_codec, set_default_codec
 from .util.editor import NotModifiedException
 import comodit_client.version as version
 
@@ -110,6 +118,9 @@ Available entities:
     parser.add_argument("--key", dest = "key", help = "filter to get setting by key", default = None)
     parser.add_argument("--wait", dest = "wait", help = "wait action run is finshed", action = "store_true", default = False)
     parser.add_argument("--flavor", dest = "flavor", help = "provide distribution's flavor upon creation", default = None)
+    parser.add_argument("--batch-size", dest = "batch_size", help = "number of hosts per batch when an action is run on many hosts", type = int, default = 10)
+    parser.add_argument("--parallelism", dest = "parallelism", help = "maximum number of concurrent requests when an action is run on many hosts", type = int, default = 4)
+    parser.add_argument("--max-errors", dest = "max_errors", help = "number of failed hosts tolerated before an action run on many hosts is stopped", type = int, default = 0)
 
     parser.add_argument("--skip-chown", dest = "skip_chown", help = "Do not chown files on render tree", action = "store_true", default = False)
     parser.add_argument("--skip-chmod", dest = "skip_chmod", help = "Do not chmod files on render tree", action = "store_true", default = False)
@@ -135,6 +146,7 @@ Available entities:
 
     parser.add_argument("--force", dest = "force", help = "bypass change management and update everything", action = "store_true", default = False)
     parser.add_argument("--debug", dest = "debug", help = "display debug information", action = "store_true", default = False)
+    parser.add_argument("--timing", dest = "timing", help = "display latency of requests sent to the server", action = "store_true", default = False)
     parser.add_argument("--version", dest = "version", help = "display version information", action = "store_true", default = False)
     parser.add_argument("--no-delete", dest = "no_delete", help = "Skips deletions when changing settings", action = "store_true", default = False)
 
@@ -202,14 +214,157 @@ def _parse(argv):
         print("You have to provider either a username and a password or a token")
         exit(-1)
 
-    client = Client(api, config.options.username, config.options.password, config.options.token, config.options.insecure)
+    _set_json_codec(config)
+    client = Client(api, config.options.username, config.options.password, config.options.token, config.options.insecure,
+                    **_get_connection_options(config))
 
     entity_args = [] + config.options.subentities
 
     if not config.options.action is None:
         entity_args.append(config.options.action)
 
-    _dispatch(config.options, entity_args, client)
+    timing = None
+    if config.options.timing:
+        timing = TimingCollector()
+        client.add_request_listener(timing)
+    try:
+        _dispatch(config.options, entity_args, client)
+    finally:
+        client.close()
+        if timing is not None:
+            timing.print_summary(sys.stderr)
+
+
+def _get_connection_options(config):
+    options = {}
+    pool_size = config.get_pool_size(config.options.profile_name)
+    if pool_size is not None:
+        options["pool_size"] = pool_size
+    pool_idle_timeout = config.get_pool_idle_timeout(config.options.profile_name)
+    if pool_idle_timeout is not None:
+        options["pool_idle_timeout"] = pool_idle_timeout
+    cache_size = config.get_cache_size(config.options.profile_name)
+    if cache_size is not None:
+        options["cache_size"] = cache_size
+        options["cache_dir"] = config.get_cache_dir(config.options.profile_name)
+    compression = config.get_compression(config.options.profile_name)
+    if compression is not None:
+        options["compression"] = compression
+    compress_min_size = config.get_compress_min_size(config.options.profile_name)
+    if compress_min_size is not None:
+        options["compress_min_size"] = compress_min_size
+    transport = config.get_transport(config.options.profile_name)
+    if transport is not None:
+        options["transport"] = transport
+    cassette_transport = _get_cassette_transport(config, options)
+    if cassette_transport is not None:
+        options["transport"] = cassette_transport
+    http2 = config.get_http2(config.options.profile_name)
+    if http2 is not None:
+        options["http2"] = http2
+    page_size = config.get_page_size(config.options.profile_name)
+    if page_size is not None:
+        options["page_size"] = page_size
+    identity_map_ttl = config.get_identity_map_ttl(config.options.profile_name)
+    if identity_map_ttl is not None:
+        options["identity_map_ttl"] = identity_map_ttl
+    lazy = config.get_lazy(config.options.profile_name)
+    if lazy is not None:
+        options["lazy"] = lazy
+    partial_updates = config.get_partial_updates(config.options.profile_name)
+    if partial_updates is not None:
+        options["partial_updates"] = partial_updates
+    options["retry_policy"] = _get_retry_policy(config)
+    options["rate_limiter"] = _get_rate_limiter(config)
+    options["polling_policy"] = _get_polling_policy(config)
+    return options
+
+
+def _get_cassette_transport(config, options):
+    profile_name = config.options.profile_name
+    path = config.get_cassette(profile_name)
+    if path is None:
+        return None
+    mode = config.get_cassette_mode(profile_name) or "replay"
+    try:
+        if mode == "replay":
+            return ReplayTransport(Cassette(path).load(),
+                                   config.get_replay_latency(profile_name) or 0,
+                                   config.get_replay_bandwidth(profile_name))
+    except (IOError, OSError, ValueError) as e:
+        raise ConfigException("Could not load cassette " + path + ": " + str(e))
+
+    if options.get("transport") == "curl":
+        transport = CurlTransport(options.get("pool_size") or 10, options.get("http2", True))
+    elif options.get("pool_size", 4):
+        transport = ConnectionPool(options.get("pool_size", 4), options.get("pool_idle_timeout", 60))
+    else:
+        transport = None
+    return RecordingTransport(Cassette(path), transport)
+
+
+def _set_json_codec(config):
+    profile_name = config.options.profile_name
+    backend = config.get_json_backend(profile_name)
+    keep_key_order = config.get_json_keep_key_order(profile_name)
+    if backend is None and keep_key_order is None:
+        return
+    if keep_key_order is None:
+        keep_key_order = get_default_codec().keep_key_order
+    try:
+        set_default_codec(JsonCodec(backend, keep_key_order))
+    except ValueError as e:
+        raise ConfigException(str(e))
+
+
+def _get_retry_policy(config):
+    profile_name = config.options.profile_name
+    retries = config.get_retries(profile_name)
+    threshold = config.get_circuit_failure_threshold(profile_name)
+    if not retries and not threshold:
+        return None
+
+    policy = RetryPolicy(max_retries = retries or 0, failure_threshold = threshold or 0)
+    backoff = config.get_retry_backoff(profile_name)
+    if backoff is not None:
+        policy.backoff_factor = backoff
+    max_backoff = config.get_retry_max_backoff(profile_name)
+    if max_backoff is not None:
+        policy.max_backoff = max_backoff
+    reset_timeout = config.get_circuit_reset_timeout(profile_name)
+    if reset_timeout is not None:
+        policy.reset_timeout = reset_timeout
+    return policy
+
+
+def _get_polling_policy(config):
+    profile_name = config.options.profile_name
+    policy = PollingPolicy()
+    initial_delay = config.get_poll_initial_delay(profile_name)
+    if initial_delay is not None:
+        policy.initial_delay = initial_delay
+    max_delay = config.get_poll_max_delay(profile_name)
+    if max_delay is not None:
+        policy.max_delay = max_delay
+    return policy
+
+
+def _get_rate_limiter(config):
+    profile_name = config.options.profile_name
+    limiter = None
+    for method in [None, "GET", "POST", "PUT", "DELETE"]:
+        rate = config.get_rate_limit(profile_name, method)
+        burst = config.get_rate_burst(profile_name, method)
+        max_in_flight = config.get_max_in_flight(profile_name, method)
+        if not rate and not max_in_flight:
+            continue
+        if method is None:
+            limiter = RateLimiter(rate, burst, max_in_flight)
+        else:
+            if limiter is None:
+                limiter = RateLimiter()
+            limiter.set_method_limit(method, rate, burst, max_in_flight)
+    return limiter
 
 
 def define_credentials_item(item_name, env_name):
@@ -0,0 +1,395 @@
+# coding: utf-8
+"""
+Provides an asyncio-native HTTP client (L{AsyncHttpClient}) exposing the same
+create/read/read_items/update/patch/delete/upload operations as
+L{HttpClient<comodit_client.rest.client.HttpClient>}. Requests are sent on
+persistent HTTP/1.1 connections opened with asyncio streams, which allows a
+single thread to drive a large number of concurrent requests.
+
+This module requires Python 3.6 or later.
+"""
+
+import asyncio
+import email.parser
+import http.client
+import mimetypes
+import os
+import ssl
+import time
+import urllib.error
+import urllib.parse
+import uuid
+from collections import deque
+
+from comodit_client.rest import compression
+from comodit_client.rest.client import HttpClient, error_message
+from comodit_client.rest.exceptions import ApiException
+from comodit_client.rest.pool import ConnectionPool
+from comodit_client.rest.streaming import JsonItemStream
+
+
+class AsyncResponse(object):
+    """
+    Response returned by L{AsyncHttpClient} when decoding is disabled. The body
+    has already been received when the response is returned, it can therefore
+    be read without awaiting.
+    """
+
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.code = status
+        self.status = status
+        self.msg = reason
+        self.headers = headers
+        self._body = body
+        self._offset = 0
+
+    def read(self, amt = None):
+        if amt is None:
+            data = self._body[self._offset:]
+        else:
+            data = self._body[self._offset:self._offset + amt]
+        self._offset += len(data)
+        return data
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def getheader(self, name, default = None):
+        return self.headers.get(name, default)
+
+    def close(self):
+        pass
+
+
+class _Connection(object):
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.time()
+
+    def close(self):
+        self.writer.close()
+
+    def is_closing(self):
+        return self.writer.is_closing() or self.reader.at_eof()
+
+
+class AsyncHttpClient(object):
+    """
+    Asyncio counterpart of L{HttpClient<comodit_client.rest.client.HttpClient>}.
+    All request methods are coroutines (L{read_items} is an asynchronous
+    generator): no request is ever sent by a blocking call. At most
+    C{pool_size} connections to the server are opened at the same time;
+    additional requests wait for a connection to be available.
+
+    As with L{ConnectionPool<comodit_client.rest.pool.ConnectionPool>}, a
+    request failing on a reused idle connection is only sent again if it is
+    idempotent and does not target an action; otherwise, a C{URLError} is
+    raised since the server may have processed the request.
+
+    Note that proxies are not supported by this client.
+    """
+
+    _max_redirects = 5
+
+    _stale_errors = (asyncio.IncompleteReadError,
+                     ConnectionResetError,
+                     ConnectionAbortedError,
+                     BrokenPipeError)
+
+    resend_methods = ConnectionPool.resend_methods
+    _can_resend = ConnectionPool._can_resend
+
+    def __init__(self, endpoint, username, password, token, insecure_upload = False,
+                 pool_size = 10, pool_idle_timeout = 60, timeout = None,
+                 compression = True, compress_min_size = 0, json_codec = None):
+        if pool_size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.endpoint = endpoint.rstrip('/')
+        self.username = username
+        self.password = password
+        self.token = token
+        self._insecure_upload = insecure_upload
+        self._compression = compression
+        self._compress_min_size = compress_min_size
+        self._json_codec = json_codec
+        self.pool_size = pool_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.timeout = timeout
+        self._idle = {}
+        self._slots = {}
+
+    # URL, header and JSON helpers are shared with HttpClient, request methods
+    # are not.
+    json_codec = HttpClient.json_codec
+    decode = HttpClient.decode
+    _decode_and_keep_key_order = HttpClient._decode_and_keep_key_order
+    _encode_url = HttpClient._encode_url
+    _auth_headers = HttpClient._auth_headers
+    _headers = HttpClient._headers
+    _is_token_available = HttpClient._is_token_available
+    _get_basic_authorization_field = HttpClient._get_basic_authorization_field
+    _get_app_key_field = HttpClient._get_app_key_field
+
+    async def create(self, entity, item = None, parameters = {}, decode = True):
+        url = self._encode_url(entity, parameters)
+        if item is not None:
+            try:
+                data = self.json_codec.dumps(item).encode('utf-8')
+            except Exception as e:
+                raise ApiException("Could not encode given data: " + str(e), 0)
+        else:
+            data = b""
+        raw = await self._request("POST", url, data, self._data_headers(data))
+        if decode:
+            try:
+                return self._decode_and_keep_key_order(raw)
+            except Exception:
+                raise ApiException("Could not decode response: " + self.decode(raw), 0)
+        else:
+            return raw
+
+    async def read(self, entity, parameters = {}, decode = True):
+        url = self._encode_url(entity, parameters)
+        raw = await self._request("GET", url, None, self._headers())
+        if decode:
+            return self._decode_and_keep_key_order(raw)
+        else:
+            return raw
+
+    async def read_items(self, entity, parameters = {}, key = "items"):
+        url = self._encode_url(entity, parameters)
+        raw = await self._request("GET", url, None, self._headers())
+        try:
+            for item in JsonItemStream(raw, key, self.json_codec.object_pairs_hook):
+                yield item
+        except ValueError as e:
+            raise ApiException("Could not decode response: " + str(e), 0)
+
+    async def update(self, entity, item = None, parameters = {}, decode = True):
+        url = self._encode_url(entity, parameters)
+        if item is not None:
+            data = self.json_codec.dumps(item).encode('utf-8')
+        else:
+            data = b""
+        raw = await self._request("PUT", url, data, self._data_headers(data))
+        if decode:
+            return self._decode_and_keep_key_order(raw)
+        else:
+            return raw
+
+    async def patch(self, entity, item, parameters = {}, decode = True):
+        url = self._encode_url(entity, parameters)
+        data = self.json_codec.dumps(item).encode('utf-8')
+        raw = await self._request("PATCH", url, data, self._data_headers(data))
+        if decode:
+            return self._decode_and_keep_key_order(raw)
+        else:
+            return raw
+
+    async def delete(self, entity, parameters = {}):
+        url = self._encode_url(entity, parameters)
+        await self._request("DELETE", url, None, self._headers())
+
+    async def upload_to_exising_file_with_path(self, file_name, path):
+        boundary = uuid.uuid4().hex
+        with open(file_name, 'rb') as f:
+            content = f.read()
+        content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+        data = b"".join([
+            ("--" + boundary + "\r\n").encode('utf-8'),
+            ('Content-Disposition: form-data; name="file"; filename="%s"\r\n' % os.path.basename(file_name)).encode('utf-8'),
+            ("Content-Type: " + content_type + "\r\n\r\n").encode('utf-8'),
+            content,
+            ("\r\n--" + boundary + "--\r\n").encode('utf-8')])
+        headers = self._auth_headers()
+        headers["Content-Type"] = "multipart/form-data; boundary=" + boundary
+        await self._request("POST", self._encode_url(path, []), data, headers,
+                            insecure = self._insecure_upload)
+
+    async def close(self):
+        """
+        Closes all idle connections.
+        """
+
+        for idle in self._idle.values():
+            while idle:
+                idle.popleft().close()
+        self._idle = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def _data_headers(self, data):
+        headers = self._headers()
+        if self._compress_min_size and len(data) >= self._compress_min_size:
+            headers["Content-Encoding"] = "gzip"
+        return headers
+
+    async def _request(self, method, url, data, headers, insecure = False):
+        if data and headers.get("Content-Encoding") == "gzip":
+            data = compression.compress(data)
+        for i in range(self._max_redirects + 1):
+            response = await self._send(method, url, data, headers, insecure)
+            location = response.getheader("Location")
+            if response.code not in (301, 302, 303, 307, 308) or not location:
+                break
+            url = urllib.parse.urljoin(url, location)
+            if response.code == 303 or (response.code in (301, 302) and method == "POST"):
+                method = "GET"
+                data = None
+
+        if response.code >= 400:
+            err_content = response.read().decode('utf-8', errors = 'ignore')
+            raise ApiException(error_message(err_content), response.code)
+        return response
+
+    async def _send(self, method, url, data, headers, insecure):
+        parsed = urllib.parse.urlsplit(url)
+        key = (parsed.scheme, parsed.hostname, parsed.port, insecure)
+        selector = urllib.parse.urlunsplit(("", "", parsed.path or "/", parsed.query, ""))
+        request = self._serialize(method, parsed, selector, data, headers)
+
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = asyncio.Semaphore(self.pool_size)
+        async with slot:
+            while True:
+                conn, reused = await self._acquire(key)
+                try:
+                    conn.writer.write(request)
+                    await conn.writer.drain()
+                    response, reusable = await self._with_timeout(self._read_response(conn, method, url))
+                except self._stale_errors as err:
+                    conn.close()
+                    if reused and self._can_resend(method, parsed.path):
+                        # Server closed an idle keep-alive connection, try
+                        # again with another one.
+                        continue
+                    raise urllib.error.URLError(err)
+                except urllib.error.URLError:
+                    conn.close()
+                    raise
+                except OSError as err:
+                    conn.close()
+                    raise urllib.error.URLError(err)
+                except BaseException:
+                    conn.close()
+                    raise
+
+                if reusable:
+                    conn.last_used = time.time()
+                    self._idle.setdefault(key, deque()).append(conn)
+                else:
+                    conn.close()
+                return response
+
+    async def _acquire(self, key):
+        idle = self._idle.get(key)
+        now = time.time()
+        while idle:
+            conn = idle.pop()
+            expired = self.pool_idle_timeout and (now - conn.last_used) > self.pool_idle_timeout
+            if expired or conn.is_closing():
+                conn.close()
+                continue
+            return (conn, True)
+
+        (scheme, host, port, insecure) = key
+        if scheme == "https":
+            context = ssl.create_default_context()
+            if insecure:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            port = port or 443
+        elif scheme == "http":
+            context = None
+            port = port or 80
+        else:
+            raise urllib.error.URLError("Unsupported scheme " + str(scheme))
+        try:
+            (reader, writer) = await self._with_timeout(asyncio.open_connection(host, port, ssl = context))
+        except urllib.error.URLError:
+            raise
+        except OSError as err:
+            raise urllib.error.URLError(err)
+        return (_Connection(reader, writer), False)
+
+    def _serialize(self, method, parsed, selector, data, headers):
+        lines = [method + " " + selector + " HTTP/1.1",
+                 "Host: " + parsed.netloc.rsplit("@", 1)[-1],
+                 "Connection: keep-alive"]
+        if "Accept-Encoding" not in headers:
+            lines.append("Accept-Encoding: identity")
+        for (name, value) in headers.items():
+            lines.append(name + ": " + str(value))
+        if data is not None:
+            # Nginx does not support empty requests with no Content-Length
+            lines.append("Content-Length: " + str(len(data)))
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+        if data:
+            return head + data
+        return head
+
+    async def _read_response(self, conn, method, url):
+        reader = conn.reader
+        status_line = await reader.readuntil(b"\r\n")
+        parts = status_line.decode('latin-1').rstrip("\r\n").split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise http.client.BadStatusLine(status_line)
+        status = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ""
+
+        header_lines = []
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            header_lines.append(line.decode('latin-1'))
+        headers = email.parser.Parser(_class = http.client.HTTPMessage).parsestr("".join(header_lines))
+
+        reusable = (parts[0] != "HTTP/1.0") and headers.get("Connection", "").lower() != "close"
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = await self._read_chunked(reader)
+        elif headers.get("Content-Length") is not None:
+            body = await reader.readexactly(int(headers.get("Content-Length")))
+        else:
+            body = await reader.read()
+            reusable = False
+        if headers.get("Content-Encoding"):
+            body = compression.decompress(body, headers.get("Content-Encoding"))
+        return (AsyncResponse(url, status, reason, headers, body), reusable)
+
+    async def _read_chunked(self, reader):
+        chunks = []
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # Skip trailers
+                while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def _with_timeout(self, coroutine):
+        if self.timeout is None:
+            return await coroutine
+        try:
+            return await asyncio.wait_for(coroutine, self.timeout)
+        except asyncio.TimeoutError:
+            # Same as urllib, time-outs are reported as URLError
+            raise urllib.error.URLError("timed out")
@@ -0,0 +1,302 @@
+# coding: utf-8
+"""
+Provides the HTTP response cache (L{ResponseCache}) used by
+L{HttpClient<comodit_client.rest.client.HttpClient>} to revalidate GET
+requests with C{If-None-Match} and C{If-Modified-Since} headers. Only
+responses carrying an C{ETag} or a C{Last-Modified} header are cached.
+"""
+
+from builtins import object
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class CachedResponse(io.BytesIO):
+    """
+    File-like response built from a body kept in memory. It exposes the same
+    helpers as the responses returned by C{urllib.request.urlopen}.
+    """
+
+    def __init__(self, url, code, headers, body):
+        super(CachedResponse, self).__init__(body)
+        self.url = url
+        self.code = code
+        self.status = code
+        self.headers = headers
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def getheader(self, name, default = None):
+        return self.headers.get(name, default)
+
+
+class CacheEntry(object):
+    """
+    A cached response body and its validators.
+    """
+
+    def __init__(self, url, body, etag = None, last_modified = None, content_type = None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+
+    def add_validators(self, request):
+        """
+        Adds conditional headers to given request.
+
+        @param request: A request.
+        @type request: C{urllib.request.Request}
+        """
+
+        if self.etag:
+            request.add_header("If-None-Match", self.etag)
+        if self.last_modified:
+            request.add_header("If-Modified-Since", self.last_modified)
+
+    def to_response(self):
+        headers = {}
+        if self.etag:
+            headers["ETag"] = self.etag
+        if self.last_modified:
+            headers["Last-Modified"] = self.last_modified
+        if self.content_type:
+            headers["Content-Type"] = self.content_type
+        return CachedResponse(self.url, 200, headers, self.body)
+
+    def to_dict(self):
+        return {"url": self.url,
+                "etag": self.etag,
+                "last_modified": self.last_modified,
+                "content_type": self.content_type}
+
+
+class ResponseCache(object):
+    """
+    Thread-safe LRU cache of GET responses, keyed by URL. At most C{max_entries}
+    responses are kept in memory. If a directory is given, responses are also
+    stored on disk and survive the process; on-disk entries are not bounded.
+
+    Cached responses may include secrets (e.g. settings values): the
+    directory is created readable by its owner only and files are written
+    with mode 0600. Files are written to a temporary file first, then
+    renamed, so that concurrent processes never read a partial entry.
+    """
+
+    def __init__(self, max_entries = 256, directory = None):
+        """
+        Creates a cache.
+
+        @param max_entries: Maximum number of responses kept in memory.
+        @type max_entries: int
+        @param directory: Path to the directory storing cached responses
+        on disk (optional).
+        @type directory: string
+        """
+
+        self.max_entries = max_entries
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._disk_index = None
+        self._lock = threading.RLock()
+
+    def get(self, url):
+        """
+        Looks up cached response associated to given URL.
+
+        @param url: A URL.
+        @type url: string
+        @return: Cached entry or None.
+        @rtype: L{CacheEntry}
+        """
+
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+                return entry
+            entry = self._load(url)
+            if entry is not None:
+                self._remember(entry)
+            return entry
+
+    def hit(self, entry):
+        """
+        Records that given entry was successfully revalidated by the server
+        and returns a response built from it.
+
+        @rtype: L{CachedResponse}
+        """
+
+        with self._lock:
+            self.hits += 1
+        return entry.to_response()
+
+    def store(self, url, response):
+        """
+        Reads given response and caches it if it carries validators.
+        The response is counted as a miss.
+
+        @param url: Requested URL.
+        @type url: string
+        @param response: A file-like response.
+        @return: A response with the same content as given response.
+        @rtype: L{CachedResponse}
+        """
+
+        body = response.read()
+        headers = response.info() if hasattr(response, "info") else {}
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        entry = CacheEntry(url, body, etag, last_modified, headers.get("Content-Type"))
+        with self._lock:
+            self.misses += 1
+            if etag or last_modified:
+                self._remember(entry)
+                self._save(entry)
+            else:
+                self._discard(url)
+        cached = entry.to_response()
+        cached.code = cached.status = response.getcode()
+        return cached
+
+    def invalidate(self, url):
+        """
+        Drops cached responses affected by a modification of the resource
+        at given URL: the resource itself, its sub-resources and its parent
+        collection. Query strings are ignored.
+
+        @param url: URL of modified resource.
+        @type url: string
+        """
+
+        path = self._path(url)
+        parent = path.rsplit("/", 1)[0]
+        with self._lock:
+            urls = list(self._entries.keys())
+            if self.directory:
+                urls += list(self._get_disk_index().keys())
+            for cached_url in set(urls):
+                cached_path = self._path(cached_url)
+                if cached_path == parent or cached_path == path or cached_path.startswith(path + "/"):
+                    self._discard(cached_url)
+                    self.invalidations += 1
+
+    def clear(self):
+        """
+        Drops all cached responses.
+        """
+
+        with self._lock:
+            for url in set(list(self._entries.keys()) + list(self._get_disk_index().keys())):
+                self._discard(url)
+
+    def stats(self):
+        """
+        Provides cache counters: number of hits (responses served from the
+        cache after a 304 answer), misses, invalidated entries and
+        entries currently kept in memory.
+
+        @rtype: dict
+        """
+
+        with self._lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "invalidations": self.invalidations,
+                    "entries": len(self._entries)}
+
+    def _path(self, url):
+        return url.split("?", 1)[0].rstrip("/")
+
+    def _remember(self, entry):
+        self._entries[entry.url] = entry
+        self._entries.move_to_end(entry.url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last = False)
+
+    def _discard(self, url):
+        self._entries.pop(url, None)
+        if self.directory and url in self._get_disk_index():
+            base = self._get_disk_index().pop(url)
+            for ext in (".json", ".body"):
+                try:
+                    os.remove(base + ext)
+                except OSError:
+                    pass
+
+    def _file_base(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def _get_disk_index(self):
+        if self._disk_index is None:
+            self._disk_index = {}
+            if self.directory and os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    if not name.endswith(".json"):
+                        continue
+                    base = os.path.join(self.directory, name[:-len(".json")])
+                    try:
+                        with open(base + ".json", "r") as f:
+                            self._disk_index[json.load(f)["url"]] = base
+                    except (OSError, ValueError, KeyError):
+                        pass
+        return self._disk_index
+
+    def _load(self, url):
+        if not self.directory or url not in self._get_disk_index():
+            return None
+        base = self._get_disk_index()[url]
+        try:
+            with open(base + ".json", "r") as f:
+                meta = json.load(f)
+            with open(base + ".body", "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get("digest") != hashlib.sha1(body).hexdigest():
+            # Body and metadata were not written by the same process
+            return None
+        return CacheEntry(url, body, meta.get("etag"), meta.get("last_modified"), meta.get("content_type"))
+
+    def _save(self, entry):
+        if not self.directory:
+            return
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        base = self._file_base(entry.url)
+        meta = entry.to_dict()
+        meta["digest"] = hashlib.sha1(entry.body).hexdigest()
+        self._write(base + ".body", entry.body)
+        self._write(base + ".json", json.dumps(meta).encode('utf-8'))
+        self._get_disk_index()[entry.url] = base
+
+    def _write(self, path, data):
+        # mkstemp creates the file with mode 0600
+        (fd, tmp_path) = tempfile.mkstemp(dir = self.directory, suffix = ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
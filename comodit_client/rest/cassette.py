@@ -0,0 +1,307 @@
+# coding: utf-8
+"""
+Provides record/replay HTTP transports. A L{RecordingTransport} sends
+requests with another transport and appends each exchange to a
+L{Cassette} file; a L{ReplayTransport} answers requests with the exchanges
+of a cassette, without any server, optionally simulating network latency and
+bandwidth. Both can replace the connection pool of an
+L{HttpClient<comodit_client.rest.client.HttpClient>} (see its C{transport}
+argument).
+
+A cassette is a JSON lines file (gzipped if its name ends with C{.gz}): each
+line describes an exchange (request's method, path and body digest,
+response's status, headers and body). Credentials are never recorded.
+Requests are matched on method and path (scheme and host are ignored, a
+cassette may therefore be replayed against any endpoint).
+"""
+
+from future import standard_library
+standard_library.install_aliases()
+
+# Following imports MUST come after call to install_aliases
+from builtins import object
+import base64
+import email.parser
+import gzip
+import hashlib
+import http.client
+import io
+import json
+import six
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import deque
+from urllib.error import HTTPError, URLError
+
+from comodit_client.rest.cache import CachedResponse
+
+_VERSION = 1
+
+
+class Cassette(object):
+    """
+    Recorded HTTP exchanges.
+    """
+
+    def __init__(self, path):
+        """
+        Creates a cassette bound to a file.
+
+        @param path: Path to the cassette file.
+        @type path: string
+        """
+
+        self.path = path
+        self.exchanges = []
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Loads the exchanges recorded in cassette's file.
+
+        @return: This cassette.
+        @rtype: L{Cassette}
+        """
+
+        with self._open("rt") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if "version" in data:
+                    if data["version"] > _VERSION:
+                        raise ValueError("Unsupported cassette version " + str(data["version"]))
+                    continue
+                self.exchanges.append(data)
+        return self
+
+    def append(self, exchange):
+        """
+        Appends an exchange to cassette's file, which is truncated when the
+        first exchange is appended.
+
+        @param exchange: The exchange (see L{exchange}).
+        @type exchange: dict
+        """
+
+        line = json.dumps(exchange, separators = (",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = self._open("wt")
+                self._file.write(json.dumps({"version": _VERSION}) + "\n")
+            self._file.write(line)
+            self._file.flush()
+            self.exchanges.append(exchange)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open(self, mode):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode)
+        return io.open(self.path, mode)
+
+
+def request_key(request):
+    """
+    Provides the key used to match a request with recorded exchanges: its
+    method, path (with query string) and the digest of its body.
+
+    @param request: A request.
+    @type request: C{urllib.request.Request}
+    @rtype: tuple
+    """
+
+    parsed = urllib.parse.urlsplit(request.get_full_url())
+    path = parsed.path
+    if parsed.query:
+        path += "?" + parsed.query
+    return (request.get_method(), path, _digest(request.data))
+
+
+def exchange(request, status, reason, headers, body):
+    """
+    Builds the description of an exchange.
+
+    @param request: The sent request.
+    @type request: C{urllib.request.Request}
+    @param status: Response's status code.
+    @type status: int
+    @param reason: Response's reason phrase.
+    @type reason: string
+    @param headers: Response's headers.
+    @param body: Response's body, as received.
+    @type body: bytes
+    @rtype: dict
+    """
+
+    (method, path, digest) = request_key(request)
+    data = {"method": method,
+            "path": path,
+            "request_digest": digest,
+            "status": status,
+            "reason": reason,
+            "headers": [[name, value] for (name, value) in headers.items()]}
+    try:
+        data["body"] = body.decode('utf-8')
+    except UnicodeDecodeError:
+        data["body"] = base64.b64encode(body).decode('ascii')
+        data["body_encoding"] = "base64"
+    return data
+
+
+def _digest(data):
+    if not data:
+        return None
+    return hashlib.sha1(data).hexdigest()
+
+
+def _body(data):
+    if data.get("body_encoding") == "base64":
+        return base64.b64decode(data["body"])
+    return data["body"].encode('utf-8')
+
+
+def _headers(data):
+    lines = "".join(name + ": " + value + "\r\n" for (name, value) in data["headers"])
+    return email.parser.Parser(_class = http.client.HTTPMessage).parsestr(lines)
+
+
+def _response(url, data, body):
+    if data["status"] >= 400:
+        return HTTPError(url, data["status"], data["reason"], _headers(data), io.BytesIO(body))
+    response = CachedResponse(url, data["status"], _headers(data), body)
+    response.msg = data["reason"]
+    return response
+
+
+class RecordingTransport(object):
+    """
+    Transport sending requests with another transport and recording the
+    exchanges in a cassette. Response bodies are entirely read before being
+    returned.
+    """
+
+    def __init__(self, cassette, transport = None):
+        """
+        Creates a recording transport.
+
+        @param cassette: The cassette to record to.
+        @type cassette: L{Cassette}
+        @param transport: Transport sending the requests (e.g. a
+        L{ConnectionPool<comodit_client.rest.pool.ConnectionPool>}),
+        C{urllib.request.urlopen} is used if None.
+        """
+
+        self.cassette = cassette
+        self.transport = transport
+
+    def urlopen(self, request):
+        url = request.get_full_url()
+        try:
+            if self.transport is not None:
+                response = self.transport.urlopen(request)
+            else:
+                response = urllib.request.urlopen(request)
+        except HTTPError as err:
+            body = err.read()
+            data = exchange(request, err.code, err.msg, err.headers, body)
+            self.cassette.append(data)
+            raise _response(url, data, body)
+
+        body = response.read()
+        response.close()
+        # urllib responses hold reason phrase in msg attribute
+        reason = getattr(response, "msg", None)
+        if not isinstance(reason, six.string_types):
+            reason = ""
+        data = exchange(request, response.getcode(), reason, response.info(), body)
+        self.cassette.append(data)
+        return _response(url, data, body)
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+        self.cassette.close()
+
+
+class ReplayTransport(object):
+    """
+    Transport answering requests with recorded exchanges. Exchanges matching
+    the same request are replayed in recording order, the last one being
+    replayed again once all have been used. Replay is deterministic: it does
+    not depend on timing nor on the order of requests to other resources.
+
+    Network conditions may be simulated: each response is delayed by
+    C{latency} seconds plus the time needed to transfer its body at
+    C{bandwidth} bytes per second.
+    """
+
+    def __init__(self, cassette, latency = 0, bandwidth = None, match_body = False):
+        """
+        Creates a replay transport.
+
+        @param cassette: A loaded cassette.
+        @type cassette: L{Cassette}
+        @param latency: Delay, in seconds, added to each response.
+        @type latency: float
+        @param bandwidth: Simulated bandwidth in bytes per second (optional).
+        @type bandwidth: float
+        @param match_body: If True, request bodies must match recorded ones.
+        @type match_body: bool
+        """
+
+        self.cassette = cassette
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.match_body = match_body
+        self._exchanges = {}
+        self._lock = threading.Lock()
+        for data in cassette.exchanges:
+            self._exchanges.setdefault(self._key(data["method"], data["path"], data["request_digest"]),
+                                       deque()).append(data)
+
+    def urlopen(self, request):
+        """
+        Replays the exchange matching a request.
+
+        @raise URLError: If no recorded exchange matches the request.
+        """
+
+        (method, path, digest) = request_key(request)
+        key = self._key(method, path, digest)
+        with self._lock:
+            queue = self._exchanges.get(key)
+            if not queue:
+                raise URLError("No recorded exchange for " + method + " " + path)
+            data = queue[0]
+            if len(queue) > 1:
+                queue.popleft()
+
+        body = _body(data)
+        delay = self.latency
+        if self.bandwidth:
+            delay += len(body) / float(self.bandwidth)
+        if delay > 0:
+            self._sleep(delay)
+        response = _response(request.get_full_url(), data, body)
+        if isinstance(response, HTTPError):
+            raise response
+        return response
+
+    def close(self):
+        pass
+
+    def _key(self, method, path, digest):
+        if self.match_body:
+            return (method, path, digest)
+        return (method, path)
+
+    def _sleep(self, delay):
+        time.sleep(delay)
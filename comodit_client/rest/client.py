@@ -13,27 +13,126 @@ import six
 standard_library.install_aliases()
 from builtins import object
 import urllib.request, urllib.parse, urllib.error, urllib.request, urllib.error, urllib.parse, json
+import time
 import comodit_client.util.fileupload as fileupload
 from urllib.error import HTTPError
 from comodit_client.util import urllibx
 from comodit_client.rest.exceptions import ApiException
-from collections import OrderedDict
+from comodit_client.rest.pool import ConnectionPool
+from comodit_client.rest.curl import CurlTransport
+from comodit_client.rest.cache import ResponseCache
+from comodit_client.rest import compression
+from comodit_client.rest.streaming import JsonItemStream
+from comodit_client.rest.instrumentation import InstrumentedResponse, RequestEvent, url_template
+from comodit_client.util.jsoncodec import get_default_codec
+
+
+def error_message(err_content):
+    try:
+        data = json.loads(err_content)
+        msg_list = data["error"]
+        message = "["
+        if len(msg_list) > 0:
+            i = 0
+            while i < len(msg_list) - 1:
+                message += msg_list[i] if msg_list[i] else "None"
+                message += ", "
+                i += 1
+            message += msg_list[len(msg_list) - 1] if msg_list[len(msg_list) - 1] else "None"
+        message += "]"
+    except Exception:
+        message = err_content
+    return message
 
 
 class HttpClient(object):
-    def __init__(self, endpoint, username, password, token, insecure_upload = False):
+    def __init__(self, endpoint, username, password, token, insecure_upload = False,
+                 pool_size = 4, pool_idle_timeout = 60, cache_size = 0, cache_dir = None,
+                 compression = True, compress_min_size = 0, retry_policy = None,
+                 rate_limiter = None, json_codec = None, transport = "urllib", http2 = True):
         self.endpoint = endpoint.rstrip('/')
         self.username = username
         self.password = password
         self.token = token
         self._insecure_upload = insecure_upload
+        # Responses are requested compressed when compression is enabled.
+        # Request bodies are gzipped only if a minimum size is given.
+        self._compression = compression
+        self._compress_min_size = compress_min_size
+        # A pool size of 0 disables connection reuse, every request is then
+        # sent on a new connection by urllib. With curl transport, pool size
+        # is the maximum number of connections per host.
+        # A transport object (featuring urlopen and close methods, e.g. a
+        # record/replay transport) may also be given.
+        if transport == "curl":
+            self._pool = CurlTransport(pool_size or 10, http2)
+        elif not isinstance(transport, six.string_types):
+            self._pool = transport
+        elif transport != "urllib":
+            raise ValueError("Unsupported transport " + str(transport))
+        elif pool_size:
+            self._pool = ConnectionPool(pool_size, pool_idle_timeout)
+        else:
+            self._pool = None
+        # Failed requests are not retried unless a retry policy is given.
+        self.retry_policy = retry_policy
+        # Requests are throttled only if a rate limiter is given. A rate
+        # limiter may be shared by several clients.
+        self.rate_limiter = rate_limiter
+        # Default JSON codec is looked up when needed, changing it therefore
+        # affects existing clients.
+        self._json_codec = json_codec
+        # Request listeners, see add_listener
+        self._listeners = []
+        # Invalidation listeners, see add_invalidation_listener
+        self._invalidation_listeners = []
+        # GET responses are cached and revalidated only if a cache size is
+        # given.
+        if cache_size:
+            self.cache = ResponseCache(cache_size, cache_dir)
+        else:
+            self.cache = None
+
+    @property
+    def json_codec(self):
+        if self._json_codec is not None:
+            return self._json_codec
+        return get_default_codec()
+
+    def add_listener(self, listener):
+        """
+        Registers a function called with a
+        L{RequestEvent<comodit_client.rest.instrumentation.RequestEvent>} each
+        time a request completes (i.e. its response has been read) or fails.
+        """
+
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def add_invalidation_listener(self, listener):
+        """
+        Registers a function called with the path (relative to the endpoint)
+        of each resource modified through this client i.e. targeted by a
+        POST, PUT, PATCH or DELETE request.
+        """
+
+        self._invalidation_listeners.append(listener)
+
+    def remove_invalidation_listener(self, listener):
+        self._invalidation_listeners.remove(listener)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
 
     def create(self, entity, item = None, parameters = {}, decode = True):
         url = self._encode_url(entity, parameters)
 
         if not item is None:
             try:
-                json_data = json.dumps(item)
+                json_data = self.json_codec.dumps(item)
             except Exception as e:
                 raise ApiException("Could not encode given data: " + e.message, 0)
             req = self._new_request_with_data(url, "POST", json_data)
@@ -42,7 +141,10 @@ class HttpClient(object):
             # Fix regarding Nginx not supporting empty requests with no
             # Content-Length
             req.add_header("Content-Length", 0)
-        raw = self._urlopen(req)
+        try:
+            raw = self._urlopen(req)
+        finally:
+            self._invalidate(entity)
         if decode:
             try:
                 return self._decode_and_keep_key_order(raw)
@@ -52,7 +154,7 @@ class HttpClient(object):
             return raw
 
     def _decode_and_keep_key_order(self, response):
-        return json.loads(self.decode(response), object_pairs_hook=OrderedDict)
+        return self.json_codec.loads(self.decode(response))
 
     def decode(self, response):
         return response.read().decode('utf-8', errors = 'ignore')
@@ -60,22 +162,67 @@ class HttpClient(object):
     def read(self, entity, parameters = {}, decode = True):
         url = self._encode_url(entity, parameters)
         req = self._new_request(url, "GET")
-        raw = self._urlopen(req)
+        if self.cache is not None:
+            raw = self._cached_urlopen(url, req)
+        else:
+            raw = self._urlopen(req)
         if decode:
             return self._decode_and_keep_key_order(raw)
         else:
             return raw
 
+    def can_stream(self):
+        """
+        Tells if a response may be read while other requests are sent, i.e.
+        if the connection pool has a connection left for these requests once
+        the response holds one.
+
+        @rtype: bool
+        """
+
+        if self._pool is None or not hasattr(self._pool, "free_slots"):
+            return True
+        return self._pool.free_slots(self.endpoint) > 1
+
+    def read_items(self, entity, parameters = {}, key = "items"):
+        url = self._encode_url(entity, parameters)
+        req = self._new_request(url, "GET")
+        # Response cache is bypassed: it would need the whole body before
+        # the first item is decoded.
+        raw = self._urlopen(req)
+        try:
+            for item in JsonItemStream(raw, key, self.json_codec.object_pairs_hook):
+                yield item
+        except ValueError as e:
+            raise ApiException("Could not decode response: " + str(e), 0)
+        finally:
+            raw.close()
+
     def update(self, entity, item = None, parameters = {}, decode = True):
         url = self._encode_url(entity, parameters)
         if item is not None:
-            req = self._new_request_with_data(url, "PUT", json.dumps(item))
+            req = self._new_request_with_data(url, "PUT", self.json_codec.dumps(item))
         else:
             req = self._new_request(url, "PUT")
             # Fix regarding Nginx not supporting empty requests with no
             # Content-Length
             req.add_header("Content-Length", 0)
-        raw = self._urlopen(req)
+        try:
+            raw = self._urlopen(req)
+        finally:
+            self._invalidate(entity)
+        if decode:
+            return self._decode_and_keep_key_order(raw)
+        else:
+            return raw
+
+    def patch(self, entity, item, parameters = {}, decode = True):
+        url = self._encode_url(entity, parameters)
+        req = self._new_request_with_data(url, "PATCH", self.json_codec.dumps(item))
+        try:
+            raw = self._urlopen(req)
+        finally:
+            self._invalidate(entity)
         if decode:
             return self._decode_and_keep_key_order(raw)
         else:
@@ -84,7 +231,32 @@ class HttpClient(object):
     def delete(self, entity, parameters = {}):
         url = self._encode_url(entity, parameters)
         req = self._new_request(url, "DELETE")
-        self._urlopen(req)
+        try:
+            self._urlopen(req).read()
+        finally:
+            self._invalidate(entity)
+
+    def _cached_urlopen(self, url, req):
+        entry = self.cache.get(url)
+        if entry is not None:
+            entry.add_validators(req)
+        try:
+            raw = self._urlopen(req)
+        except ApiException as e:
+            # urllib reports 304 responses as errors
+            if e.code == 304 and entry is not None:
+                return self.cache.hit(entry)
+            raise
+        if raw.getcode() == 304 and entry is not None:
+            raw.read()
+            return self.cache.hit(entry)
+        return self.cache.store(url, raw)
+
+    def _invalidate(self, entity):
+        if self.cache is not None:
+            self.cache.invalidate(self._encode_url(entity, {}))
+        for listener in list(self._invalidation_listeners):
+            listener(entity)
 
     def _encode_url(self, entity, parameters):
         url = self.endpoint + "/" + urllib.parse.quote(entity, "/%")
@@ -93,10 +265,13 @@ class HttpClient(object):
         return url
 
     def upload_to_exising_file_with_path(self, file_name, path):
-        fileupload.post_multipart(self._encode_url(path, []), [],
-                                             [("file", file_name)],
-                                             insecure = self._insecure_upload,
-                                             headers = self._auth_headers())
+        try:
+            fileupload.post_multipart(self._encode_url(path, []), [],
+                                                 [("file", file_name)],
+                                                 insecure = self._insecure_upload,
+                                                 headers = self._auth_headers())
+        finally:
+            self._invalidate(path)
 
     def _auth_headers(self):
         if self._is_token_available():
@@ -118,35 +293,72 @@ class HttpClient(object):
     def _headers(self):
         headers = self._auth_headers()
         headers["Content-Type"] = "application/json"
+        if self._compression:
+            headers["Accept-Encoding"] = compression.ACCEPT_ENCODING
         return headers
 
     def _get_app_key_field(self):
         return self.token
 
     def _urlopen(self, request):
+        event = self._new_event(request)
+        start = time.time()
         try:
-            return urllib.request.urlopen(request)
+            if self.retry_policy is not None:
+                response = self.retry_policy.send(request, self._open)
+            else:
+                response = self._open(request)
         except HTTPError as err:
-            err_content = err.read().decode('utf-8', errors = 'ignore')
-            try:
-                data = json.loads(err_content)
-                msg_list = data["error"]
-                message = "["
-                if len(msg_list) > 0:
-                    i = 0
-                    while i < len(msg_list) - 1:
-                        message += msg_list[i] if msg_list[i] else "None"
-                        message += ", "
-                        i += 1
-                    message += msg_list[len(msg_list) - 1] if msg_list[len(msg_list) - 1] else "None"
-                message += "]"
-            except Exception:
-                message = err_content
-
+            err_content = compression.wrap_response(err).read().decode('utf-8', errors = 'ignore')
+            message = error_message(err_content)
+            self._notify_failure(event, start, message, err.code, len(err_content))
             raise ApiException(message, err.code)
+        except Exception as e:
+            self._notify_failure(event, start, str(e))
+            raise
+        if event is not None:
+            response = InstrumentedResponse(response, event, start, self._notify)
+        return compression.wrap_response(response)
+
+    def _new_event(self, request):
+        if not self._listeners:
+            return None
+        url = request.get_full_url()
+        return RequestEvent(request.get_method(), url, url_template(url, self.endpoint), len(request.data or b""))
+
+    def _notify_failure(self, event, start, message, status = 0, bytes_in = 0):
+        if event is None:
+            return
+        event.error = message
+        event.status = status
+        event.bytes_in = bytes_in
+        event.total_time = time.time() - start
+        self._notify(event)
+
+    def _notify(self, event):
+        for listener in list(self._listeners):
+            listener(event)
+
+    def _open(self, request):
+        if self.rate_limiter is not None:
+            with self.rate_limiter.acquire(request.get_method()):
+                return self._send(request)
+        else:
+            return self._send(request)
+
+    def _send(self, request):
+        if self._pool is not None:
+            return self._pool.urlopen(request)
+        else:
+            return urllib.request.urlopen(request)
 
     def _new_request(self, url, m):
         return urllibx.RequestWithMethod(url, method = m, headers = self._headers())
 
     def _new_request_with_data(self, url, m, d):
-        return urllibx.RequestWithMethod(url, method = m, headers = self._headers(), data = six.b(d))
+        data = six.b(d)
+        headers = self._headers()
+        if self._compress_min_size and len(data) >= self._compress_min_size:
+            data = compression.compress(data)
+            headers["Content-Encoding"] = "gzip"
+        return urllibx.RequestWithMethod(url, method = m, headers = headers, data = data)
@@ -0,0 +1,194 @@
+# coding: utf-8
+"""
+Provides helpers handling compressed HTTP bodies: L{DecompressingResponse}
+transparently decompresses a gzip or deflate encoded response while it is
+being read and L{compress} gzips request bodies.
+"""
+
+from builtins import object
+import gzip
+import zlib
+
+ACCEPT_ENCODING = "gzip, deflate"
+"""
+Value of Accept-Encoding header sent when compression is enabled.
+"""
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class _DeflateDecoder(object):
+    """
+    Deflate decoder accepting both zlib-wrapped and raw deflate streams (some
+    servers send the latter although the former is mandated).
+    """
+
+    def __init__(self):
+        self._first_try = True
+        self._data = b""
+        self._obj = zlib.decompressobj()
+
+    def decompress(self, data):
+        if not self._first_try:
+            return self._obj.decompress(data)
+
+        self._data += data
+        try:
+            decompressed = self._obj.decompress(data)
+            if decompressed:
+                self._first_try = False
+                self._data = None
+            return decompressed
+        except zlib.error:
+            self._first_try = False
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            try:
+                return self.decompress(self._data)
+            finally:
+                self._data = None
+
+    def flush(self):
+        return self._obj.flush()
+
+
+def get_decoder(encoding):
+    """
+    Instantiates a streaming decoder for given content encoding.
+
+    @param encoding: Value of Content-Encoding header.
+    @type encoding: string
+    @return: An object featuring C{decompress} and C{flush} methods or None
+    if encoding is not supported.
+    """
+
+    encoding = (encoding or "").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        return _DeflateDecoder()
+    else:
+        return None
+
+
+def decompress(body, encoding):
+    """
+    Decompresses a body received in one piece.
+
+    @param body: The compressed body.
+    @type body: bytes
+    @param encoding: Value of Content-Encoding header.
+    @type encoding: string
+    @rtype: bytes
+    """
+
+    decoder = get_decoder(encoding)
+    if decoder is None:
+        return body
+    return decoder.decompress(body) + decoder.flush()
+
+
+def compress(body):
+    """
+    Gzips a request body.
+
+    @param body: The body to compress.
+    @type body: bytes
+    @rtype: bytes
+    """
+
+    return gzip.compress(body)
+
+
+def wrap_response(response):
+    """
+    Wraps given response in a L{DecompressingResponse} if its body is
+    compressed.
+
+    @param response: A file-like response.
+    @return: A file-like response yielding decompressed data.
+    """
+
+    headers = response.info() if hasattr(response, "info") else None
+    if headers is None:
+        return response
+    decoder = get_decoder(headers.get("Content-Encoding"))
+    if decoder is None:
+        return response
+    return DecompressingResponse(response, decoder)
+
+
+class DecompressingResponse(object):
+    """
+    File-like response decompressing the body of a wrapped response while it
+    is being read. Compressed data are read in chunks, the full compressed
+    body is therefore never held in memory.
+    """
+
+    def __init__(self, response, decoder):
+        self._response = response
+        self._decoder = decoder
+        self._buffer = b""
+        self._eof = False
+        self.code = response.getcode()
+        self.status = self.code
+        self.headers = response.info()
+        self.url = response.geturl() if hasattr(response, "geturl") else None
+
+    def read(self, amt = None):
+        if amt is None or amt < 0:
+            chunks = [self._buffer]
+            self._buffer = b""
+            while not self._eof:
+                chunks.append(self._next_chunk())
+            return b"".join(chunks)
+
+        while len(self._buffer) < amt and not self._eof:
+            self._buffer += self._next_chunk()
+        data = self._buffer[:amt]
+        self._buffer = self._buffer[amt:]
+        return data
+
+    def readline(self, limit = -1):
+        while b"\n" not in self._buffer and not self._eof:
+            self._buffer += self._next_chunk()
+        end = self._buffer.find(b"\n") + 1 or len(self._buffer)
+        if limit is not None and limit >= 0:
+            end = min(end, limit)
+        data = self._buffer[:end]
+        self._buffer = self._buffer[end:]
+        return data
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def _next_chunk(self):
+        data = self._response.read(_CHUNK_SIZE)
+        if not data:
+            self._eof = True
+            return self._decoder.flush()
+        return self._decoder.decompress(data)
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def getheader(self, name, default = None):
+        return self.headers.get(name, default)
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
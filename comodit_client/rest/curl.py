@@ -0,0 +1,283 @@
+# coding: utf-8
+"""
+Provides an HTTP transport (L{CurlTransport}) based on C{pycurl.CurlMulti}.
+It can replace the L{ConnectionPool<comodit_client.rest.pool.ConnectionPool>}
+of an L{HttpClient<comodit_client.rest.client.HttpClient>}. All requests are
+driven by a single background thread: requests sent concurrently (by several
+threads or through L{CurlTransport.urlopen_many}) are transferred in parallel
+over reused connections and, when the server supports HTTP/2, multiplexed on
+a single connection.
+
+Responses are entirely received before being returned.
+"""
+
+from future import standard_library
+standard_library.install_aliases()
+
+# Following imports MUST come after call to install_aliases
+from builtins import object
+import email.parser
+import http.client
+import io
+import threading
+import pycurl
+from urllib.error import HTTPError, URLError
+
+from comodit_client.rest.cache import CachedResponse
+
+
+class _Transfer(object):
+    """
+    A request being transferred by a L{CurlTransport}.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.url = request.get_full_url()
+        self.body = io.BytesIO()
+        self.reason = ""
+        self.header_lines = []
+        self.response = None
+        self.error = None
+        self.done = threading.Event()
+
+    def write_header(self, line):
+        line = line.decode('latin-1')
+        if line.startswith("HTTP/"):
+            # Status line of a new response (e.g. after a redirection)
+            parts = line.rstrip("\r\n").split(" ", 2)
+            self.reason = parts[2] if len(parts) > 2 else ""
+            self.header_lines = []
+        elif line.strip():
+            self.header_lines.append(line)
+
+    def finish(self, handle):
+        code = handle.getinfo(pycurl.RESPONSE_CODE)
+        url = handle.getinfo(pycurl.EFFECTIVE_URL)
+        headers = email.parser.Parser(_class = http.client.HTTPMessage).parsestr("".join(self.header_lines))
+        body = self.body.getvalue()
+        if code >= 400:
+            self.error = HTTPError(url, code, self.reason, headers, io.BytesIO(body))
+        else:
+            self.response = CachedResponse(url, code, headers, body)
+            self.response.msg = self.reason
+
+    def fail(self, message):
+        self.error = URLError(message)
+
+
+class CurlTransport(object):
+    """
+    HTTP transport sending requests with libcurl's multi interface.
+    At most C{max_connections} connections are opened to a given host;
+    additional requests are queued by libcurl, or multiplexed on opened
+    connections if HTTP/2 is negotiated.
+    """
+
+    _max_redirects = 5
+
+    _select_timeout = 0.01
+
+    def __init__(self, max_connections = 10, http2 = True, timeout = None):
+        """
+        Creates a transport.
+
+        @param max_connections: Maximum number of connections per host.
+        @type max_connections: int
+        @param http2: If True, HTTP/2 is negotiated with HTTPS servers.
+        @type http2: bool
+        @param timeout: Maximum duration of a request in seconds (optional).
+        @type timeout: float
+        """
+
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.timeout = timeout
+        self._multi = pycurl.CurlMulti()
+        self._multi.setopt(pycurl.M_PIPELINING, pycurl.PIPE_MULTIPLEX)
+        self._multi.setopt(pycurl.M_MAX_HOST_CONNECTIONS, max_connections)
+        self._idle_handles = []
+        self._pending = []
+        self._active = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def urlopen(self, request):
+        """
+        Sends a request and waits for its response.
+
+        @param request: The request to send.
+        @type request: C{urllib.request.Request}
+        @return: A file-like response.
+        @raise HTTPError: If response's status is 400 or greater.
+        @raise URLError: If request could not be sent.
+        """
+
+        return self._wait(self._submit([request])[0])
+
+    def urlopen_many(self, requests):
+        """
+        Sends requests concurrently and waits for all responses.
+
+        @param requests: The requests to send.
+        @type requests: list of C{urllib.request.Request}
+        @return: For each request, in the same order, a response or the
+        exception (C{HTTPError} or C{URLError}) raised by the request.
+        @rtype: list
+        """
+
+        results = []
+        for transfer in self._submit(requests):
+            try:
+                results.append(self._wait(transfer))
+            except (HTTPError, URLError) as e:
+                results.append(e)
+        return results
+
+    def close(self):
+        """
+        Stops background thread and closes all connections. Pending requests
+        fail.
+        """
+
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        else:
+            self._cleanup()
+
+    def _submit(self, requests):
+        transfers = [_Transfer(request) for request in requests]
+        with self._condition:
+            if self._closed:
+                raise URLError("Transport is closed")
+            self._pending.extend(transfers)
+            if self._thread is None:
+                self._thread = threading.Thread(target = self._run, name = "curl-transport")
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify_all()
+        return transfers
+
+    def _wait(self, transfer):
+        transfer.done.wait()
+        if transfer.error is not None:
+            raise transfer.error
+        return transfer.response
+
+    def _run(self):
+        try:
+            while True:
+                with self._condition:
+                    while not self._closed and not self._pending and not self._active:
+                        self._condition.wait()
+                    if self._closed:
+                        break
+                    pending = self._pending
+                    self._pending = []
+                for transfer in pending:
+                    self._start(transfer)
+                self._perform()
+        finally:
+            self._cleanup()
+
+    def _start(self, transfer):
+        try:
+            handle = self._configure(transfer)
+        except Exception as e:
+            transfer.fail(str(e))
+            transfer.done.set()
+            return
+        self._multi.add_handle(handle)
+        self._active[handle] = transfer
+
+    def _perform(self):
+        while True:
+            (ret, running) = self._multi.perform()
+            if ret != pycurl.E_CALL_MULTI_PERFORM:
+                break
+
+        while True:
+            (queued, succeeded, failed) = self._multi.info_read()
+            for handle in succeeded:
+                self._done(handle, None)
+            for (handle, errno, message) in failed:
+                self._done(handle, message or ("curl error " + str(errno)))
+            if queued == 0:
+                break
+
+        if self._active:
+            self._multi.select(self._select_timeout)
+
+    def _done(self, handle, error):
+        transfer = self._active.pop(handle)
+        self._multi.remove_handle(handle)
+        if error is None:
+            transfer.finish(handle)
+        else:
+            transfer.fail(error)
+        handle.reset()
+        if len(self._idle_handles) < self.max_connections:
+            self._idle_handles.append(handle)
+        else:
+            handle.close()
+        transfer.done.set()
+
+    def _configure(self, transfer):
+        if self._idle_handles:
+            handle = self._idle_handles.pop()
+        else:
+            handle = pycurl.Curl()
+        request = transfer.request
+        method = request.get_method()
+
+        handle.setopt(pycurl.URL, transfer.url)
+        handle.setopt(pycurl.FOLLOWLOCATION, 1)
+        handle.setopt(pycurl.MAXREDIRS, self._max_redirects)
+        handle.setopt(pycurl.WRITEFUNCTION, transfer.body.write)
+        handle.setopt(pycurl.HEADERFUNCTION, transfer.write_header)
+        handle.setopt(pycurl.PIPEWAIT, 1)
+        if self.http2:
+            handle.setopt(pycurl.HTTP_VERSION, pycurl.CURL_HTTP_VERSION_2TLS)
+        else:
+            handle.setopt(pycurl.HTTP_VERSION, pycurl.CURL_HTTP_VERSION_1_1)
+        if self.timeout:
+            handle.setopt(pycurl.TIMEOUT_MS, int(self.timeout * 1000))
+
+        if method == "HEAD":
+            handle.setopt(pycurl.NOBODY, 1)
+        elif request.data is not None or method in ("POST", "PUT", "PATCH"):
+            handle.setopt(pycurl.POSTFIELDS, request.data or b"")
+            handle.setopt(pycurl.CUSTOMREQUEST, method)
+        elif method != "GET":
+            handle.setopt(pycurl.CUSTOMREQUEST, method)
+
+        # libcurl computes Content-Length itself, "Expect:" disables the
+        # 100-continue round trip.
+        headers = ["Expect:"]
+        for (name, value) in request.header_items():
+            if name.lower() != "content-length":
+                headers.append(name + ": " + str(value))
+        handle.setopt(pycurl.HTTPHEADER, headers)
+        return handle
+
+    def _cleanup(self):
+        with self._condition:
+            transfers = list(self._active.values()) + self._pending
+            self._pending = []
+        for handle in list(self._active.keys()):
+            self._multi.remove_handle(handle)
+            handle.close()
+        self._active = {}
+        for transfer in transfers:
+            transfer.fail("Transport is closed")
+            transfer.done.set()
+        for handle in self._idle_handles:
+            handle.close()
+        self._idle_handles = []
+        self._multi.close()
@@ -14,3 +14,8 @@ class ApiException(Exception):
 
     def __str__(self):
         return "Error ({}): {}".format(self.code, self.message)
+
+class CircuitOpenException(ApiException):
+    def __init__(self, endpoint):
+        super(CircuitOpenException, self).__init__("Too many failures, requests to " + endpoint + " are suspended", 0)
+        self.endpoint = endpoint
@@ -0,0 +1,224 @@
+# coding: utf-8
+"""
+Provides request instrumentation helpers. An
+L{HttpClient<comodit_client.rest.client.HttpClient>} notifies its listeners
+with a L{RequestEvent} once a response has been entirely read (or a request
+failed). L{TimingCollector} is a listener computing latency statistics per
+endpoint.
+"""
+
+from __future__ import print_function
+
+from future import standard_library
+standard_library.install_aliases()
+
+# Following imports MUST come after call to install_aliases
+from builtins import object
+import threading
+import time
+import urllib.parse
+
+_COLLECTIONS = frozenset(["organizations", "environments", "hosts", "applications",
+                          "distributions", "platforms", "settings", "parameters",
+                          "files", "changes", "jobs", "orchestrations", "notifications",
+                          "groups", "flavors", "applicationkeys", "alerts", "packages",
+                          "services", "compliance", "audit", "users"])
+
+
+def url_template(url, endpoint = None):
+    """
+    Provides the template of an URL, i.e. its path where entity identifiers
+    are replaced by C{{id}} (e.g. C{organizations/{id}/environments/{id}/hosts/}).
+    Query string is dropped.
+
+    @param url: A URL.
+    @type url: string
+    @param endpoint: ComodIT API URL, removed from the template if given.
+    @type endpoint: string
+    @rtype: string
+    """
+
+    if endpoint and url.startswith(endpoint):
+        path = url[len(endpoint):].split("?", 1)[0]
+    else:
+        path = urllib.parse.urlsplit(url).path
+    segments = path.lstrip("/").split("/")
+    for i in range(1, len(segments)):
+        segment = segments[i]
+        if segment and not segment.startswith("_") and \
+           (segments[i - 1] in _COLLECTIONS or segment.isdigit()):
+            segments[i] = "{id}"
+    return "/".join(segments)
+
+
+class RequestEvent(object):
+    """
+    Describes a request sent by an HTTP client.
+
+    @ivar method: HTTP method.
+    @ivar url: Requested URL.
+    @ivar template: URL template (see L{url_template}).
+    @ivar status: Status code of the response, 0 if no response was received.
+    @ivar bytes_out: Size of request's body.
+    @ivar bytes_in: Size of response's body as received (i.e. compressed).
+    @ivar time_to_first_byte: Seconds elapsed until response's headers were
+    received.
+    @ivar total_time: Seconds elapsed until response's body was entirely read.
+    @ivar error: Error message if request failed, None otherwise.
+    """
+
+    def __init__(self, method, url, template, bytes_out):
+        self.method = method
+        self.url = url
+        self.template = template
+        self.status = 0
+        self.bytes_out = bytes_out
+        self.bytes_in = 0
+        self.time_to_first_byte = None
+        self.total_time = None
+        self.error = None
+
+    def __repr__(self):
+        return "<RequestEvent %s %s %d %.3fs>" % (self.method, self.url, self.status, self.total_time or 0)
+
+
+class InstrumentedResponse(object):
+    """
+    File-like response counting the bytes read from a wrapped response. The
+    event is completed and given to the callback when the body has been
+    entirely read or the response is closed.
+    """
+
+    def __init__(self, response, event, start, callback):
+        self._response = response
+        self._event = event
+        self._start = start
+        self._callback = callback
+        self._notified = False
+        self.code = response.getcode()
+        self.status = self.code
+        self.headers = response.info()
+        self.url = response.geturl() if hasattr(response, "geturl") else None
+        event.status = self.code
+        event.time_to_first_byte = time.time() - start
+        if self.code in (204, 304) or self.headers.get("Content-Length") == "0":
+            self._notify()
+
+    def read(self, amt = None):
+        if amt is None:
+            data = self._response.read()
+        else:
+            data = self._response.read(amt)
+        self._count(data, amt is None or amt < 0)
+        return data
+
+    def readline(self, limit = -1):
+        data = self._response.readline(limit)
+        self._count(data, False)
+        return data
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def getheader(self, name, default = None):
+        return self.headers.get(name, default)
+
+    def close(self):
+        self._response.close()
+        self._notify()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _count(self, data, exhausted):
+        self._event.bytes_in += len(data)
+        if exhausted or not data:
+            self._notify()
+
+    def _notify(self):
+        if self._notified:
+            return
+        self._notified = True
+        self._event.total_time = time.time() - self._start
+        self._callback(self._event)
+
+
+class TimingCollector(object):
+    """
+    Request listener recording request durations per endpoint, i.e. per
+    method and URL template.
+    """
+
+    def __init__(self):
+        self._durations = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self._durations.setdefault((event.method, event.template), []).append(event.total_time)
+
+    def summary(self):
+        """
+        Provides latency statistics per endpoint, slowest endpoints (by
+        cumulated time) first.
+
+        @return: A list of dicts with keys C{method}, C{template}, C{count},
+        C{p50}, C{p95}, C{max} and C{total} (durations in seconds).
+        @rtype: list of dicts
+        """
+
+        rows = []
+        with self._lock:
+            items = [(key, sorted(durations)) for (key, durations) in self._durations.items()]
+        for ((method, template), durations) in items:
+            rows.append({"method": method,
+                         "template": template,
+                         "count": len(durations),
+                         "p50": _percentile(durations, 50),
+                         "p95": _percentile(durations, 95),
+                         "max": durations[-1],
+                         "total": sum(durations)})
+        rows.sort(key = lambda row: row["total"], reverse = True)
+        return rows
+
+    def print_summary(self, output):
+        """
+        Prints a latency table.
+
+        @param output: A text file (e.g. C{sys.stderr}).
+        """
+
+        rows = self.summary()
+        if not rows:
+            return
+        print("%-7s %6s %9s %9s %9s  %s" % ("METHOD", "COUNT", "P50 (ms)", "P95 (ms)", "MAX (ms)", "ENDPOINT"), file = output)
+        for row in rows:
+            print("%-7s %6d %9.1f %9.1f %9.1f  %s" % (row["method"], row["count"], row["p50"] * 1000,
+                                                      row["p95"] * 1000, row["max"] * 1000, row["template"]), file = output)
+        print("%-7s %6d %29.1f  (total)" % ("", sum(row["count"] for row in rows),
+                                             sum(row["total"] for row in rows) * 1000), file = output)
+
+
+def _percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile of a sorted, non-empty list.
+    """
+
+    rank = int(-(-percent * len(sorted_values) // 100))
+    return sorted_values[max(rank, 1) - 1]
@@ -0,0 +1,183 @@
+# coding: utf-8
+"""
+Provides the rate limiter (L{RateLimiter}) optionally used by
+L{HttpClient<comodit_client.rest.client.HttpClient>} in order to bound the
+load put on ComodIT server: the number of requests sent per second is limited
+by a token bucket (see L{TokenBucket}) and the number of requests waiting for
+a response is limited by a semaphore. Limits may be set for all requests and
+per HTTP method.
+"""
+
+from builtins import object
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket. Tokens are added at a rate of C{rate} tokens
+    per second, at most C{burst} tokens are kept. Each request takes one
+    token; when the bucket is empty, the token is reserved and the caller
+    waits until it is available. Reserving tokens ensures callers are served
+    in order without spinning.
+    """
+
+    def __init__(self, rate, burst = None):
+        """
+        Creates a token bucket.
+
+        @param rate: Number of tokens added per second.
+        @type rate: float
+        @param burst: Maximum number of tokens, defaults to C{max(1, rate)}.
+        @type burst: float
+        """
+
+        if rate <= 0:
+            raise ValueError("Rate must be greater than 0")
+        self.rate = float(rate)
+        self.burst = float(burst if burst else max(1, rate))
+        self._tokens = self.burst
+        self._last = time.time()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes a token.
+
+        @return: Number of seconds to wait before the token is available.
+        @rtype: float
+        """
+
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+
+class _Limit(object):
+    def __init__(self, rate, burst, max_in_flight):
+        if rate:
+            self.bucket = TokenBucket(rate, burst)
+        else:
+            self.bucket = None
+        if max_in_flight:
+            self.semaphore = threading.BoundedSemaphore(max_in_flight)
+        else:
+            self.semaphore = None
+
+
+class RateLimiter(object):
+    """
+    Limits the rate and concurrency of the requests sent by one or several
+    HTTP clients. A request must satisfy both the global limits and the
+    limits of its method (see L{set_method_limit}).
+
+    Counters are available through L{stats}.
+    """
+
+    def __init__(self, rate = None, burst = None, max_in_flight = None):
+        """
+        Creates a rate limiter.
+
+        @param rate: Maximum number of requests per second (optional).
+        @type rate: float
+        @param burst: Number of requests that may be sent at once after an
+        idle period, defaults to C{max(1, rate)}.
+        @type burst: float
+        @param max_in_flight: Maximum number of requests waiting for a
+        response at the same time (optional).
+        @type max_in_flight: int
+        """
+
+        self._global = _Limit(rate, burst, max_in_flight)
+        self._methods = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {"requests": 0,
+                       "delayed": 0,
+                       "wait_time": 0.0,
+                       "max_in_flight": 0}
+
+    def set_method_limit(self, method, rate = None, burst = None, max_in_flight = None):
+        """
+        Sets the limits applied to the requests with given method, in
+        addition to global limits.
+
+        @param method: An HTTP method (e.g. C{"POST"}).
+        @type method: string
+        @param rate: Maximum number of requests per second (optional).
+        @type rate: float
+        @param burst: Number of requests that may be sent at once.
+        @type burst: float
+        @param max_in_flight: Maximum number of concurrent requests (optional).
+        @type max_in_flight: int
+        """
+
+        self._methods[method.upper()] = _Limit(rate, burst, max_in_flight)
+
+    @contextmanager
+    def acquire(self, method):
+        """
+        Context manager blocking until a request with given method may be sent
+        and keeping the request counted as in flight until exit.
+
+        @param method: The HTTP method of the request.
+        @type method: string
+        """
+
+        limits = [self._global]
+        if method.upper() in self._methods:
+            limits.append(self._methods[method.upper()])
+
+        start = time.time()
+        delay = 0
+        for limit in limits:
+            if limit.bucket is not None:
+                delay = max(delay, limit.bucket.reserve())
+        if delay > 0:
+            self._sleep(delay)
+
+        acquired = []
+        try:
+            for limit in limits:
+                if limit.semaphore is not None:
+                    limit.semaphore.acquire()
+                    acquired.append(limit.semaphore)
+            self._enter(time.time() - start)
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+
+    def stats(self):
+        """
+        Provides counters: number of requests, requests that had to wait,
+        cumulated waiting time (in seconds) and maximum number of concurrent
+        requests observed.
+
+        @rtype: dict
+        """
+
+        with self._lock:
+            return dict(self._stats)
+
+    def _enter(self, waited):
+        with self._lock:
+            self._stats["requests"] += 1
+            if waited > 0.001:
+                self._stats["delayed"] += 1
+                self._stats["wait_time"] += waited
+            self._in_flight += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._in_flight)
+
+    def _sleep(self, delay):
+        time.sleep(delay)
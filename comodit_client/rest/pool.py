@@ -0,0 +1,346 @@
+# coding: utf-8
+"""
+Provides a bounded pool of persistent HTTP/1.1 connections (L{ConnectionPool})
+used by L{HttpClient<comodit_client.rest.client.HttpClient>} to avoid paying
+a TCP (and TLS) handshake for each request sent to ComodIT server.
+"""
+
+from future import standard_library
+standard_library.install_aliases()
+
+# Following imports MUST come after call to install_aliases
+from builtins import object
+import http.client
+import select
+import socket
+import ssl
+import sys
+import threading
+import time
+import urllib.request, urllib.parse, urllib.error
+from collections import deque
+from urllib.error import HTTPError
+
+
+class PooledResponse(object):
+    """
+    Response returned by L{ConnectionPool.urlopen}. It behaves like the
+    file-like object returned by C{urllib.request.urlopen}. The underlying
+    connection is given back to the pool as soon as response's body has been
+    entirely read or the response is closed.
+    """
+
+    def __init__(self, pool, key, conn, response, url):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self._url = url
+        self.code = response.status
+        self.status = response.status
+        self.msg = response.reason
+        self.headers = response.msg
+        self._release_if_done()
+
+    def read(self, amt = None):
+        if self._response is None:
+            return b""
+        if amt is None:
+            data = self._response.read()
+        else:
+            data = self._response.read(amt)
+        self._release_if_done()
+        return data
+
+    def readline(self, limit = -1):
+        if self._response is None:
+            return b""
+        data = self._response.readline(limit)
+        self._release_if_done()
+        return data
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self._url
+
+    def info(self):
+        return self.headers
+
+    def getheader(self, name, default = None):
+        return self.headers.get(name, default)
+
+    def close(self):
+        if self._response is None:
+            return
+        reusable = self._response.isclosed()
+        self._response.close()
+        self._pool._release(self._key, self._conn, reusable)
+        self._response = None
+        self._conn = None
+
+    def _release_if_done(self):
+        if self._response is not None and self._response.isclosed():
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool(object):
+    """
+    Thread-safe pool of persistent HTTP/1.1 connections. Connections are
+    grouped by endpoint (scheme, host and port). At most C{max_size}
+    connections are opened at a time for a given endpoint; a thread asking
+    for a connection while all of them are in use waits until one is given
+    back, at most C{acquire_timeout} seconds. Connections that stayed idle
+    for more than C{idle_timeout} seconds, or that were closed by the server,
+    are closed instead of being reused.
+
+    If a reused connection turns out to be closed by the server while a
+    request is sent, the request is sent again on another connection only if
+    it is idempotent (see L{resend_methods}) and does not target an action
+    (ComodIT actions are PUT requests on URLs whose last segment starts with
+    an underscore); otherwise, a C{URLError} is raised since the server may
+    have processed the request.
+
+    Requests that must go through a proxy (see C{urllib.request.getproxies})
+    are handed over to C{urllib.request.urlopen}.
+    """
+
+    _max_redirects = 5
+
+    resend_methods = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+    _stale_errors = (http.client.RemoteDisconnected,
+                     http.client.BadStatusLine,
+                     ConnectionResetError,
+                     ConnectionAbortedError,
+                     BrokenPipeError)
+
+    def __init__(self, max_size = 4, idle_timeout = 60, timeout = None, ssl_context = None,
+                 acquire_timeout = None):
+        """
+        Creates a connection pool.
+
+        @param max_size: Maximum number of connections per endpoint.
+        @type max_size: int
+        @param idle_timeout: Number of seconds after which an idle connection
+        is not reused anymore. 0 or None means that idle connections never
+        expire.
+        @type idle_timeout: float
+        @param timeout: Socket time-out in seconds (None means the global
+        default time-out).
+        @type timeout: float
+        @param ssl_context: SSL context used for HTTPS connections.
+        @type ssl_context: C{ssl.SSLContext}
+        @param acquire_timeout: Number of seconds a thread waits for a
+        connection when all connections of an endpoint are in use. None
+        means the socket time-out or, if there is none, 60 seconds.
+        @type acquire_timeout: float
+        """
+
+        if max_size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._ssl_context = ssl_context
+        if acquire_timeout is None:
+            acquire_timeout = 60 if timeout is None else timeout
+        self.acquire_timeout = acquire_timeout
+        self._lock = threading.Condition()
+        self._idle = {}
+        self._in_use = {}
+        self._closed = False
+
+    def urlopen(self, request):
+        """
+        Sends given request on a pooled connection and returns the response.
+
+        @param request: The request to send.
+        @type request: C{urllib.request.Request}
+        @return: A file-like response.
+        @rtype: L{PooledResponse}
+
+        @raise HTTPError: If server answered with an error status code.
+        @raise URLError: If the request could not be sent, e.g. because no
+        connection was given back to the pool in time.
+        """
+
+        if self._is_proxied(request):
+            return urllib.request.urlopen(request)
+
+        method = request.get_method()
+        url = request.get_full_url()
+        data = request.data
+        headers = dict(request.header_items())
+        for i in range(self._max_redirects + 1):
+            response = self._send(method, url, data, headers)
+            location = response.getheader("Location")
+            if response.code not in (301, 302, 303, 307, 308) or not location:
+                break
+            response.read()
+            url = urllib.parse.urljoin(url, location)
+            if response.code == 303 or (response.code in (301, 302) and method == "POST"):
+                method = "GET"
+                data = None
+                for h in ("Content-length", "Content-type"):
+                    headers.pop(h, None)
+
+        if response.code >= 400:
+            raise HTTPError(url, response.code, response.msg, response.headers, response)
+        return response
+
+    def free_slots(self, url):
+        """
+        Provides the number of connections to the endpoint of given URL that
+        may be used without waiting.
+
+        @param url: A URL.
+        @type url: string
+        @rtype: int
+        """
+
+        parsed = urllib.parse.urlsplit(url)
+        key = (parsed.scheme, parsed.hostname, parsed.port)
+        with self._lock:
+            return self.max_size - self._in_use.get(key, 0)
+
+    def close(self):
+        """
+        Closes all idle connections. Connections currently in use are closed
+        when given back to the pool.
+        """
+
+        with self._lock:
+            self._closed = True
+            for idle in self._idle.values():
+                while idle:
+                    idle.popleft()[0].close()
+            self._idle = {}
+            self._lock.notify_all()
+
+    def _send(self, method, url, data, headers):
+        parsed = urllib.parse.urlsplit(url)
+        key = (parsed.scheme, parsed.hostname, parsed.port)
+        selector = urllib.parse.urlunsplit(("", "", parsed.path or "/", parsed.query, ""))
+
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request(method, selector, body = data, headers = headers)
+                response = conn.getresponse()
+            except self._stale_errors:
+                self._release(key, conn, False)
+                if reused and self._can_resend(method, parsed.path):
+                    # Server closed an idle keep-alive connection, try again
+                    # with another one.
+                    continue
+                raise urllib.error.URLError(sys.exc_info()[1])
+            except OSError as err:
+                # Same as urllib, low-level errors are wrapped in URLError
+                self._release(key, conn, False)
+                raise urllib.error.URLError(err)
+            except Exception:
+                self._release(key, conn, False)
+                raise
+
+            # If server asked to close the connection, http.client already
+            # dropped its socket and the connection will not be pooled again.
+            return PooledResponse(self, key, conn, response, url)
+
+    def _acquire(self, key):
+        deadline = time.time() + self.acquire_timeout
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise urllib.error.URLError("Connection pool is closed")
+                idle = self._idle.setdefault(key, deque())
+                now = time.time()
+                while idle:
+                    conn, last_used = idle.pop()
+                    if self._is_expired(conn, last_used, now) or self._is_dropped(conn):
+                        conn.close()
+                        continue
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    return (conn, True)
+                if self._in_use.get(key, 0) < self.max_size:
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise urllib.error.URLError("Connection pool exhausted")
+                self._lock.wait(remaining)
+
+        try:
+            return (self._new_connection(key), False)
+        except Exception:
+            self._release(key, None, False)
+            raise
+
+    def _release(self, key, conn, reusable):
+        with self._lock:
+            self._in_use[key] = self._in_use.get(key, 1) - 1
+            if conn is not None:
+                if reusable and not self._closed and conn.sock is not None:
+                    self._idle.setdefault(key, deque()).append((conn, time.time()))
+                else:
+                    conn.close()
+            self._lock.notify()
+
+    def _is_expired(self, conn, last_used, now):
+        if conn.sock is None:
+            return True
+        return bool(self.idle_timeout) and (now - last_used) > self.idle_timeout
+
+    def _is_dropped(self, conn):
+        # An idle connection is readable only if server closed it (or sent
+        # unexpected data): it must not be used to send a request.
+        try:
+            return bool(select.select([conn.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def _can_resend(self, method, path):
+        if method not in self.resend_methods:
+            return False
+        return not path.rstrip("/").rsplit("/", 1)[-1].startswith("_")
+
+    def _new_connection(self, key):
+        (scheme, host, port) = key
+        if scheme == "https":
+            context = self._ssl_context or ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout = self._get_timeout(), context = context)
+        elif scheme == "http":
+            return http.client.HTTPConnection(host, port, timeout = self._get_timeout())
+        else:
+            raise urllib.error.URLError("Unsupported scheme " + str(scheme))
+
+    def _get_timeout(self):
+        if self.timeout is None:
+            return socket._GLOBAL_DEFAULT_TIMEOUT
+        return self.timeout
+
+    def _is_proxied(self, request):
+        proxies = urllib.request.getproxies()
+        if request.type not in proxies:
+            return False
+        return not urllib.request.proxy_bypass(request.host)
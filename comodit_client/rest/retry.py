@@ -0,0 +1,293 @@
+# coding: utf-8
+"""
+Provides the retry policy (L{RetryPolicy}) optionally used by
+L{HttpClient<comodit_client.rest.client.HttpClient>}: idempotent requests
+failing with a transient error are sent again after a jittered exponential
+backoff, and a per-endpoint L{CircuitBreaker} rejects requests to an endpoint
+that keeps failing.
+"""
+
+from future import standard_library
+standard_library.install_aliases()
+
+# Following imports MUST come after call to install_aliases
+from builtins import object
+import email.utils
+import http.client
+import random
+import threading
+import time
+import urllib.parse
+from urllib.error import HTTPError, URLError
+
+from comodit_client.rest.exceptions import CircuitOpenException
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker of a single endpoint. After C{failure_threshold}
+    consecutive failures, the circuit is I{open}: requests are rejected
+    without being sent for C{reset_timeout} seconds. The circuit then becomes
+    I{half-open}, a single trial request is let through. If it succeeds,
+    the circuit is closed again, otherwise it is re-opened.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._trial_pending = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Tells if a request may be sent.
+
+        @rtype: bool
+        """
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.time() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_pending = False
+            if self._trial_pending:
+                return False
+            self._trial_pending = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_pending = False
+
+    def record_failure(self):
+        """
+        Records a failure.
+
+        @return: True if this failure opened the circuit.
+        @rtype: bool
+        """
+
+        with self._lock:
+            self._failures += 1
+            self._trial_pending = False
+            if self.state == self.HALF_OPEN or \
+               (self.state == self.CLOSED and self._failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.time()
+                return True
+            return False
+
+
+class RetryPolicy(object):
+    """
+    Retry policy of an HTTP client. A request is retried if:
+      - its method is idempotent (see L{retry_methods}) and it does not
+        target an action (ComodIT actions are PUT requests on URLs whose
+        last segment starts with an underscore, e.g. C{.../instance/_start}),
+      - it failed with a connection error or a status code in
+        L{retry_statuses},
+      - less than C{max_retries} retries were already made.
+
+    Delay before retry I{n} (starting at 0) is a random value between 0 and
+    C{min(max_backoff, backoff_factor * 2^n)}. If the server sent a
+    C{Retry-After} header, its value is used instead; the request is not
+    retried if this value exceeds C{max_backoff}.
+
+    If C{failure_threshold} is greater than 0, a L{CircuitBreaker} is
+    associated to each endpoint.
+
+    Counters are available through L{stats}.
+    """
+
+    retry_methods = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+    retry_statuses = frozenset([429, 502, 503, 504])
+
+    _connection_errors = (URLError, http.client.HTTPException, OSError)
+
+    def __init__(self, max_retries = 3, backoff_factor = 0.5, max_backoff = 30,
+                 failure_threshold = 0, reset_timeout = 30):
+        """
+        Creates a retry policy.
+
+        @param max_retries: Maximum number of retries of a request.
+        @type max_retries: int
+        @param backoff_factor: Base delay in seconds.
+        @type backoff_factor: float
+        @param max_backoff: Maximum delay in seconds between two attempts.
+        @type max_backoff: float
+        @param failure_threshold: Number of consecutive failures opening
+        the circuit of an endpoint. 0 disables circuit breakers.
+        @type failure_threshold: int
+        @param reset_timeout: Number of seconds a circuit stays open.
+        @type reset_timeout: float
+        """
+
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0,
+                       "attempts": 0,
+                       "retries": 0,
+                       "failures": 0,
+                       "rejected": 0,
+                       "circuits_opened": 0,
+                       "total_time": 0.0,
+                       "max_time": 0.0}
+
+    def send(self, request, opener):
+        """
+        Sends given request using given opener, retrying it according to
+        this policy.
+
+        @param request: The request to send.
+        @type request: C{urllib.request.Request}
+        @param opener: A function sending a request and returning the
+        response or raising C{HTTPError}.
+        @type opener: function
+        @return: The response.
+
+        @raise CircuitOpenException: If the circuit of request's endpoint is
+        open.
+        """
+
+        method = request.get_method()
+        url = request.get_full_url()
+        breaker = self.get_breaker(url)
+        self._count("requests")
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow():
+                self._count("rejected")
+                raise CircuitOpenException(self._endpoint(url))
+
+            self._count("attempts")
+            start = time.time()
+            try:
+                response = opener(request)
+            except HTTPError as err:
+                self._record_time(time.time() - start)
+                if err.code not in self.retry_statuses:
+                    self._record(breaker, True)
+                    raise
+                self._record(breaker, False)
+                delay = self._get_delay(attempt, err.headers)
+                if not self._can_retry(method, url, attempt) or delay is None:
+                    raise
+                # Release connection before waiting
+                err.read()
+            except self._connection_errors:
+                self._record_time(time.time() - start)
+                self._record(breaker, False)
+                if not self._can_retry(method, url, attempt):
+                    raise
+                delay = self._get_delay(attempt, None)
+            else:
+                self._record_time(time.time() - start)
+                self._record(breaker, True)
+                return response
+
+            self._count("retries")
+            self._sleep(delay)
+            attempt += 1
+
+    def get_breaker(self, url):
+        """
+        Provides the circuit breaker associated to the endpoint of given URL.
+
+        @rtype: L{CircuitBreaker}
+        @return: A circuit breaker or None if circuit breakers are disabled.
+        """
+
+        if not self.failure_threshold:
+            return None
+        endpoint = self._endpoint(url)
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def stats(self):
+        """
+        Provides counters: number of requests, attempts (first tries and
+        retries), retries, failed attempts, requests rejected by an open
+        circuit, circuit openings, cumulated and maximum time spent waiting
+        for a response (in seconds).
+
+        @rtype: dict
+        """
+
+        with self._lock:
+            return dict(self._stats)
+
+    def _can_retry(self, method, url, attempt):
+        if attempt >= self.max_retries or method not in self.retry_methods:
+            return False
+        path = urllib.parse.urlsplit(url).path.rstrip("/")
+        return not path.rsplit("/", 1)[-1].startswith("_")
+
+    def _get_delay(self, attempt, headers):
+        retry_after = self._parse_retry_after(headers)
+        if retry_after is not None:
+            if retry_after > self.max_backoff:
+                return None
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    def _parse_retry_after(self, headers):
+        if headers is None:
+            return None
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = email.utils.parsedate_tz(value)
+            return max(0, email.utils.mktime_tz(date) - time.time())
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    def _record(self, breaker, success):
+        if not success:
+            self._count("failures")
+        if breaker is None:
+            return
+        if success:
+            breaker.record_success()
+        elif breaker.record_failure():
+            self._count("circuits_opened")
+
+    def _record_time(self, elapsed):
+        with self._lock:
+            self._stats["total_time"] += elapsed
+            self._stats["max_time"] = max(self._stats["max_time"], elapsed)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _endpoint(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        return parsed.scheme + "://" + parsed.netloc
+
+    def _sleep(self, delay):
+        time.sleep(delay)
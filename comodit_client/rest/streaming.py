@@ -0,0 +1,153 @@
+# coding: utf-8
+"""
+Provides an incremental JSON decoder (L{JsonItemStream}) yielding the items of
+a collection listing while its body is being received. Only one item at a time
+is kept in memory, the memory used to process a listing therefore does not
+depend on its size.
+"""
+
+from builtins import object
+import codecs
+import json
+from collections import OrderedDict
+
+_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACES = " \t\n\r"
+
+
+class JsonItemStream(object):
+    """
+    Iterable over the elements of an array in a JSON document read from a
+    file-like response. The array is either the document itself or the value
+    of a given key in a top-level object (C{items} for ComodIT listings).
+    Other top-level fields (e.g. C{count}) are available in L{fields} once they
+    have been read.
+    """
+
+    def __init__(self, response, key = "items", object_pairs_hook = OrderedDict,
+                 chunk_size = _CHUNK_SIZE):
+        """
+        Creates an item stream.
+
+        @param response: A file-like response.
+        @param key: Key of the top-level field containing the array.
+        @type key: string
+        @param object_pairs_hook: Hook used to build JSON objects (see
+        C{json.loads}).
+        @param chunk_size: Number of bytes read from response at once.
+        @type chunk_size: int
+        """
+
+        self.fields = OrderedDict()
+        self._response = response
+        self._key = key
+        self._json_decoder = json.JSONDecoder(object_pairs_hook = object_pairs_hook)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")(errors = "ignore")
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        first = self._peek()
+        if first == "[":
+            self._pos += 1
+            for item in self._array():
+                yield item
+            return
+
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == self._key and self._peek() == "[":
+                self._pos += 1
+                for item in self._array():
+                    yield item
+            else:
+                self.fields[key] = self._value()
+            c = self._peek()
+            self._pos += 1
+            if c == "}":
+                return
+            elif c != ",":
+                self._error("',' or '}'")
+
+    def _array(self):
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            c = self._peek()
+            self._pos += 1
+            if c == "]":
+                return
+            elif c != ",":
+                self._error("',' or ']'")
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                (obj, end) = self._json_decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                # Value is incomplete (or invalid, which is detected at end of
+                # input): read at least as much data as currently buffered
+                # in order to avoid parsing the same prefix too many times.
+                if not self._fill(len(self._buf) - self._pos):
+                    raise
+                continue
+            if end == len(self._buf) and not self._eof and self._fill(1):
+                # Numbers may be truncated at the end of the buffer
+                continue
+            self._pos = end
+            self._compact()
+            return obj
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACES:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(1):
+                return ""
+
+    def _expect(self, c):
+        if self._peek() != c:
+            self._error("'" + c + "'")
+        self._pos += 1
+
+    def _error(self, expected):
+        raise ValueError("Expecting " + expected + " at character " + str(self._pos))
+
+    def _fill(self, min_size):
+        """
+        Reads at least C{min_size} characters from the response, unless end of
+        response is reached.
+
+        @return: False if no data could be read.
+        @rtype: bool
+        """
+
+        read = 0
+        while read < min_size and not self._eof:
+            data = self._response.read(self._chunk_size)
+            if not data:
+                self._eof = True
+                text = self._text_decoder.decode(b"", True)
+            else:
+                text = self._text_decoder.decode(data)
+            self._buf += text
+            read += len(text)
+        return read > 0
+
+    def _compact(self):
+        if self._pos >= self._chunk_size:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
@@ -5,8 +5,9 @@ JsonWrapper class module.
 from __future__ import print_function
 
 from builtins import object
-import json, os
-from collections import OrderedDict
+import copy
+import os
+from comodit_client.util.jsoncodec import get_default_codec
 
 class JsonWrapper(object):
     """
@@ -20,8 +21,24 @@ class JsonWrapper(object):
     the state of an object that has 2 members, field1 and field2. Value of
     field1 is a list of strings and value of field2 a string. Note that the
     value of field2 may represent an Integer, a Boolean, etc.
+
+    Modified fields are tracked (see L{get_changes}): a field is modified when
+    it is set or deleted. Lists and dicts handed out may be altered in place:
+    a copy of their value is kept when they are first handed out and a field
+    is also modified if its value differs from this copy. Likewise, top-level
+    fields of the state handed out by L{get_json} are compared to the ones it
+    had. Replacing the whole state with L{set_json} marks it as modified.
+
+    Lists of objects built by L{_get_list_field} are memoized until the
+    field is modified.
     """
 
+    # _dirty holds the names of fields modified by setters, None if the whole
+    # state was replaced. _copies holds the copies of handed out lists and
+    # dicts, _fields the top-level fields of the state handed out by get_json
+    # (None if it was not). _lists holds memoized object lists.
+    __slots__ = ("_json_data", "_dirty", "_copies", "_fields", "_lists")
+
     def __init__(self, json_data = None):
         """
         Instantiates the class.
@@ -34,6 +51,10 @@ class JsonWrapper(object):
             self._json_data = {}
         else:
             self._json_data = json_data
+        self._dirty = set()
+        self._copies = {}
+        self._fields = None
+        self._lists = None
 
     def _get_field(self, field, factory = None):
         """
@@ -46,10 +67,12 @@ class JsonWrapper(object):
         @rtype: String, dict or list
         """
 
+        value = self._json_data.get(field, None)
+        self._hand_out(field, value)
         if factory:
-            return factory(self._json_data.get(field, None))
+            return factory(value)
         else:
-            return self._json_data.get(field, None)
+            return value
 
     def _set_field(self, field, value):
         """
@@ -65,10 +88,74 @@ class JsonWrapper(object):
             self._json_data[field] = value.get_json()
         else:
             self._json_data[field] = value
+        self._mark_dirty(field)
 
     def _del_field(self, field):
         if field in self._json_data:
             del self._json_data[field]
+            self._mark_dirty(field)
+
+    def _hand_out(self, field, value):
+        """
+        Keeps a copy of the value of given field if it is a list or a dict,
+        unless the field is already known to be modified.
+
+        @param field: A field name
+        @type field: String
+        @param value: Field's value
+        @type value: String, dict or list
+        """
+
+        if isinstance(value, (dict, list)) and self._dirty is not None and \
+           field not in self._dirty and field not in self._copies:
+            self._copies[field] = copy.deepcopy(value)
+
+    def _mark_dirty(self, field):
+        """
+        Marks given field as modified and forgets the objects memoized for
+        it.
+
+        @param field: A field name
+        @type field: String
+        """
+
+        if self._dirty is not None:
+            self._dirty.add(field)
+        self._copies.pop(field, None)
+        if self._lists is not None:
+            self._lists.pop(field, None)
+
+    def _mark_clean(self):
+        """
+        Marks this object's state as unmodified, typically after it was
+        fetched from or sent to the server.
+        """
+
+        self._dirty = set()
+        self._copies = {}
+        self._fields = None
+
+    def get_changes(self):
+        """
+        Provides the fields modified since this object's state was last
+        marked unmodified. Deleted fields are mapped to None.
+
+        @return: The quasi-JSON representation of modified fields, or None if
+        the whole state may have been modified.
+        @rtype: dict
+        """
+
+        if self._dirty is None:
+            return None
+        fields = set(self._dirty)
+        for (field, value) in self._copies.items():
+            if self._json_data.get(field, None) != value:
+                fields.add(field)
+        if self._fields is not None:
+            for field in set(self._fields) | set(self._json_data):
+                if self._json_data.get(field, None) is not self._fields.get(field, None):
+                    fields.add(field)
+        return dict((field, self._json_data.get(field, None)) for field in fields)
 
     def _get_list_field(self, field, factory = None):
         """
@@ -76,7 +163,9 @@ class JsonWrapper(object):
         list is instantiated by a factory using its corresponding quasi-JSON
         representation. The factory must at least implement the method new_object
         which takes a quasi-JSON representation as argument and returns a
-        Python object.
+        Python object. Objects are only instantiated again if the field was
+        modified in the meantime; a new list is however returned at each
+        call.
 
         @param field: A field name
         @type field: String
@@ -86,15 +175,26 @@ class JsonWrapper(object):
         @return: A list of objects
         @rtype: list of object
         """
-        object_list = []
-        if(field in self._json_data):
-            json_list = self._json_data[field]
-            for j in json_list:
-                if factory:
-                    object_list.append(factory(j))
-                else:
-                    object_list.append(j)
-        return object_list
+        if(field not in self._json_data):
+            return []
+
+        # Objects wrap the items of the list, which may then be altered
+        json_list = self._json_data[field]
+        self._hand_out(field, json_list)
+        if not factory:
+            return list(json_list)
+
+        # Factories are generally lambdas created at each call, their code
+        # identifies them.
+        key = getattr(factory, "__code__", factory)
+        if self._lists is None:
+            self._lists = {}
+        memo = self._lists.get(field)
+        if memo is None or memo[0] is not key or memo[1] is not json_list or \
+           memo[2] != len(json_list):
+            memo = (key, json_list, len(json_list), [factory(j) for j in json_list])
+            self._lists[field] = memo
+        return list(memo[3])
 
     def _add_to_list_field(self, field, value):
         """
@@ -106,6 +206,7 @@ class JsonWrapper(object):
         @param value: A JsonWrapper instance or a String instance
         @type value: L{JsonWrapper} or String
         """
+        self._mark_dirty(field)
         if(field not in self._json_data):
             self._json_data[field] = []
         if(isinstance(value, JsonWrapper)):
@@ -130,6 +231,7 @@ class JsonWrapper(object):
             else:
                 json_list.append(o)
         self._json_data[field] = json_list
+        self._mark_dirty(field)
 
     def set_json(self, json_data):
         """
@@ -141,6 +243,10 @@ class JsonWrapper(object):
         if not isinstance(json_data, dict):
             raise Exception("Wrong type '" + type(json_data).__name__ + "'")
         self._json_data = json_data
+        self._dirty = None
+        self._copies = {}
+        self._fields = None
+        self._lists = None
 
     def get_json(self):
         """
@@ -149,6 +255,11 @@ class JsonWrapper(object):
         @return: Quasi-representation of this object's state
         @rtype: dict
         """
+        if self._dirty is not None and self._fields is None and isinstance(self._json_data, dict):
+            for (field, value) in self._json_data.items():
+                self._hand_out(field, value)
+            self._fields = dict(self._json_data)
+        self._lists = None
         return self._json_data
 
     def get_real_json(self, indent = 4):
@@ -158,7 +269,7 @@ class JsonWrapper(object):
         @return: JSON representation of this object's state
         @rtype: string
         """
-        return json.dumps(self._json_data, indent = indent)
+        return get_default_codec().dumps(self._json_data, indent = indent)
 
     def print_json(self, indent = 4):
         """
@@ -176,7 +287,7 @@ class JsonWrapper(object):
         @type indent: Integer
         """
         with open(output_file, 'w') as f:
-            json.dump(self._json_data, f, indent = indent)
+            get_default_codec().dump(self._json_data, f, indent = indent)
 
     def load_json(self, input_file):
         """
@@ -187,6 +298,10 @@ class JsonWrapper(object):
         """
         with open(os.path.join(input_file), 'r') as f:
             self._json_data = self._load_from_file_and_keep_key_order(f)
+        self._dirty = None
+        self._copies = {}
+        self._fields = None
+        self._lists = None
 
     def _load_from_file_and_keep_key_order(self, f):
-        return json.load(f, object_pairs_hook=OrderedDict)
+        return get_default_codec().load(f)
@@ -0,0 +1,172 @@
+# coding: utf-8
+"""
+JSON encoding and decoding helpers. A L{JsonCodec} relies on the fastest
+available JSON library (orjson or ujson if installed, standard C{json} module
+otherwise) and optionally decodes JSON objects into C{OrderedDict} instances
+in order to keep their key order on Python versions where plain dicts do not.
+
+Decoding into C{OrderedDict} instances requires the standard C{json} module.
+As plain dicts keep insertion order on Python 3.7 and later, disabling key
+order preservation (see L{set_default_codec}) is safe on these versions and
+allows the use of a faster library.
+"""
+
+from builtins import object
+import json
+import sys
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+BACKENDS = ["orjson", "ujson", "json"]
+"""
+Supported backends, from fastest to slowest.
+"""
+
+
+def available_backends():
+    """
+    Provides the backends that can be used in current environment.
+
+    @rtype: list of strings
+    """
+
+    modules = {"orjson": orjson, "ujson": ujson, "json": json}
+    return [name for name in BACKENDS if modules[name] is not None]
+
+
+class JsonCodec(object):
+    """
+    Encodes and decodes JSON data with a given backend.
+    """
+
+    def __init__(self, backend = None, keep_key_order = True):
+        """
+        Creates a codec.
+
+        @param backend: Name of the library to use (see L{BACKENDS}), the
+        fastest available one is used by default.
+        @type backend: string
+        @param keep_key_order: If True, JSON objects are decoded into
+        C{OrderedDict} instances (which implies the use of C{json} module for
+        decoding).
+        @type keep_key_order: bool
+
+        @raise ValueError: If requested backend is not available.
+        """
+
+        if backend is None:
+            backend = available_backends()[0]
+        elif backend not in available_backends():
+            raise ValueError("JSON backend " + str(backend) + " is not available")
+        self.backend = backend
+        self.keep_key_order = keep_key_order
+        if keep_key_order:
+            self.object_pairs_hook = OrderedDict
+        else:
+            self.object_pairs_hook = None
+
+    def loads(self, data):
+        """
+        Decodes a JSON document.
+
+        @param data: The JSON document.
+        @type data: string or bytes
+        @raise ValueError: If document is not valid JSON.
+        """
+
+        if self.keep_key_order or self.backend == "json":
+            if isinstance(data, bytes):
+                data = data.decode('utf-8')
+            return json.loads(data, object_pairs_hook = self.object_pairs_hook)
+        elif self.backend == "orjson":
+            return orjson.loads(data)
+        else:
+            return ujson.loads(data)
+
+    def load(self, f):
+        """
+        Decodes the JSON document read from a file.
+
+        @param f: A file-like object.
+        """
+
+        return self.loads(f.read())
+
+    def dumps(self, obj, indent = None):
+        """
+        Encodes an object into a JSON document. Non-ASCII characters are
+        escaped, output is therefore identical whatever the backend (except
+        for whitespaces).
+
+        @param obj: The object to encode.
+        @param indent: Number of spaces per indentation level (optional).
+        @type indent: int
+        @rtype: string
+        @raise TypeError: If object cannot be encoded.
+        """
+
+        if self.backend == "orjson" and indent in (None, 2):
+            try:
+                option = orjson.OPT_INDENT_2 if indent else 0
+                result = orjson.dumps(obj, option = option | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+                # orjson does not escape non-ASCII characters
+                if result.isascii():
+                    return result
+            except TypeError:
+                # E.g. integers larger than 64 bits
+                pass
+        elif self.backend == "ujson" and sys.version_info >= (3, 0):
+            try:
+                return ujson.dumps(obj, indent = indent or 0, escape_forward_slashes = False)
+            except (TypeError, OverflowError):
+                pass
+        return json.dumps(obj, indent = indent)
+
+    def dump(self, obj, f, indent = None):
+        """
+        Encodes an object and writes the JSON document to a file.
+
+        @param obj: The object to encode.
+        @param f: A file-like object opened in text mode.
+        @param indent: Number of spaces per indentation level (optional).
+        @type indent: int
+        """
+
+        f.write(self.dumps(obj, indent = indent))
+
+
+_default_codec = JsonCodec(keep_key_order = sys.version_info < (3, 7))
+
+
+def get_default_codec():
+    """
+    Provides the codec used by default by HTTP clients and JSON wrappers.
+    Key order is preserved only on Python versions where plain dicts do not
+    keep insertion order.
+
+    @rtype: L{JsonCodec}
+    """
+
+    return _default_codec
+
+
+def set_default_codec(codec):
+    """
+    Sets the codec used by default by HTTP clients and JSON wrappers.
+
+    @param codec: A codec.
+    @type codec: L{JsonCodec}
+    """
+
+    global _default_codec
+    _default_codec = codec
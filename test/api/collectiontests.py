@@ -54,6 +54,88 @@ class CollectionTest(TestCase):
         self.assertFalse(True)
 
 
+    # Paging tests
+
+    def test_paginate(self):
+        self._items = ["a", "b", "c", "d", "e"]
+        self._pages = []
+        self._client._http_client.read = self._read_page
+        self._collection._new = self._identity
+
+        pages = list(self._collection.iter_pages(2, {"filter": "x"}))
+
+        self.assertEqual([["a", "b"], ["c", "d"], ["e"]], pages)
+        self.assertEqual([(0, 2), (2, 2), (4, 2)], self._pages)
+
+    def test_paginate_prefetch(self):
+        self._items = ["a", "b", "c", "d"]
+        self._pages = []
+        self._client._http_client.read = self._read_page
+        self._collection._new = self._identity
+
+        iterator = self._collection.paginate(2, prefetch = True)
+        self.assertEqual("a", next(iterator))
+        # Second page is requested while first one is consumed
+        self.assertEqual(["a", "b", "c", "d"], ["a"] + list(iterator))
+        self.assertEqual([(0, 2), (2, 2), (4, 2)], self._pages)
+
+    def test_paginate_unsupported(self):
+        # Server ignores paging parameters
+        self._read_result = {"count": "3", "items": ["a", "b", "c"]}
+        self._client._http_client.read = self._read_success
+        self._expected_entity = "url/"
+        self._collection._new = self._identity
+
+        self.assertEqual(["a", "b", "c"], list(self._collection.paginate(2)))
+        self._read_result = {"count": "2", "items": ["a", "b"]}
+        self.assertEqual(["a", "b"], list(self._collection.paginate(2)))
+
+    def test_paginate_failure(self):
+        self._client._http_client.read = self._read_failure
+
+        self.assertRaises(PythonApiException, list, self._collection.paginate(2, prefetch = True))
+
+    def test_iter_with_page_size(self):
+        self._items = ["a", "b", "c"]
+        self._pages = []
+        self._client._http_client.read = self._read_page
+        self._client.page_size = 2
+        self._collection._new = self._identity
+
+        self.assertEqual(["a", "b", "c"], [e for e in self._collection])
+        self.assertEqual([(0, 2), (2, 2)], self._pages)
+
+
+    # Bulk tests
+
+    def test_get_many(self):
+        self._client._http_client.read = self._read_some
+        self._collection._new = self._identity
+
+        res = self._collection.get_many(["a", "missing", "b", "error"], workers = 3)
+
+        self.assertEqual(["url/a", None, "url/b", None], list(res))
+        self.assertEqual(["url/a", "url/b"], res.succeeded)
+        self.assertTrue(res.has_errors())
+        self.assertIsInstance(res.errors[1], EntityNotFoundException)
+        self.assertIsInstance(res.errors[3], PythonApiException)
+        self.assertEqual(["missing", "error"], [i for (i, e) in res.failed])
+        self.assertRaises(EntityNotFoundException, res.raise_first)
+
+    def test_delete_many(self):
+        deleted = []
+        self._client._http_client.delete = lambda entity, parameters = {}: deleted.append(entity)
+
+        res = self._collection.delete_many(["a", "b", "c"])
+
+        self.assertFalse(res.has_errors())
+        self.assertEqual(["a", "b", "c"], list(res))
+        self.assertEqual(["url/a", "url/b", "url/c"], sorted(deleted))
+
+    def test_bulk_invalid_workers(self):
+        self.assertRaises(ValueError, self._collection.get_many, ["a"], workers = 0)
+
+
     # Get entities tests
 
     def test_list_success(self):
@@ -80,6 +162,58 @@ class CollectionTest(TestCase):
         self.assertFalse(True)
 
 
+    # Paging tests
+
+    def test_paginate(self):
+        self._items = ["a", "b", "c", "d", "e"]
+        self._pages = []
+        self._client._http_client.read = self._read_page
+        self._collection._new = self._identity
+
+        pages = list(self._collection.iter_pages(2, {"filter": "x"}))
+
+        self.assertEqual([["a", "b"], ["c", "d"], ["e"]], pages)
+        self.assertEqual([(0, 2), (2, 2), (4, 2)], self._pages)
+
+    def test_paginate_prefetch(self):
+        self._items = ["a", "b", "c", "d"]
+        self._pages = []
+        self._client._http_client.read = self._read_page
+        self._collection._new = self._identity
+
+        iterator = self._collection.paginate(2, prefetch = True)
+        self.assertEqual("a", next(iterator))
+        # Second page is requested while first one is consumed
+        self.assertEqual(["a", "b", "c", "d"], ["a"] + list(iterator))
+        self.assertEqual([(0, 2), (2, 2), (4, 2)], self._pages)
+
+    def test_paginate_unsupported(self):
+        # Server ignores paging parameters
+        self._read_result = {"count": "3", "items": ["a", "b", "c"]}
+        self._client._http_client.read = self._read_success
+        self._expected_entity = "url/"
+        self._collection._new = self._identity
+
+        self.assertEqual(["a", "b", "c"], list(self._collection.paginate(2)))
+        self._read_result = {"count": "2", "items": ["a", "b"]}
+        self.assertEqual(["a", "b"], list(self._collection.paginate(2)))
+
+    def test_paginate_failure(self):
+        self._client._http_client.read = self._read_failure
+
+        self.assertRaises(PythonApiException, list, self._collection.paginate(2, prefetch = True))
+
+    def test_iter_with_page_size(self):
+        self._items = ["a", "b", "c"]
+        self._pages = []
+        self._client._http_client.read = self._read_page
+        self._client.page_size = 2
+        self._collection._new = self._identity
+
+        self.assertEqual(["a", "b", "c"], [e for e in self._collection])
+        self.assertEqual([(0, 2), (2, 2)], self._pages)
+
+
     # Get entities tests
 
     def test_get_entity_success(self):
@@ -113,6 +247,58 @@ class CollectionTest(TestCase):
         self.assertFalse(True)
 
 
+    # Paging tests
+
+    def test_paginate(self):
+        self._items = ["a", "b", "c", "d", "e"]
+        self._pages = []
+        self._client._http_client.read = self._read_page
+        self._collection._new = self._identity
+
+        pages = list(self._collection.iter_pages(2, {"filter": "x"}))
+
+        self.assertEqual([["a", "b"], ["c", "d"], ["e"]], pages)
+        self.assertEqual([(0, 2), (2, 2), (4, 2)], self._pages)
+
+    def test_paginate_prefetch(self):
+        self._items = ["a", "b", "c", "d"]
+        self._pages = []
+        self._client._http_client.read = self._read_page
+        self._collection._new = self._identity
+
+        iterator = self._collection.paginate(2, prefetch = True)
+        self.assertEqual("a", next(iterator))
+        # Second page is requested while first one is consumed
+        self.assertEqual(["a", "b", "c", "d"], ["a"] + list(iterator))
+        self.assertEqual([(0, 2), (2, 2), (4, 2)], self._pages)
+
+    def test_paginate_unsupported(self):
+        # Server ignores paging parameters
+        self._read_result = {"count": "3", "items": ["a", "b", "c"]}
+        self._client._http_client.read = self._read_success
+        self._expected_entity = "url/"
+        self._collection._new = self._identity
+
+        self.assertEqual(["a", "b", "c"], list(self._collection.paginate(2)))
+        self._read_result = {"count": "2", "items": ["a", "b"]}
+        self.assertEqual(["a", "b"], list(self._collection.paginate(2)))
+
+    def test_paginate_failure(self):
+        self._client._http_client.read = self._read_failure
+
+        self.assertRaises(PythonApiException, list, self._collection.paginate(2, prefetch = True))
+
+    def test_iter_with_page_size(self):
+        self._items = ["a", "b", "c"]
+        self._pages = []
+        self._client._http_client.read = self._read_page
+        self._client.page_size = 2
+        self._collection._new = self._identity
+
+        self.assertEqual(["a", "b", "c"], [e for e in self._collection])
+        self.assertEqual([(0, 2), (2, 2)], self._pages)
+
+
     # Get entities tests
 
     def test_get_single_entity_success(self):
@@ -156,6 +342,20 @@ class CollectionTest(TestCase):
     def _read_failure(self, entity, parameters = {}, decode = True):
         raise ApiException("Error", 0)
 
+    def _read_some(self, entity, parameters = {}, decode = True):
+        if entity.endswith("missing"):
+            raise ApiException("Not found", 404)
+        if entity.endswith("error"):
+            raise ApiException("Error", 500)
+        return entity
+
+    def _read_page(self, entity, parameters = {}, decode = True):
+        start = parameters["start"]
+        num = parameters["num"]
+        self._pages.append((start, num))
+        items = self._items[start:start + num]
+        return {"count": str(len(items)), "items": items}
+
     def _identity(self, data):
         return data
 
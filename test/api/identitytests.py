@@ -0,0 +1,82 @@
+import unittest
+
+from comodit_client.api import Client
+from comodit_client.api.collection import EntityNotFoundException
+from comodit_client.api.identity import IdentityMap
+from test.mock.fleet import generate_fleet
+from test.mock.standin import StandInServer
+
+
+class IdentityMapTest(unittest.TestCase):
+    def setUp(self):
+        self._now = 0
+        self._map = IdentityMap(ttl = 10, max_entries = 3, clock = lambda: self._now)
+
+    def test_expiration(self):
+        self._map.put("organizations/o/", "org")
+        self._now = 9
+        self.assertEqual("org", self._map.get("organizations/o/"))
+        self._now = 10
+        self.assertIsNone(self._map.get("organizations/o/"))
+        self.assertEqual({"entries": 0, "hits": 1, "misses": 1, "invalidations": 0}, self._map.stats())
+
+    def test_lru(self):
+        for name in ["a", "b", "c"]:
+            self._map.put(name + "/", name)
+        self._map.get("a/")
+        self._map.put("d/", "d")
+        self.assertIsNone(self._map.get("b/"))
+        self.assertEqual("a", self._map.get("a/"))
+
+    def test_invalidate(self):
+        self._map.max_entries = 10
+        self._map.put("organizations/o/", "org")
+        self._map.put("organizations/o/environments/e/", "env")
+        self._map.put("organizations/o/environments/e/hosts/h/", "host")
+        self._map.put("organizations/o/environments/e2/", "env2")
+        self._map.put("organizations/o2/", "org2")
+        self._map.invalidate("organizations/o/environments/e/_clone")
+        self.assertEqual(["env2", "org2"], sorted([self._map.get("organizations/o/environments/e2/"),
+                                                   self._map.get("organizations/o2/")]))
+        self.assertEqual(2, len(self._map))
+        self.assertEqual(3, self._map.stats()["invalidations"])
+
+
+class ClientIdentityMapTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer().start()
+        generate_fleet(self._server, organizations = 1, environments = 1, hosts = 2,
+                       applications = 2, files = 1, settings = 1, installed = 2,
+                       provisioned = 0)
+        self._client = Client(self._server.url, "user", "pass", None, identity_map_ttl = 60)
+
+    def tearDown(self):
+        self._client.close()
+        self._server.stop()
+
+    def test_navigation(self):
+        org = self._client.get_organization("org-000")
+        requests = len(self._server.requests)
+        self.assertIs(org, self._client.get_organization("org-000"))
+        self.assertIs(org.get_application("app-000"), org.get_application("app-000"))
+        self.assertEqual(requests + 1, len(self._server.requests))
+        self.assertEqual(2, self._client.get_identity_map_stats()["hits"])
+
+    def test_invalidation(self):
+        envs = self._client.environments("org-000")
+        env = envs.get("env-00")
+        env.description = "Updated"
+        env.update()
+        self.assertIs(env, envs.get("env-00"))
+        host = env.get_host("host-00000")
+        host.provision()
+        self.assertIsNot(host, env.get_host("host-00000"))
+        env.rename("renamed")
+        self.assertIs(env, envs.get("renamed"))
+        self.assertRaises(EntityNotFoundException, envs.get, "env-00")
+        env.delete()
+        self.assertRaises(EntityNotFoundException, envs.get, "renamed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,270 @@
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+
+import six
+
+from comodit_client.api import Client
+from comodit_client.api.host import ChangeFailedException, FleetWaiter, Host, ProvisioningException, \
+    ProvisioningPipeline
+from comodit_client.api.polling import PollingPolicy, poll
+from test.mock.fleet import generate_fleet
+from test.mock.standin import StandInServer
+
+
+class PollingPolicyTest(unittest.TestCase):
+    def test_delays(self):
+        policy = PollingPolicy(initial_delay = 1, max_delay = 5, factor = 2, jitter = 0)
+        self.assertEqual([1, 2, 4, 5, 5], [policy.delay(n) for n in range(5)])
+        self.assertEqual(5, policy.delay(10000))
+
+    def test_jitter(self):
+        policy = PollingPolicy(initial_delay = 1, jitter = 0.2)
+        for _ in range(100):
+            self.assertTrue(0.8 <= policy.delay(0) <= 1.2)
+
+
+class PollTest(unittest.TestCase):
+    def setUp(self):
+        self._policy = PollingPolicy(initial_delay = 0.01, max_delay = 0.05)
+        self._calls = 0
+
+    def _never(self):
+        self._calls += 1
+        return False
+
+    def test_condition(self):
+        results = iter([False, False, True])
+        self.assertTrue(poll(lambda: next(results), self._policy))
+
+    def test_time_out(self):
+        start = time.time()
+        self.assertFalse(poll(self._never, self._policy, time_out = 0.2))
+        self.assertTrue(0.2 <= time.time() - start < 1)
+        self.assertTrue(self._calls > 3)
+
+    def test_deadline(self):
+        self.assertFalse(poll(self._never, self._policy, deadline = time.time() - 1))
+        self.assertEqual(1, self._calls)
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        start = time.time()
+        policy = PollingPolicy(initial_delay = 30)
+        self.assertFalse(poll(self._never, policy, cancel = cancel))
+        self.assertTrue(time.time() - start < 5)
+        self.assertEqual(1, self._calls)
+
+
+class HostWaitTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer(change_delay = 0.3, provision_delay = 0.3).start()
+        generate_fleet(self._server, organizations = 1, environments = 1, hosts = 1,
+                       applications = 1, installed = 0, changes = 0, provisioned = 0)
+        self._client = Client(self._server.url, "user", "pass", None, cache_size = 16,
+                              polling_policy = PollingPolicy(initial_delay = 0.05, max_delay = 0.1))
+        self._host = self._client.get_host("org-000", "env-00", "host-00000")
+
+    def tearDown(self):
+        self._client.close()
+        self._server.stop()
+
+    def test_wait_for_state(self):
+        self._host.provision()
+        start = time.time()
+        self.assertTrue(self._host.wait_for_state(Host.State.READY, 10))
+        self.assertTrue(time.time() - start < 2)
+        self.assertTrue(self._client.get_cache_stats()["hits"] > 0)
+        self.assertEqual("RUNNING", self._host.get_instance().state)
+        self.assertTrue(self._host.get_instance().wait_for_address(10))
+
+    def test_wait_for_change(self):
+        self._host.install("app-000", {})
+        change = self._host.all_changes()[-1]
+        self.assertFalse(self._host.wait_for_change_terminated(change.change_id, deadline = time.time()))
+        self.assertTrue(self._host.wait_for_change_terminated(change.change_id, 10))
+        self.assertEqual(0, len(self._host.changes().list()))
+        self.assertTrue(self._host.wait_for_pending_changes(10))
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        cancel.set()
+        self.assertFalse(self._host.wait_for_state(Host.State.READY, cancel = cancel))
+
+
+class ChangeTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer(change_delay = 0.3).start()
+        generate_fleet(self._server, organizations = 1, environments = 1, hosts = 1,
+                       applications = 2, installed = 0, changes = 50)
+        self._client = Client(self._server.url, "user", "pass", None,
+                              polling_policy = PollingPolicy(initial_delay = 0.05, max_delay = 0.1))
+        self._host = self._client.get_host("org-000", "env-00", "host-00000")
+
+    def tearDown(self):
+        self._client.close()
+        self._server.stop()
+
+    def _history_requests(self):
+        return len([r for r in self._server.requests if "show_processed=True" in r[1]])
+
+    def test_pending_change(self):
+        self._host.install("app-000", {})
+        self._host.install("app-001", {})
+        changes = self._host.changes().list()[-2:]
+        tracker = self._host.change_tracker()
+        self.assertIs(tracker, self._host.change_tracker())
+        self.assertFalse(tracker.is_terminated(changes[0].change_id))
+        self.assertEqual(changes[1].order_num, tracker.last_order_num)
+        requests = len(self._server.requests)
+        self.assertFalse(tracker.is_terminated(changes[1].change_id))
+        self.assertEqual([("GET", "/api/" + self._host.url + "changes/%d" % changes[1].order_num)],
+                         self._server.requests[requests:])
+        self.assertTrue(self._host.wait_for_change_terminated(changes[0].change_id, 10))
+        self.assertTrue(self._host.wait_for_change_terminated(changes[1].change_id, 10))
+        self.assertEqual(0, self._history_requests())
+
+        requests = len(self._server.requests)
+        self.assertTrue(tracker.is_terminated(changes[1].change_id))
+        self.assertEqual(requests, len(self._server.requests))
+
+    def test_processed_change(self):
+        change = [c for c in self._host.all_changes() if not c.are_tasks_pending()][0]
+        tracker = self._host.change_tracker()
+        history_requests = self._history_requests()
+        self.assertTrue(tracker.is_terminated(change.change_id))
+        self.assertTrue(tracker.is_terminated("unknown"))
+        self.assertEqual(history_requests + 2, self._history_requests())
+        requests = len(self._server.requests)
+        self.assertTrue(tracker.is_terminated("unknown"))
+        self.assertIsNone(tracker.get("unknown"))
+        self.assertEqual(change.order_num, tracker.get(change.change_id).order_num)
+        self.assertEqual(requests, len(self._server.requests))
+
+
+class FleetWaiterTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer(change_delay = 0.3, provision_delay = 0.3).start()
+        generate_fleet(self._server, organizations = 1, environments = 1, hosts = 6,
+                       applications = 1, installed = 0, changes = 0, provisioned = 0)
+        self._client = Client(self._server.url, "user", "pass", None,
+                              polling_policy = PollingPolicy(initial_delay = 0.05, max_delay = 0.1))
+        self._hosts = self._client.hosts("org-000", "env-00").list()
+
+    def tearDown(self):
+        self._client.close()
+        self._server.stop()
+
+    def test_wait(self):
+        waiter = FleetWaiter(max_in_flight = 3)
+        for host in self._hosts:
+            host.provision()
+            waiter.wait_for_state(host, Host.State.READY)
+            waiter.wait_for_property(host, "ip.eth0")
+            waiter.wait_for_pending_changes(host)
+        completed = []
+        start = time.time()
+        result = waiter.wait(time_out = 10, callback = lambda host, error: completed.append(host.name))
+        self.assertTrue(time.time() - start < 2)
+        self.assertEqual([True] * 6, list(result))
+        self.assertEqual(sorted(h.name for h in self._hosts), sorted(completed))
+        self.assertEqual([], waiter.pending)
+
+    def test_change_terminated(self):
+        host = self._hosts[0]
+        host.install("app-000", {})
+        change = host.all_changes()[-1]
+        waiter = FleetWaiter().wait_for_change_terminated(host, change.change_id)
+        self.assertEqual([(host, None)], list(waiter.iter_completed(time_out = 10)))
+        self.assertEqual(0, len(host.changes().list()))
+
+    def test_change_failed(self):
+        host = self._hosts[0]
+        self._server.failing_hosts.add(host.name)
+        host.install("app-000", {})
+        change = host.all_changes()[-1]
+        waiter = FleetWaiter().wait_for_change_terminated(host, change.change_id)
+        output = six.StringIO()
+        with redirect_stdout(output):
+            result = waiter.wait(time_out = 10)
+        self.assertEqual("", output.getvalue())
+        self.assertEqual([None], list(result))
+        self.assertIsInstance(result.errors[0], ChangeFailedException)
+        self.assertEqual(["Task failed"], [t.error for t in result.errors[0].tasks])
+
+    def test_failures(self):
+        waiter = FleetWaiter(max_rate = 10)
+        for host in self._hosts[:2]:
+            waiter.wait_for_state(host, Host.State.READY)
+        self._hosts[0].delete()
+        requests = len(self._server.requests)
+        result = waiter.wait(time_out = 0.5)
+        self.assertEqual([None, False], list(result))
+        self.assertEqual(1, len(result.failed))
+        self.assertEqual([self._hosts[1]], waiter.pending)
+        self.assertTrue(len(self._server.requests) - requests <= 7)
+
+    def test_budgets(self):
+        lock = threading.Lock()
+        running = [0, 0]
+        def step(host):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return True
+        steps = []
+        waiter = FleetWaiter(max_in_flight = 4, limits = {"step": 1},
+                             on_step = lambda host, stage: steps.append(stage))
+        for host in self._hosts:
+            waiter.add_stage(host, step, "step", "step")
+        self.assertEqual("step", waiter.stage(self._hosts[0]))
+        self.assertEqual([True] * 6, list(waiter.wait(time_out = 10)))
+        self.assertEqual(1, running[1])
+        self.assertEqual(["step"] * 6, steps)
+        self.assertEqual(None, waiter.stage(self._hosts[0]))
+
+
+class ProvisioningPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer(change_delay = 0.2, provision_delay = 0.2).start()
+        generate_fleet(self._server, organizations = 1, environments = 1, hosts = 2,
+                       installed = 1, changes = 0, provisioned = 0)
+        self._client = Client(self._server.url, "user", "pass", None,
+                              polling_policy = PollingPolicy(initial_delay = 0.05, max_delay = 0.1))
+        self._hosts = self._client.hosts("org-000", "env-00")
+
+    def tearDown(self):
+        self._client.close()
+        self._server.stop()
+
+    def test_create(self):
+        hosts = [self._hosts.new("new-%d" % i, "", "platform", "distribution", ["app-000"]) for i in range(8)]
+        hosts.append(self._hosts.new("host-00000", "", "platform", "distribution"))
+        events = []
+        pipeline = ProvisioningPipeline(create_workers = 2, provision_workers = 2)
+        start = time.time()
+        result = pipeline.run(hosts, time_out = 10, callback = lambda h, s, e: events.append((h.name, s, e)))
+        self.assertTrue(time.time() - start < 3)
+        self.assertEqual([True] * 8 + [None], list(result))
+        error = result.errors[-1]
+        self.assertIsInstance(error, ProvisioningException)
+        self.assertEqual("create", error.stage)
+        self.assertEqual([("host-00000", "create", error)], [e for e in events if e[2] is not None])
+        self.assertEqual(ProvisioningPipeline.STAGES, [e[1] for e in events if e[0] == "new-3"])
+        self.assertEqual(Host.State.READY, self._hosts.get("new-3").state)
+
+    def test_existing(self):
+        self._server.provision_delay = 10
+        result = ProvisioningPipeline().run(self._hosts.list(), create = False, time_out = 0.5)
+        self.assertEqual([False, False], list(result))
+        self.assertFalse(result.has_errors())
+        self.assertEqual(Host.State.PROVISIONING, self._hosts.get("host-00001").state)
+
+
+if __name__ == '__main__':
+    unittest.main()
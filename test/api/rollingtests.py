@@ -0,0 +1,106 @@
+import threading
+import time
+import unittest
+
+from comodit_client.api import Client
+from comodit_client.api.exceptions import PythonApiException
+from comodit_client.api.host import ChangeFailedException
+from comodit_client.api.polling import PollingPolicy
+from comodit_client.api.rolling import RollingExecution, restart_service, \
+    run_handler, run_orchestration, select_hosts, update_package
+from test.mock.fleet import generate_fleet
+from test.mock.standin import StandInServer
+
+
+class SelectHostsTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer().start()
+        generate_fleet(self._server, organizations = 1, environments = 2, hosts = 4,
+                       applications = 2, installed = 1, changes = 0)
+        self._client = Client(self._server.url, "user", "pass", None)
+
+    def tearDown(self):
+        self._client.close()
+        self._server.stop()
+
+    def test_select(self):
+        hosts = select_hosts(self._client, "org-000", "env-01", name = "host-0000[12]")
+        self.assertEqual(["host-00001", "host-00002"], [h.identifier for h in hosts])
+        self.assertEqual(8, len(select_hosts(self._client, "org-000")))
+        self.assertFalse(any("hosts/host-" in r[1] for r in self._server.requests))
+
+    def test_application(self):
+        hosts = select_hosts(self._client, "org-000", "env-00", application = "app-001")
+        expected = [h.name for h in self._client.hosts("org-000", "env-00")
+                    if "app-001" in h.get_json()["applications"]]
+        self.assertEqual(expected, [h.name for h in hosts])
+
+
+class RollingExecutionTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer(change_delay = 0.2).start()
+        generate_fleet(self._server, organizations = 1, environments = 1, hosts = 6,
+                       applications = 1, installed = 1, changes = 0)
+        self._client = Client(self._server.url, "user", "pass", None,
+                              polling_policy = PollingPolicy(initial_delay = 0.05, max_delay = 0.1))
+        self._hosts = select_hosts(self._client, "org-000", "env-00")
+
+    def tearDown(self):
+        self._client.close()
+        self._server.stop()
+
+    def test_batches(self):
+        completed = []
+        rolling = RollingExecution(restart_service("app-000", "service"), batch_size = 2, parallelism = 2)
+        start = time.time()
+        result = rolling.run(self._hosts, callback = lambda host, error: completed.append((time.time(), error)))
+        self.assertEqual([True] * 6, list(result))
+        self.assertFalse(rolling.stopped)
+        self.assertTrue(0.6 <= time.time() - start < 3)
+        # A batch starts when previous one is over
+        self.assertTrue(completed[2][0] - completed[1][0] >= 0.2)
+        for host in self._hosts:
+            self.assertEqual(0, len(host.changes().list()))
+
+    def test_max_errors(self):
+        self._server.failing_hosts.update(["host-00000", "host-00003"])
+        rolling = RollingExecution(restart_service("app-000", "service"), batch_size = 2, max_errors = 1)
+        result = rolling.run(self._hosts)
+        self.assertTrue(rolling.stopped)
+        self.assertEqual([None, True, True, None, False, False], list(result))
+        self.assertEqual(2, len(result.failed))
+        self.assertIsInstance(result.errors[0], ChangeFailedException)
+        self.assertEqual(0, len(self._client.get_host("org-000", "env-00", "host-00004").all_changes()))
+
+    def test_operation_error(self):
+        rolling = RollingExecution(restart_service("app-000", "service"), batch_size = 3)
+        self._client.get_host("org-000", "env-00", "host-00001").delete()
+        result = rolling.run(self._hosts)
+        self.assertEqual([True, None, True, False, False, False], list(result))
+
+    def test_change_ids(self):
+        self.assertEqual(1, len(restart_service("app-000", "service")(self._hosts[0])))
+        self.assertEqual(1, len(update_package("app-000", "package", "1.0")(self._hosts[0])))
+        handler = run_handler("app-000", "handler")
+        self.assertEqual(1, len(handler(self._hosts[0])))
+        orchestration = run_orchestration("orchestration")
+        self.assertEqual(1, len(orchestration(self._hosts[1])))
+        result = RollingExecution(handler, batch_size = 6).run(self._hosts)
+        self.assertEqual([True] * 6, list(result))
+
+    def test_unknown_changes(self):
+        result = RollingExecution(lambda host: None, batch_size = 2).run(self._hosts)
+        self.assertEqual([None, None, False, False, False, False], list(result))
+        self.assertIsInstance(result.errors[0], PythonApiException)
+
+    def test_cancel(self):
+        self._server.change_delay = 10
+        cancel = threading.Event()
+        threading.Timer(0.3, cancel.set).start()
+        result = RollingExecution(restart_service("app-000", "service"), batch_size = 2).run(self._hosts, cancel = cancel)
+        self.assertEqual([False] * 6, list(result))
+        self.assertFalse(result.has_errors())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+import unittest, os, tempfile
+
+from comodit_client.api import Client
+from comodit_client.api.collection import EntityNotFoundException
+from comodit_client.api.host import Host
+from test.mock.fleet import generate_fleet
+from test.mock.standin import StandInServer
+
+
+class StandInServerTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer().start()
+        self._fleet = generate_fleet(self._server, organizations = 2, environments = 2, hosts = 3,
+                                     applications = 3, files = 2, file_size = 256, settings = 2,
+                                     installed = 2, changes = 1, compliance_errors = 1,
+                                     audit_entries = 2, store = 3)
+        self._client = Client(self._server.url, "user", "pass", None)
+
+    def tearDown(self):
+        self._client.close()
+        self._server.stop()
+
+    def test_fleet(self):
+        self.assertEqual(2, len(self._fleet.organizations))
+        self.assertEqual(12, len(self._fleet.hosts))
+        self.assertEqual(12, self._fleet.files)
+        self.assertEqual(1, self._server.count("organizations/org-000/environments/env-00/hosts/host-00000/changes/"))
+
+    def test_list(self):
+        self.assertEqual(["org-000", "org-001"], [o.name for o in self._client.organizations().list()])
+        hosts = self._client.hosts("org-001", "env-01").list()
+        self.assertEqual(["host-00000", "host-00001", "host-00002"], [h.name for h in hosts])
+        self.assertEqual(3, len(self._client.app_store().list()))
+        host = hosts[0]
+        self.assertEqual(2, len(host.settings().list()))
+        self.assertEqual(2, len(host.applications().list()))
+        self.assertEqual(1, len(host.compliance().list()))
+        self.assertEqual(2, len(host.audit_logs().list()))
+        self.assertEqual(0, len(host.changes().list()))
+        self.assertEqual(1, len(host.all_changes()))
+
+    def test_paging(self):
+        self._client.page_size = 2
+        hosts = self._client.hosts("org-000", "env-00")
+        self.assertEqual(["host-00000", "host-00001", "host-00002"], [h.name for h in hosts])
+        self.assertEqual(2, len([r for r in self._server.requests if "hosts/?" in r[1]]))
+
+    def test_entity_lifecycle(self):
+        envs = self._client.environments("org-000")
+        env = envs.create("new-env", "An environment")
+        self.assertEqual("org-000", env.organization)
+        env.description = "Updated"
+        env.update()
+        self.assertEqual("Updated", envs.get("new-env").description)
+        env.rename("renamed-env")
+        self.assertEqual("Updated", envs.get("renamed-env").description)
+        self.assertRaises(EntityNotFoundException, envs.get, "new-env")
+        env.delete()
+        self.assertRaises(EntityNotFoundException, envs.get, "renamed-env")
+
+    def test_bulk(self):
+        envs = self._client.environments("org-000")
+        res = envs.create_many([envs.new("bulk-%d" % i) for i in range(5)])
+        self.assertFalse(res.has_errors())
+        res = envs.get_many(["bulk-0", "unknown", "bulk-4"])
+        self.assertEqual(["bulk-0", None, "bulk-4"], [e.name if e else None for e in res])
+        self.assertIsInstance(res.errors[1], EntityNotFoundException)
+        for env in res.succeeded:
+            env.description = "Updated"
+        self.assertFalse(envs.update_many(res.succeeded).has_errors())
+        self.assertEqual("Updated", envs.get("bulk-4").description)
+        envs.delete_many(["bulk-%d" % i for i in range(5)])
+        self.assertEqual(["env-00", "env-01"], [e.name for e in envs.list()])
+
+    def test_partial_update(self):
+        self._client.partial_updates = True
+        app = self._client.get_application("org-000", "app-000")
+        self.assertEqual(2, len(app.files_f))
+        app.description = "Updated"
+        app.update()
+        self.assertEqual(("PATCH", "/api/organizations/org-000/applications/app-000"), self._server.requests[-1])
+        self.assertLess(self._server.bytes_in, 32)
+        doc = self._server.get("organizations/org-000/applications/app-000/")
+        self.assertEqual("Updated", doc["description"])
+        self.assertEqual(2, len(doc["files"]))
+        self.assertEqual({}, app.get_changes())
+
+        self._server.patch = False
+        app.description = "Updated again"
+        app.update()
+        self.assertFalse(self._client.partial_updates)
+        self.assertEqual("PUT", self._server.requests[-1][0])
+        self.assertEqual("Updated again", app.description)
+
+    def test_provisioning(self):
+        self._server.change_delay = 0.2
+        hosts = self._client.hosts("org-000", "env-00")
+        host = hosts.create("new-host", "", "platform", "distribution", ["app-000"])
+        self.assertEqual(Host.State.DEFINED, host.state)
+        self.assertEqual("app-000", host.get_application("app-000").application)
+        host.provision()
+        host.refresh()
+        self.assertEqual(Host.State.READY, host.state)
+        self.assertEqual("RUNNING", host.get_instance().state)
+        self.assertTrue(host.get_instance().get_property("ip.eth0"))
+        self.assertEqual(1, len(host.changes().list()))
+        host.wait_for_pending_changes(10)
+        self.assertEqual(0, len(host.changes().list()))
+
+    def test_actions(self):
+        host = self._client.get_host("org-000", "env-00", "host-00000")
+        app = host.applications().list()[0].application
+        change_id = host.live_restart_service(app, "service")
+        self.assertEqual(2, len(host.all_changes()))
+        self.assertTrue(host.wait_for_change_terminated(change_id, 10))
+        host.get_instance().pause()
+        self.assertEqual("PAUSED", host.get_instance().state)
+        clone = host.clone()
+        self.assertEqual(Host.State.DEFINED, clone.state)
+
+    def test_files(self):
+        app = self._client.get_application("org-001", "app-002")
+        f = app.get_file("file-001")
+        content = f.read_content()
+        self.assertTrue(content.startswith("# org-001/app-002/file-001\n"))
+        self.assertEqual(256, len(content))
+        host = self._client.get_host("org-001", "env-00", "host-00000")
+        installed = host.applications().list()[0].application
+        self.assertTrue(host.render_app_file(installed, "file-000").startswith("# org-001/" + installed))
+
+        (fd, path) = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, "w") as local:
+                local.write("new content")
+            f.set_content(path)
+        finally:
+            os.remove(path)
+        self.assertEqual("new content", f.read_content())
+
+    def test_settings(self):
+        org = self._client.get_organization("org-000")
+        org.settings().create("new_setting", "value")
+        self.assertEqual("value", org.get_setting("new_setting").value)
+        self.assertEqual(3, len(org.settings().list()))
+
+
+class NestedRequestTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer().start()
+        generate_fleet(self._server, organizations = 1, environments = 1, hosts = 1500,
+                       applications = 0, installed = 0, changes = 0, compliance_errors = 0,
+                       audit_entries = 0, settings = 0)
+
+    def tearDown(self):
+        self._server.stop()
+
+    def _check(self, pool_size):
+        client = Client(self._server.url, "user", "pass", None, pool_size = pool_size)
+        try:
+            hosts = client.hosts("org-000", "env-00")
+            count = 0
+            for host in hosts.iter():
+                if count < 3:
+                    self.assertEqual(host.name, hosts.get(host.name).name)
+                count += 1
+            self.assertEqual(1500, count)
+        finally:
+            client.close()
+
+    def test_single_connection(self):
+        self._check(1)
+
+    def test_streaming(self):
+        self._check(2)
+
+
+class LazyEntityTest(unittest.TestCase):
+    def setUp(self):
+        self._server = StandInServer().start()
+        generate_fleet(self._server, organizations = 1, environments = 1, hosts = 2, changes = 2)
+        self._client = Client(self._server.url, "user", "pass", None, lazy = True)
+
+    def tearDown(self):
+        self._client.close()
+        self._server.stop()
+
+    def test_navigation(self):
+        host = self._client.get_organization("org-000").get_environment("env-00").get_host("host-00000")
+        self.assertEqual(0, len(self._server.requests))
+        self.assertIsInstance(host, Host)
+        self.assertEqual("organizations/org-000/environments/env-00/hosts/host-00000/", host.url)
+        self.assertEqual(2, len(host.all_changes()))
+        self.assertEqual(1, len(self._server.requests))
+        self.assertEqual("Host 0 of env-00", host.description)
+        self.assertEqual(Host, type(host))
+        self.assertEqual(2, len(self._server.requests))
+
+    def test_missing(self):
+        host = self._client.get_host("org-000", "env-00", "unknown")
+        self.assertRaises(EntityNotFoundException, getattr, host, "state")
+
+    def test_set_json(self):
+        envs = self._client.environments("org-000")
+        env = envs.stub("env-00")
+        env.set_json({"name": "env-00", "description": "Replaced"})
+        env.update()
+        self.assertEqual(1, len(self._server.requests))
+        self.assertEqual("Replaced", self._server.get("organizations/org-000/environments/env-00/")["description"])
+
+
+if __name__ == '__main__':
+    unittest.main()
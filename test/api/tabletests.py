@@ -0,0 +1,66 @@
+import unittest
+
+from comodit_client.api import Client
+from comodit_client.api.table import Table
+from test.mock.fleet import generate_fleet
+from test.mock.standin import StandInServer
+
+
+ITEMS = [{"name": "c", "state": "READY", "cpus": 2, "enabled": True, "driver": {"name": "Static"}},
+         {"name": "a", "state": "DEFINED", "cpus": 4, "enabled": False},
+         {"name": "b", "state": "READY", "cpus": None, "enabled": True, "driver": {"name": "Vm"}}]
+
+
+class TableTest(unittest.TestCase):
+    def setUp(self):
+        self._table = Table(["name", "state", "cpus", "enabled", "driver.name", "missing"])
+        for item in ITEMS:
+            self._table.append(item)
+
+    def test_rows(self):
+        self.assertEqual(3, len(self._table))
+        self.assertEqual(("c", "READY", 2, True, "Static", None), self._table.row(0))
+        self.assertEqual(("b", "READY", None, True, "Vm", None), self._table.row(-1))
+        self.assertEqual([2, 4, None], self._table.column("cpus"))
+        self.assertEqual({"name": "a", "state": "DEFINED", "cpus": 4, "enabled": False,
+                          "driver.name": None, "missing": None}, dict(list(self._table.dicts())[1]))
+
+    def test_mixed_types(self):
+        self._table.append({"name": 5, "cpus": "many"})
+        self.assertEqual(["c", "a", "b", 5], self._table.column("name"))
+        self.assertEqual([2, 4, None, "many"], self._table.column("cpus"))
+
+    def test_filter(self):
+        self.assertEqual(["c", "b"], self._table.filter(state = "READY").column("name"))
+        self.assertEqual(["c"], self._table.filter(state = "READY", cpus = 2).column("name"))
+        self.assertEqual([], self._table.filter(state = "UNKNOWN").column("name"))
+        self.assertEqual(["a"], self._table.filter(lambda row: not row["enabled"]).column("name"))
+
+    def test_sort(self):
+        self.assertEqual(["a", "b", "c"], self._table.sort("name").column("name"))
+        self.assertEqual([None, 2, 4], self._table.sort("cpus").column("cpus"))
+        self.assertEqual(["c", "b", "a"], self._table.sort(["state", "name"], reverse = True).column("name"))
+
+    def test_group_by(self):
+        groups = self._table.group_by("state")
+        self.assertEqual(["READY", "DEFINED"], list(groups.keys()))
+        self.assertEqual(["c", "b"], groups["READY"].column("name"))
+        self.assertEqual({"READY": 2, "DEFINED": 1}, dict(self._table.count_by("state")))
+
+
+class CollectionTableTest(unittest.TestCase):
+    def test_to_table(self):
+        with StandInServer() as server:
+            generate_fleet(server, organizations = 1, environments = 1, hosts = 20, provisioned = 0.5)
+            client = Client(server.url, "user", "pass", None)
+            try:
+                table = client.hosts("org-000", "env-00").to_table(["name", "state"])
+            finally:
+                client.close()
+        self.assertEqual(20, len(table))
+        self.assertEqual("host-00019", table.sort("name", reverse = True).row(0)[0])
+        self.assertEqual(20, sum(table.count_by("state").values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+# coding: utf-8
+"""
+Synthetic fleet generator: fills a L{StandInServer<test.mock.standin.StandInServer>}
+with organizations, environments, hosts, applications (with files and
+parameters), settings, changes, compliance errors, audit logs and store
+entries. Generation is deterministic for a given seed.
+
+Entities are added directly to server's resource tree, a fleet of 50
+organizations and 20000 hosts is therefore generated in a few seconds::
+
+    server = StandInServer().start()
+    fleet = generate_fleet(server, organizations = 50, environments = 4, hosts = 100)
+"""
+
+from builtins import object
+from builtins import range
+import random
+
+
+class Fleet(object):
+    """
+    Describes a generated fleet.
+
+    @ivar organizations: Organization names.
+    @ivar environments: (organization, environment) pairs.
+    @ivar hosts: (organization, environment, host) tuples.
+    @ivar applications: (organization, application) pairs.
+    @ivar files: Number of application files.
+    @ivar bytes: Total size of application files.
+    """
+
+    def __init__(self):
+        self.organizations = []
+        self.environments = []
+        self.hosts = []
+        self.applications = []
+        self.files = 0
+        self.bytes = 0
+
+    def __repr__(self):
+        return "<Fleet %d organizations, %d environments, %d hosts, %d applications, %d files>" % \
+            (len(self.organizations), len(self.environments), len(self.hosts),
+             len(self.applications), self.files)
+
+
+_STATES = ["OK", "OK", "OK", "ERROR"]
+
+_RESOURCE_TYPES = ["fileResource", "packageResource", "serviceResource"]
+
+
+def generate_fleet(server, organizations = 1, environments = 2, hosts = 10,
+                   applications = 5, files = 3, file_size = 1024, settings = 5,
+                   installed = 2, changes = 2, compliance_errors = 1,
+                   audit_entries = 5, store = 10, provisioned = 1.0, seed = 0):
+    """
+    Generates a fleet.
+
+    @param server: The server to fill.
+    @type server: L{StandInServer<test.mock.standin.StandInServer>}
+    @param organizations: Number of organizations.
+    @param environments: Number of environments per organization.
+    @param hosts: Number of hosts per environment.
+    @param applications: Number of applications per organization.
+    @param files: Number of files per application.
+    @param file_size: Size of each file in bytes.
+    @param settings: Number of settings per organization, environment and host.
+    @param installed: Number of applications installed on each host.
+    @param changes: Number of (processed) changes per host.
+    @param compliance_errors: Number of compliance errors per host.
+    @param audit_entries: Number of audit log entries per organization and
+    host.
+    @param store: Number of applications in the store.
+    @param provisioned: Fraction of hosts being provisioned (i.e. READY and
+    having an instance), other hosts are DEFINED.
+    @type provisioned: float
+    @param seed: Random seed.
+    @return: The description of generated fleet.
+    @rtype: L{Fleet}
+    """
+
+    rng = random.Random(seed)
+    fleet = Fleet()
+    # Files share a single filler block in order to keep memory usage low
+    filler = _text(rng, file_size)
+
+    for i in range(store):
+        server.add("store/applications/", {"name": "store-app-%03d" % i,
+                                           "uuid": "%08d-0000-0000-0000-000000000000" % i,
+                                           "description": "Store application %d" % i,
+                                           "price": rng.randint(0, 100)})
+
+    for o in range(organizations):
+        org = "org-%03d" % o
+        server.add("organizations/", {"name": org, "description": "Organization " + str(o),
+                                      "settings": []})
+        fleet.organizations.append(org)
+        org_url = "organizations/" + org + "/"
+        _add_settings(server, org_url, "org", settings)
+        _add_audit(server, org_url, rng, audit_entries)
+
+        server.add(org_url + "platforms/", {"name": "platform", "driver": {"name": "Static"}})
+        server.add(org_url + "distributions/", {"name": "distribution", "description": "Synthetic distribution"})
+
+        app_names = []
+        for a in range(applications):
+            app = "app-%03d" % a
+            app_names.append(app)
+            fleet.applications.append((org, app))
+            app_url = org_url + "applications/" + app + "/"
+            server.add(org_url + "applications/", {
+                "name": app,
+                "description": "Application " + str(a),
+                "packages": [{"name": "package-%d-%d" % (a, p)} for p in range(3)],
+                "services": [{"name": "service-%d" % a, "enabled": True}],
+                "files": [{"name": "file-%03d" % f, "path": "/etc/%s/file-%03d.conf" % (app, f),
+                           "owner": "root", "group": "root", "mode": "644",
+                           "template": {"name": "file-%03d" % f}}
+                          for f in range(files)],
+                "parameters": [{"key": "param", "name": "Parameter", "value": "default"}]})
+            for f in range(files):
+                header = ("# %s/%s/file-%03d\n" % (org, app, f)).encode('utf-8')
+                content = header + filler[len(header):]
+                server.set_content(app_url + "files/file-%03d/" % f, content)
+                fleet.files += 1
+                fleet.bytes += len(content)
+
+        for e in range(environments):
+            env = "env-%02d" % e
+            env_url = org_url + "environments/" + env + "/"
+            server.add(org_url + "environments/", {"name": env, "description": "Environment " + str(e),
+                                                   "settings": []})
+            fleet.environments.append((org, env))
+            _add_settings(server, env_url, "env", settings)
+
+            for h in range(hosts):
+                host = "host-%05d" % h
+                host_url = env_url + "hosts/" + host + "/"
+                ready = rng.random() < provisioned
+                apps = rng.sample(app_names, min(installed, len(app_names)))
+                server.add(env_url + "hosts/", {"name": host,
+                                                "description": "Host %d of %s" % (h, env),
+                                                "platform": "platform",
+                                                "distribution": "distribution",
+                                                "applications": apps,
+                                                "state": "READY" if ready else "DEFINED"})
+                fleet.hosts.append((org, env, host))
+                _add_settings(server, host_url, "host", settings)
+                _add_host_details(server, host_url, rng, apps, ready, changes,
+                                  compliance_errors, audit_entries)
+    return fleet
+
+
+def _add_settings(server, url, prefix, count):
+    for s in range(count):
+        server.add(url + "settings/", {"key": "%s_setting_%d" % (prefix, s),
+                                       "value": "value-%d" % s})
+
+
+def _add_audit(server, url, rng, count):
+    for i in range(count):
+        server.add(url + "audit/", {"timestamp": 1500000000000 + i * 1000,
+                                    "message": "Synthetic event %d" % i,
+                                    "username": "user%d" % rng.randint(0, 9),
+                                    "userFullName": "Synthetic User"})
+
+
+def _add_host_details(server, url, rng, apps, ready, changes, compliance_errors,
+                      audit_entries):
+    if ready:
+        server.add(url + "instance/", {"state": "RUNNING",
+                                       "properties": [{"key": "ip.eth0",
+                                                       "value": "10.%d.%d.%d" % (rng.randint(0, 255),
+                                                                                 rng.randint(0, 255),
+                                                                                 rng.randint(1, 254))}]})
+    server.add(url + "platform/", {"platform": "platform", "settings": []})
+    server.add(url + "distribution/", {"distribution": "distribution", "settings": []})
+
+    for app in apps:
+        server.add(url + "applications/", {"application": app, "settings": []})
+
+    if ready:
+        for c in range(changes):
+            server.add(url + "changes/", {
+                "description": "Synthetic change %d" % c,
+                "tasks": [{"orderNum": t, "description": "Task %d" % t, "status": rng.choice(_STATES),
+                           "error": "Synthetic error"}
+                          for t in range(3)]})
+
+        for c in range(min(compliance_errors, len(apps))):
+            server.add(url + "compliance/", {"application": apps[c],
+                                             "type": rng.choice(_RESOURCE_TYPES),
+                                             "name": "resource-%d" % c,
+                                             "currentState": {"present": False}})
+
+    _add_audit(server, url, rng, audit_entries)
+
+
+def _text(rng, size):
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel",
+             "{{ setting }}", "india", "juliet", "kilo", "lima", "mike"]
+    lines = []
+    length = 0
+    while length < size:
+        line = " ".join(rng.choice(words) for _ in range(8)) + "\n"
+        lines.append(line)
+        length += len(line)
+    return "".join(lines).encode('utf-8')[:size]
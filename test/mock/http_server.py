@@ -0,0 +1,77 @@
+import json, threading, time
+
+from future import standard_library
+standard_library.install_aliases()
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        self.server.requests.append(("GET", self.path))
+        path = self.path.split("?")[0]
+        if "slow" in path:
+            time.sleep(0.5)
+        if "missing" in path:
+            self._send(404, {"error": ["not found"]})
+        elif path.endswith("/"):
+            self._send(200, {"count": 3, "items": [{"name": "a"}, {"name": "b"}, {"name": "c"}]})
+        else:
+            self._send(200, {"name": path.split("/")[-1], "path": self.path})
+
+    def do_PUT(self):
+        self._echo("PUT")
+
+    def do_POST(self):
+        self._echo("POST")
+
+    def do_PATCH(self):
+        self._echo("PATCH")
+
+    def do_DELETE(self):
+        self.server.connections.add(self.client_address)
+        self.server.requests.append(("DELETE", self.path))
+        self.send_response(204)
+        self.end_headers()
+
+    def _echo(self, method):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self.server.connections.add(self.client_address)
+        self.server.requests.append((method, self.path))
+        self._send(200, json.loads(body.decode("utf-8")) if body else {})
+
+    def _send(self, code, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start_server(handler = KeepAliveHandler):
+    server = ThreadingServer(("127.0.0.1", 0), handler)
+    server.connections = set()
+    server.requests = []
+    thread = threading.Thread(target = server.serve_forever, kwargs = {"poll_interval": 0.05})
+    thread.daemon = True
+    thread.start()
+    return server
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+def api_url(server):
+    return "http://127.0.0.1:%d/api" % server.server_port
@@ -0,0 +1,813 @@
+# coding: utf-8
+"""
+In-process stand-in for ComodIT's REST API. L{StandInServer} keeps a resource
+tree in memory (organizations, environments, hosts and their instance,
+contexts, changes, compliance, audit logs, settings, files, store...) and
+serves the routes used by C{comodit_client.api}. It is meant for functional
+tests and benchmarks, see L{test.mock.fleet} for the generation of large
+synthetic fleets.
+
+Server side processing is simulated: provisioning a host or queuing a change
+(e.g. installing an application or running a live action) creates a change
+whose tasks stay PENDING for C{change_delay} seconds, a provisioned host
+becoming READY after C{provision_delay} seconds.
+
+Responses to GET requests carry an C{ETag} header, requests with a matching
+C{If-None-Match} header are answered with a 304 (Not Modified) response.
+"""
+
+from future import standard_library
+standard_library.install_aliases()
+
+# Following imports MUST come after call to install_aliases
+from builtins import object
+import gzip
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler
+
+from test.mock.http_server import ThreadingServer
+
+
+class _Spec(object):
+    """
+    Describes a collection: the field identifying its entities, the
+    collections of these entities and whether the collection holds a single
+    entity (e.g. a host's instance).
+    """
+
+    def __init__(self, kind, key = "name", children = None, singleton = False):
+        self.kind = kind
+        self.key = key
+        self.children = children or {}
+        self.singleton = singleton
+
+
+def _settings():
+    return _Spec("setting", "key")
+
+
+def _files():
+    return _Spec("file")
+
+
+def _parameters():
+    return _Spec("parameter", "key")
+
+
+def _context(kind, key = "name", singleton = False):
+    return _Spec(kind, key, {"settings": _settings()}, singleton)
+
+
+_HOST = _Spec("host", children = {
+    "settings": _settings(),
+    "instance": _Spec("instance", None, singleton = True),
+    "applications": _context("application_context", "application"),
+    "platform": _context("platform_context", singleton = True),
+    "distribution": _context("distribution_context", singleton = True),
+    "changes": _Spec("change", "orderNum"),
+    "compliance": _Spec("compliance", None),
+    "audit": _Spec("audit", "timestamp"),
+    "notification": _Spec("audit", "timestamp"),
+    "other": _Spec("audit", "timestamp"),
+    "alerts": _Spec("alert", "timestamp"),
+    "orchestrations": _Spec("orchestration"),
+})
+
+_ORGANIZATION = _Spec("organization", children = {
+    "settings": _settings(),
+    "applications": _Spec("application", children = {"files": _files(), "parameters": _parameters()}),
+    "platforms": _Spec("platform", children = {"files": _files(), "parameters": _parameters()}),
+    "distributions": _Spec("distribution", children = {"files": _files(), "parameters": _parameters()}),
+    "environments": _Spec("environment", children = {"settings": _settings(), "hosts": _HOST}),
+    "groups": _Spec("group"),
+    "jobs": _Spec("job"),
+    "orchestrations": _Spec("orchestration"),
+    "notifications": _Spec("notification"),
+    "applicationkeys": _Spec("applicationkey", "token"),
+    "audit": _Spec("audit", "timestamp"),
+    "purchased/applications": _Spec("purchased", "uuid"),
+    "purchased/distributions": _Spec("purchased", "uuid"),
+})
+
+_ROOT = {
+    "organizations": _ORGANIZATION,
+    "flavors": _Spec("flavor"),
+    "store/applications": _Spec("store", "uuid"),
+    "store/distributions": _Spec("store", "uuid"),
+}
+
+_MAX_KEY_SEGMENTS = 4
+
+# Collections mirrored by a list in the representation of their owner
+_LISTED = {"file": "files", "parameter": "parameters"}
+
+_RESOURCE_COLLECTIONS = {"serviceResource": "services", "fileResource": "files",
+                         "packageResource": "packages", "userResource": "users",
+                         "groupResource": "groups", "repoResource": "repos"}
+
+
+class NotFound(Exception):
+    pass
+
+
+class Conflict(Exception):
+    pass
+
+
+class _Collection(object):
+    def __init__(self, spec, parent):
+        self.spec = spec
+        self.parent = parent
+        self.items = OrderedDict()
+
+
+class _Entity(object):
+    def __init__(self, spec, parent_collection, doc):
+        self.spec = spec
+        self.parent_collection = parent_collection
+        self.parent = parent_collection.parent
+        self.doc = doc
+        self.content = None
+        self.ready_at = None
+        self.collections = dict((name, _Collection(child, self))
+                                for (name, child) in spec.children.items())
+
+    def ancestor(self, kind):
+        entity = self
+        while entity is not None and entity.spec.kind != kind:
+            entity = entity.parent
+        return entity
+
+
+class StandInServer(object):
+    """
+    In-memory ComodIT API server. Entities may be added directly with
+    L{add} (which is much faster than creating them through the API) and
+    inspected with L{get}.
+
+    @ivar requests: The (method, path) pairs of handled requests.
+    @ivar bytes_in: Number of request body bytes received.
+    @ivar bytes_out: Number of response body bytes sent.
+    @ivar failing_hosts: Names of the hosts whose changes fail (their tasks
+    end in ERROR state).
+    """
+
+    def __init__(self, change_delay = 0, provision_delay = 0, compression = False,
+                 patch = True):
+        """
+        Creates a server, see L{start}.
+
+        @param change_delay: Seconds during which the tasks of a queued change
+        stay PENDING.
+        @type change_delay: float
+        @param provision_delay: Seconds needed to provision a host.
+        @type provision_delay: float
+        @param compression: If True, responses are gzipped when client
+        accepts it.
+        @type compression: bool
+        @param patch: If True, entities may be partially updated with PATCH
+        requests (given fields replace entity's ones, null values delete
+        them). Otherwise, PATCH requests are rejected with status 405.
+        @type patch: bool
+        """
+
+        self.change_delay = change_delay
+        self.provision_delay = provision_delay
+        self.compression = compression
+        self.patch = patch
+        self.requests = []
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.failing_hosts = set()
+        self._root = dict((name, _Collection(spec, None)) for (name, spec) in _ROOT.items())
+        self._lock = threading.RLock()
+        self._order_num = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        API URL of a started server.
+
+        @rtype: string
+        """
+
+        return "http://127.0.0.1:%d/api" % self._server.server_port
+
+    def start(self):
+        """
+        Starts serving requests in a background thread.
+
+        @return: This server.
+        @rtype: L{StandInServer}
+        """
+
+        self._server = ThreadingServer(("127.0.0.1", 0), _Handler)
+        self._server.standin = self
+        self._thread = threading.Thread(target = self._server.serve_forever, kwargs = {"poll_interval": 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def add(self, path, doc, content = None):
+        """
+        Adds an entity to a collection.
+
+        @param path: Collection's path (e.g. C{organizations/o/environments/}).
+        @type path: string
+        @param doc: Entity's JSON representation.
+        @type doc: dict
+        @param content: File content (for file entities).
+        @type content: bytes
+        @return: Entity's identifier.
+        @rtype: string
+        """
+
+        with self._lock:
+            collection = self._resolve(path)[1]
+            entity = self._insert(collection, doc)
+            entity.content = content
+            return self._identifier(collection, entity.doc)
+
+    def get(self, path):
+        """
+        Provides an entity's JSON representation.
+
+        @param path: Entity's path (e.g. C{organizations/o/}).
+        @type path: string
+        @return: The representation or None if there is no such entity.
+        @rtype: dict
+        """
+
+        with self._lock:
+            try:
+                (kind, target, rest) = self._resolve(path)
+            except NotFound:
+                return None
+            if kind != "entity" or rest:
+                return None
+            self._tick(target)
+            return target.doc
+
+    def set_content(self, path, content):
+        """
+        Sets the content of a file entity.
+
+        @param path: Entity's path.
+        @type path: string
+        @type content: bytes
+        """
+
+        with self._lock:
+            (kind, target, rest) = self._resolve(path)
+            if kind != "entity" or rest:
+                raise NotFound()
+            target.content = content
+
+    def count(self, path):
+        """
+        Provides the number of entities in a collection.
+
+        @rtype: int
+        """
+
+        with self._lock:
+            return len(self._resolve(path)[1].items)
+
+    # Request handling
+
+    def log(self, method, path, size):
+        with self._lock:
+            self.requests.append((method, path))
+            self.bytes_in += size
+
+    def log_response(self, size):
+        with self._lock:
+            self.bytes_out += size
+
+    def handle(self, method, path, query, body):
+        """
+        Handles a request.
+
+        @param path: Request's path, relative to API's URL.
+        @param query: Parsed query string.
+        @type query: dict
+        @param body: Request's body.
+        @type body: bytes
+        @return: A (status, body, content type) tuple, body being a JSON
+        serializable object or bytes.
+        """
+
+        if method == "PATCH" and not self.patch:
+            return (405, {"error": ["Method not allowed"]}, None)
+
+        with self._lock:
+            try:
+                (kind, target, rest) = self._resolve(path)
+                if kind == "collection" and not rest:
+                    return self._handle_collection(method, target, query, body)
+                elif kind == "entity" and not rest:
+                    return self._handle_entity(method, target, query, body)
+                else:
+                    return self._handle_sub(method, kind, target, rest, query, body)
+            except NotFound:
+                return (404, {"error": ["Resource not found: " + path]}, None)
+            except Conflict as e:
+                return (409, {"error": [str(e)]}, None)
+            except ValueError as e:
+                return (400, {"error": [str(e)]}, None)
+
+    def _resolve(self, path):
+        """
+        Walks the resource tree.
+
+        @return: A tuple ("collection" or "entity", target, remaining segments).
+        @raise NotFound: If path does not reach any collection.
+        """
+
+        segments = [urllib.parse.unquote(s) for s in path.strip("/").split("/") if s]
+        collections = self._root
+        kind = None
+        target = None
+        i = 0
+        while i < len(segments):
+            if i + 1 < len(segments) and segments[i] + "/" + segments[i + 1] in collections:
+                name = segments[i] + "/" + segments[i + 1]
+            elif segments[i] in collections:
+                name = segments[i]
+            else:
+                break
+            collection = collections[name]
+            i += len(name.split("/"))
+            if collection.spec.singleton:
+                entity = collection.items.get("")
+                if entity is None or i == len(segments):
+                    return ("collection", collection, segments[i:])
+                (kind, target, collections) = ("entity", entity, entity.collections)
+                continue
+            if i == len(segments):
+                return ("collection", collection, [])
+            entity = None
+            for n in range(1, min(_MAX_KEY_SEGMENTS, len(segments) - i) + 1):
+                entity = collection.items.get("/".join(segments[i:i + n]))
+                if entity is not None:
+                    i += n
+                    break
+            if entity is None:
+                # Actions may be applied to collections (e.g. compliance/_rebuild)
+                if segments[i].startswith("_"):
+                    return ("collection", collection, segments[i:])
+                raise NotFound()
+            (kind, target, collections) = ("entity", entity, entity.collections)
+        if target is None:
+            raise NotFound()
+        return (kind, target, segments[i:])
+
+    def _handle_collection(self, method, collection, query, body):
+        if method == "GET":
+            items = [self._tick(e).doc for e in list(collection.items.values())]
+            if collection.spec.kind == "change" and query.get("show_processed", "").lower() != "true":
+                items = [c for c in items if _pending(c)]
+            if collection.spec.singleton:
+                if not items:
+                    raise NotFound()
+                return (200, items[0], None)
+            if "num" in query:
+                start = int(query.get("start", 0))
+                items = items[start:start + int(query["num"])]
+            return (200, {"count": len(items), "items": items}, None)
+        elif method == "POST":
+            entity = self._create(collection, _decode(body))
+            return (200, entity.doc, None)
+        elif method == "PUT" and collection.spec.singleton:
+            return self._handle_entity(method, self._single(collection), query, body)
+        elif method == "DELETE":
+            collection.items.clear()
+            self._changed(collection)
+            return (204, None, None)
+        raise ValueError("Unsupported method " + method)
+
+    def _handle_entity(self, method, entity, query, body):
+        collection = entity.parent_collection
+        if method == "GET":
+            return (200, self._tick(entity).doc, None)
+        elif method in ("PUT", "PATCH"):
+            doc = _decode(body)
+            if method == "PATCH":
+                changes = doc
+                doc = dict(entity.doc)
+                for (key, value) in changes.items():
+                    if value is None:
+                        doc.pop(key, None)
+                    else:
+                        doc[key] = value
+            old_id = self._identifier(collection, entity.doc)
+            new_id = self._identifier(collection, doc) if collection.spec.key in doc else old_id
+            if new_id != old_id:
+                if new_id in collection.items:
+                    raise Conflict("Entity " + new_id + " already exists")
+                collection.items = OrderedDict((new_id if k == old_id else k, v)
+                                               for (k, v) in collection.items.items())
+            entity.doc = self._complete(collection, entity, doc)
+            self._sync_children(entity)
+            self._changed(collection)
+            return (200, entity.doc, None)
+        elif method == "DELETE":
+            del collection.items[self._identifier(collection, entity.doc)]
+            self._changed(collection)
+            return (204, None, None)
+        raise ValueError("Unsupported method " + method)
+
+    def _handle_sub(self, method, kind, target, rest, query, body):
+        if rest[-1].startswith("_") and method in ("PUT", "POST"):
+            return self._action(kind, target, rest, query, body)
+        if kind == "collection":
+            if target.spec.kind == "instance" and rest == ["properties"] and method == "POST":
+                # Instance creation with properties
+                properties = _decode(body)
+                entity = self._create(target, {"properties": [{"key": k, "value": v} for (k, v) in properties.items()]})
+                return (200, entity.doc, None)
+            raise NotFound()
+
+        if rest in (["content"], ["thumb"]):
+            if method == "GET":
+                if target.content is not None:
+                    return (200, target.content, "application/octet-stream")
+                elif rest == ["thumb"]:
+                    # Entities always have a (default, here empty) thumbnail
+                    return (200, b"", "image/png")
+                raise NotFound()
+            elif method in ("PUT", "POST"):
+                target.content = body
+                return (200, {}, None)
+        elif method == "GET" and len(rest) in (2, 3) and rest[0] == "files":
+            return self._render(target, rest)
+        elif method == "GET" and rest == ["vnc"]:
+            return (200, {"hostname": "127.0.0.1", "port": 5900}, None)
+        elif method == "GET" and rest == ["files"]:
+            return (200, ("Content of " + query.get("path", "")).encode('utf-8'), "application/octet-stream")
+        elif method == "GET" and rest[0] == "status":
+            return (200, {"status": "OK"}, None)
+        elif method == "PUT" and len(rest) == 2 and rest[0] == "packages":
+            change = self._queue_change(target.ancestor("host"), "Update package " + rest[1])
+            return (200, {"changeId": change.doc["key"]}, None)
+        raise NotFound()
+
+    def _action(self, kind, target, rest, query, body):
+        action = rest[-1]
+        if kind == "collection":
+            # E.g. compliance/_rebuild
+            return (200, {}, None)
+
+        if action == "_clone" and len(rest) == 1:
+            collection = target.parent_collection
+            doc = json.loads(json.dumps(target.doc))
+            key = collection.spec.key
+            doc[key] = query.get("name", doc[key] + "-clone")
+            doc.pop("uuid", None)
+            if target.spec.kind == "host":
+                doc["state"] = "DEFINED"
+            return (200, self._create(collection, doc).doc, None)
+
+        if target.spec.kind == "instance" and len(rest) == 1:
+            host = target.ancestor("host")
+            states = {"_start": "RUNNING", "_pause": "PAUSED", "_resume": "RUNNING",
+                      "_stop": "STOPPED", "_off": "STOPPED"}
+            if action in states:
+                target.doc["state"] = states[action]
+            elif action in ("_forget", "_delete"):
+                del target.parent_collection.items[""]
+                host.doc["state"] = "DEFINED"
+            return (202, None, None)
+
+        host = target.ancestor("host")
+        if host is not None:
+            change = self._queue_change(host, "Live action " + "/".join(rest))
+            key = change.doc["key"]
+            if rest[0] == "handler":
+                return (200, key.encode('utf-8'), "text/plain")
+            elif rest[0] == "orchestration":
+                return (200, [key], None)
+            return (200, {"changeId": key}, None)
+        return (200, {}, None)
+
+    def _render(self, context, rest):
+        org = context.ancestor("organization")
+        collection = {"application_context": "applications",
+                      "platform_context": "platforms",
+                      "distribution_context": "distributions"}.get(context.spec.kind)
+        field = {"application_context": "application",
+                 "platform_context": "platform",
+                 "distribution_context": "distribution"}.get(context.spec.kind)
+        if collection is None:
+            raise NotFound()
+        entity = org.collections[collection].items.get(context.doc.get(field))
+        f = entity.collections["files"].items.get(rest[1]) if entity else None
+        if f is None or f.content is None:
+            raise NotFound()
+        if len(rest) == 3:
+            if rest[2] != "link":
+                raise NotFound()
+            return (200, {"url": self.url + "/files/" + str(uuid.uuid4())}, None)
+        return (200, f.content, "text/plain")
+
+    # Tree manipulation
+
+    def _create(self, collection, doc):
+        entity = self._insert(collection, doc)
+        kind = collection.spec.kind
+        if kind == "instance":
+            host = entity.ancestor("host")
+            host.doc["state"] = "PROVISIONING"
+            host.ready_at = time.time() + self.provision_delay
+            entity.doc.setdefault("state", "PENDING")
+            self._queue_change(host, "Provision host")
+            self._tick(host)
+        elif kind == "host":
+            for app in doc.get("applications") or []:
+                self._insert(entity.collections["applications"], {"application": app, "settings": []})
+            for field in ("platform", "distribution"):
+                if doc.get(field):
+                    self._insert(entity.collections[field], {field: doc[field], "settings": []})
+        elif kind == "application_context":
+            self._queue_change(entity.ancestor("host"), "Install application " + str(doc.get("application")))
+        return entity
+
+    def _insert(self, collection, doc):
+        spec = collection.spec
+        if spec.singleton:
+            if "" in collection.items:
+                raise Conflict("Entity already exists")
+            identifier = ""
+        else:
+            if spec.key == "orderNum" and "orderNum" not in doc:
+                self._order_num += 1
+                doc["orderNum"] = self._order_num
+            elif spec.key == "uuid" and "uuid" not in doc:
+                doc["uuid"] = str(uuid.uuid4())
+            elif spec.key == "timestamp" and "timestamp" not in doc:
+                doc["timestamp"] = int(time.time() * 1000) * 1000 + len(collection.items)
+            elif spec.key == "token" and "token" not in doc:
+                doc["token"] = uuid.uuid4().hex
+            identifier = self._identifier(collection, doc)
+            if not identifier:
+                raise ValueError("Missing field " + str(spec.key))
+            if identifier in collection.items:
+                raise Conflict("Entity " + identifier + " already exists")
+        entity = _Entity(spec, collection, doc)
+        entity.doc = self._complete(collection, entity, doc)
+        collection.items[identifier] = entity
+        self._sync_children(entity)
+        self._changed(collection)
+        return entity
+
+    def _single(self, collection):
+        entity = collection.items.get("")
+        if entity is None:
+            raise NotFound()
+        return entity
+
+    def _identifier(self, collection, doc):
+        spec = collection.spec
+        if spec.singleton:
+            return ""
+        elif spec.kind == "compliance":
+            return "applications/%s/%s/%s" % (doc.get("application"),
+                                              _RESOURCE_COLLECTIONS.get(doc.get("type")), doc.get("name"))
+        value = doc.get(spec.key)
+        return None if value is None else str(value)
+
+    def _complete(self, collection, entity, doc):
+        """
+        Sets server-managed fields.
+        """
+
+        previous = entity.doc if entity.doc is not doc else {}
+        kind = collection.spec.kind
+        if kind in ("organization", "environment", "host", "application", "platform", "distribution"):
+            doc["uuid"] = previous.get("uuid") or doc.get("uuid") or str(uuid.uuid4())
+        if kind == "host":
+            doc["state"] = previous.get("state") or doc.get("state") or "DEFINED"
+            doc["environment"] = collection.parent.doc["name"]
+            doc["organization"] = collection.parent.parent.doc["name"]
+        elif kind == "environment":
+            doc["organization"] = collection.parent.doc["name"]
+        elif kind == "change":
+            doc.setdefault("key", str(uuid.uuid4()))
+            doc.setdefault("tasks", [])
+        return doc
+
+    def _changed(self, collection):
+        """
+        Updates the owner of a modified collection.
+        """
+
+        kind = collection.spec.kind
+        if kind == "instance" and not collection.items:
+            collection.parent.doc["state"] = "DEFINED"
+        elif kind == "application_context":
+            collection.parent.doc["applications"] = list(collection.items.keys())
+        elif kind in _LISTED and collection.parent is not None:
+            collection.parent.doc[_LISTED[kind]] = [e.doc for e in collection.items.values()]
+
+    def _sync_children(self, entity):
+        """
+        Updates the file and parameter collections of an entity from the lists
+        of its representation.
+        """
+
+        for (kind, field) in _LISTED.items():
+            if field not in entity.collections or field not in entity.doc:
+                continue
+            collection = entity.collections[field]
+            items = OrderedDict()
+            for doc in entity.doc[field] or []:
+                identifier = str(doc.get(collection.spec.key))
+                child = collection.items.get(identifier)
+                if child is None:
+                    child = _Entity(collection.spec, collection, doc)
+                child.doc = doc
+                items[identifier] = child
+            collection.items = items
+
+    def _queue_change(self, host, description):
+        """
+        Queues a change on a host. Its tasks stay PENDING for C{change_delay}
+        seconds.
+        """
+
+        changes = host.collections["changes"]
+        change = self._insert(changes, {"description": description,
+                                        "tasks": [{"orderNum": 0, "description": description,
+                                                   "status": "PENDING"}]})
+        change.ready_at = time.time() + self.change_delay
+        self._tick(change)
+        return change
+
+    def _tick(self, entity):
+        """
+        Applies simulated server-side processing to an entity.
+        """
+
+        if entity.spec.kind == "instance":
+            # Instance's state is updated with host's one
+            self._tick(entity.ancestor("host"))
+        if entity.ready_at is not None and entity.ready_at <= time.time():
+            entity.ready_at = None
+            kind = entity.spec.kind
+            if kind == "change":
+                failed = entity.ancestor("host").doc["name"] in self.failing_hosts
+                for task in entity.doc["tasks"]:
+                    if task["status"] == "PENDING":
+                        task["status"] = "ERROR" if failed else "OK"
+                        if failed:
+                            task["error"] = "Task failed"
+            elif kind == "host" and entity.doc["state"] == "PROVISIONING":
+                entity.doc["state"] = "READY"
+                instance = entity.collections["instance"].items.get("")
+                if instance is not None:
+                    instance.doc["state"] = "RUNNING"
+                    properties = instance.doc.setdefault("properties", [])
+                    properties.append({"key": "ip.eth0", "value": _address(entity.doc["name"])})
+        return entity
+
+
+def _pending(change):
+    for task in change.get("tasks", []):
+        if task.get("status") == "PENDING":
+            return True
+    return False
+
+
+def _address(name):
+    value = sum(bytearray(name.encode('utf-8')))
+    return "10.0.%d.%d" % ((value >> 8) % 256, value % 254 + 1)
+
+
+def _decode(body):
+    if not body:
+        return {}
+    data = json.loads(body.decode('utf-8'))
+    if not isinstance(data, dict):
+        raise ValueError("JSON object expected")
+    return data
+
+
+_BOUNDARY = re.compile(b'boundary="?([^";]+)"?')
+
+
+def _extract_file(body, content_type):
+    """
+    Extracts the uploaded file from a multipart/form-data body.
+    """
+
+    match = _BOUNDARY.search(content_type.encode('latin-1'))
+    if match is None:
+        return body
+    delimiter = b"--" + match.group(1)
+    for part in body.split(delimiter):
+        (head, sep, content) = part.partition(b"\r\n\r\n")
+        if sep and b"filename=" in head:
+            if content.endswith(b"\r\n"):
+                content = content[:-2]
+            return content
+    return body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body are written separately, Nagle's algorithm would
+    # delay the latter.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method):
+        standin = self.server.standin
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.GzipFile(fileobj = io.BytesIO(body)).read()
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            body = _extract_file(body, content_type)
+
+        parsed = urllib.parse.urlsplit(self.path)
+        path = parsed.path
+        if path.startswith("/api/"):
+            path = path[len("/api/"):]
+        query = dict(urllib.parse.parse_qsl(parsed.query))
+        standin.log(method, self.path, len(body))
+
+        (status, data, data_type) = standin.handle(method, path, query, body)
+        if data is None:
+            payload = b""
+        elif data_type is None:
+            payload = json.dumps(data).encode('utf-8')
+            data_type = "application/json"
+        else:
+            payload = data
+
+        etag = None
+        if method == "GET" and status == 200:
+            etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                standin.log_response(0)
+                return
+
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if data_type is not None:
+            self.send_header("Content-Type", data_type)
+        if standin.compression and len(payload) > 1024 and \
+           "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        standin.log_response(len(payload))
+
+    def log_message(self, *args):
+        pass
+
@@ -0,0 +1,131 @@
+import unittest, asyncio
+
+from future import standard_library
+standard_library.install_aliases()
+from urllib.error import URLError
+
+from comodit_client.api.aio import AsyncClient
+from comodit_client.api.collection import EntityNotFoundException
+from comodit_client.api.host import Host
+from comodit_client.rest.aio import AsyncHttpClient
+from comodit_client.rest.exceptions import ApiException
+from test.mock.http_server import start_server, stop_server, api_url
+from test.rest.pooltests import DroppingHandler
+
+
+class AsyncHttpClientTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server()
+
+    def tearDown(self):
+        stop_server(self._server)
+
+    def test_crud(self):
+        async def run():
+            async with AsyncHttpClient(api_url(self._server), "user", "pass", None) as client:
+                self.assertEqual("/api/orgs/o", (await client.read("orgs/o"))["path"])
+                self.assertEqual({"name": "x"}, await client.create("orgs/", {"name": "x"}))
+                self.assertEqual({"name": "y"}, await client.update("orgs/x", {"name": "y"}))
+                await client.delete("orgs/y")
+                raw = await client.update("orgs/y/_start", decode = False)
+                self.assertEqual(200, raw.getcode())
+        asyncio.run(run())
+        self.assertEqual(1, len(self._server.connections))
+
+    def test_patch_and_items(self):
+        async def run():
+            async with AsyncHttpClient(api_url(self._server), "user", "pass", None) as client:
+                self.assertEqual({"name": "z"}, await client.patch("orgs/x", {"name": "z"}))
+                return [i["name"] async for i in client.read_items("orgs/")]
+        self.assertEqual(["a", "b", "c"], asyncio.run(run()))
+        self.assertEqual(("PATCH", "/api/orgs/x"), self._server.requests[0])
+
+    def test_no_blocking_methods(self):
+        client = AsyncHttpClient(api_url(self._server), "user", "pass", None)
+        for name in ("_urlopen", "_cached_urlopen", "_open", "can_stream"):
+            self.assertFalse(hasattr(client, name))
+
+    def test_timeout(self):
+        async def run():
+            async with AsyncHttpClient(api_url(self._server), "user", "pass", None, timeout = 0.1) as client:
+                await client.read("slow")
+        self.assertRaises(URLError, asyncio.run, run())
+
+    def test_error_mapping(self):
+        async def run():
+            async with AsyncHttpClient(api_url(self._server), "user", "pass", None) as client:
+                await client.read("missing")
+        try:
+            asyncio.run(run())
+        except ApiException as e:
+            self.assertEqual(404, e.code)
+            self.assertEqual("[not found]", e.message)
+            return
+        self.assertFalse(True)
+
+    def test_concurrent_requests_bounded(self):
+        async def run():
+            async with AsyncHttpClient(api_url(self._server), "user", "pass", None, pool_size = 3) as client:
+                return await asyncio.gather(*[client.read("orgs/" + str(i)) for i in range(50)])
+        results = asyncio.run(run())
+        self.assertEqual(["/api/orgs/" + str(i) for i in range(50)], [r["path"] for r in results])
+        self.assertTrue(len(self._server.connections) <= 3)
+
+
+class AsyncHttpClientResendTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server(DroppingHandler)
+
+    def tearDown(self):
+        stop_server(self._server)
+
+    def _send(self, send):
+        async def run():
+            async with AsyncHttpClient(api_url(self._server), "user", "pass", None, pool_size = 1) as client:
+                await client.read("orgs")
+                await send(client)
+        asyncio.run(run())
+
+    def _count(self, path):
+        return len([r for r in self._server.requests if r[1].endswith(path)])
+
+    def test_post_not_resent(self):
+        self.assertRaises(URLError, self._send, lambda client: client.create("drop", {}))
+        self.assertEqual(1, self._count("/drop"))
+
+    def test_get_resent(self):
+        self.assertRaises(URLError, self._send, lambda client: client.read("drop"))
+        self.assertEqual(2, self._count("/drop"))
+
+
+class AsyncClientTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server()
+
+    def tearDown(self):
+        stop_server(self._server)
+
+    def test_get_host(self):
+        async def run():
+            async with AsyncClient(api_url(self._server), "user", "pass", None) as client:
+                return await client.get_host("o", "e", "h")
+        host = asyncio.run(run())
+        self.assertTrue(isinstance(host, Host))
+        self.assertEqual("h", host.name)
+        self.assertEqual([("GET", "/api/organizations/o/environments/e/hosts/h")], self._server.requests)
+
+    def test_list(self):
+        async def run():
+            async with AsyncClient(api_url(self._server), "user", "pass", None) as client:
+                return [e.name async for e in client.wrap(client.sync_client.organizations().new("o").environments())]
+        self.assertEqual(["a", "b", "c"], asyncio.run(run()))
+
+    def test_not_found(self):
+        async def run():
+            async with AsyncClient(api_url(self._server), "user", "pass", None) as client:
+                await client.get_organization("missing")
+        self.assertRaises(EntityNotFoundException, asyncio.run, run())
+
+
+if __name__ == '__main__':
+    unittest.main()
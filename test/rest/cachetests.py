@@ -0,0 +1,116 @@
+import unittest, json, os, shutil, stat, tempfile
+
+from comodit_client.rest.client import HttpClient
+from test.mock.http_server import KeepAliveHandler, start_server, stop_server, api_url
+
+
+class ETagHandler(KeepAliveHandler):
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path))
+        etag = '"%d"' % self.server.version
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = json.dumps({"path": self.path, "version": self.server.version}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self):
+        self.server.version += 1
+        KeepAliveHandler.do_PUT(self)
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server(ETagHandler)
+        self._server.version = 0
+        self._dir = tempfile.mkdtemp()
+        self._client = HttpClient(api_url(self._server), "user", "pass", None, cache_size = 10)
+
+    def tearDown(self):
+        self._client.close()
+        stop_server(self._server)
+        shutil.rmtree(self._dir)
+
+    def test_revalidation(self):
+        first = self._client.read("orgs/o")
+        second = self._client.read("orgs/o")
+        self.assertEqual(first, second)
+        self.assertEqual({"hits": 1, "misses": 1, "invalidations": 0, "entries": 1}, self._client.cache.stats())
+
+    def test_undecoded_read(self):
+        self._client.read("orgs/o")
+        raw = self._client.read("orgs/o", decode = False)
+        self.assertEqual(200, raw.getcode())
+        self.assertEqual("/api/orgs/o", json.loads(raw.read().decode("utf-8"))["path"])
+
+    def test_streamed_listing_not_cached(self):
+        list(self._client.read_items("orgs/o/hosts/"))
+        list(self._client.read_items("orgs/o/hosts/"))
+        self.assertEqual(2, len(self._server.requests))
+        self.assertEqual(0, self._client.cache.stats()["entries"])
+
+    def test_update_invalidates(self):
+        self._client.read("orgs/o/hosts/")
+        self._client.read("orgs/o/hosts/h")
+        self._client.read("orgs/o/hosts/h/instance/")
+        self._client.read("orgs/o/environments/")
+        self._client.update("orgs/o/hosts/h", {"name": "h"})
+        self.assertEqual(3, self._client.cache.stats()["invalidations"])
+        self.assertEqual(1, self._client.read("orgs/o/hosts/h")["version"])
+        self.assertEqual(2, self._client.cache.stats()["entries"])
+
+    def test_without_pool(self):
+        client = HttpClient(self._client.endpoint, "user", "pass", None, pool_size = 0, cache_size = 10)
+        client.read("orgs/o")
+        self.assertEqual("/api/orgs/o", client.read("orgs/o")["path"])
+        self.assertEqual(1, client.cache.stats()["hits"])
+        client.close()
+
+    def test_disk_store(self):
+        client = HttpClient(self._client.endpoint, "user", "pass", None, cache_size = 10, cache_dir = self._dir)
+        client.read("orgs/o")
+        client.close()
+        client = HttpClient(self._client.endpoint, "user", "pass", None, cache_size = 10, cache_dir = self._dir)
+        self.assertEqual("/api/orgs/o", client.read("orgs/o")["path"])
+        self.assertEqual(1, client.cache.stats()["hits"])
+        client.update("orgs/o", {"name": "o"})
+        self.assertEqual(0, client.cache.stats()["entries"])
+        client.close()
+        client = HttpClient(self._client.endpoint, "user", "pass", None, cache_size = 10, cache_dir = self._dir)
+        client.read("orgs/o")
+        self.assertEqual(0, client.cache.stats()["hits"])
+        client.close()
+
+    def test_disk_permissions(self):
+        cache_dir = os.path.join(self._dir, "cache")
+        client = HttpClient(self._client.endpoint, "user", "pass", None, cache_size = 10, cache_dir = cache_dir)
+        client.read("orgs/o")
+        client.close()
+        self.assertFalse(stat.S_IMODE(os.stat(cache_dir).st_mode) & 0o077)
+        names = sorted(os.listdir(cache_dir))
+        self.assertEqual([".body", ".json"], [os.path.splitext(n)[1] for n in names])
+        for name in names:
+            self.assertEqual(0o600, stat.S_IMODE(os.stat(os.path.join(cache_dir, name)).st_mode))
+
+    def test_mismatched_body(self):
+        client = HttpClient(self._client.endpoint, "user", "pass", None, cache_size = 10, cache_dir = self._dir)
+        client.read("orgs/o")
+        client.close()
+        for name in os.listdir(self._dir):
+            if name.endswith(".body"):
+                with open(os.path.join(self._dir, name), "wb") as f:
+                    f.write(b"{}")
+        client = HttpClient(self._client.endpoint, "user", "pass", None, cache_size = 10, cache_dir = self._dir)
+        self.assertEqual("/api/orgs/o", client.read("orgs/o")["path"])
+        self.assertEqual(0, client.cache.stats()["hits"])
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest, os, shutil, tempfile
+
+from comodit_client.rest.cassette import Cassette, RecordingTransport, ReplayTransport
+from comodit_client.rest.client import HttpClient
+from comodit_client.rest.exceptions import ApiException
+from comodit_client.rest.pool import ConnectionPool
+from test.mock.http_server import start_server, stop_server, api_url
+from test.rest.compressiontests import CompressingHandler
+
+
+class RecordingReplayTransport(ReplayTransport):
+    def __init__(self, *args, **kwargs):
+        super(RecordingReplayTransport, self).__init__(*args, **kwargs)
+        self.delays = []
+
+    def _sleep(self, delay):
+        self.delays.append(delay)
+
+
+class CassetteTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _record(self, path, handler = None):
+        server = start_server(handler) if handler else start_server()
+        if handler:
+            server.encoding = "gzip"
+            server.response_encodings = []
+            server.request_encodings = []
+        client = HttpClient(api_url(server), "user", "pass", None,
+                            transport = RecordingTransport(Cassette(path), ConnectionPool()))
+        try:
+            results = [client.read("orgs/o"),
+                       client.update("orgs/o", {"name": "p"}),
+                       client.update("orgs/o", {"name": "q"}),
+                       client.read("orgs/")]
+            self.assertRaises(ApiException, client.read, "orgs/missing")
+            client.delete("orgs/o")
+        finally:
+            client.close()
+            stop_server(server)
+        return results
+
+    def _replay(self, path, **kwargs):
+        transport = RecordingReplayTransport(Cassette(path).load(), **kwargs)
+        return (HttpClient("http://replay.invalid/api", "user", "pass", None, transport = transport), transport)
+
+    def test_record_replay(self):
+        path = os.path.join(self._dir, "cassette.jsonl")
+        recorded = self._record(path)
+        (client, transport) = self._replay(path)
+        self.assertEqual(recorded[0], client.read("orgs/o"))
+        self.assertEqual(recorded[1], client.update("orgs/o", {"name": "p"}))
+        self.assertEqual(recorded[2], client.update("orgs/o", {"name": "q"}))
+        # Last matching exchange is replayed again
+        self.assertEqual(recorded[2], client.update("orgs/o", {"name": "p"}))
+        self.assertEqual(recorded[3], client.read("orgs/"))
+        with self.assertRaises(ApiException) as cm:
+            client.read("orgs/missing")
+        self.assertEqual(404, cm.exception.code)
+        client.delete("orgs/o")
+        self.assertEqual([], transport.delays)
+        self.assertRaises(Exception, client.read, "orgs/unknown")
+
+        with open(path) as f:
+            self.assertFalse("Authorization" in f.read())
+
+    def test_match_body_and_network_simulation(self):
+        path = os.path.join(self._dir, "cassette.jsonl.gz")
+        recorded = self._record(path, CompressingHandler)
+        (client, transport) = self._replay(path, latency = 0.05, bandwidth = 1000, match_body = True)
+        self.assertEqual(recorded[2], client.update("orgs/o", {"name": "q"}))
+        self.assertEqual(recorded[1], client.update("orgs/o", {"name": "p"}))
+        self.assertEqual(2, len(transport.delays))
+        self.assertTrue(transport.delays[0] > 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest, asyncio, gzip, json, zlib
+
+from comodit_client.rest.aio import AsyncHttpClient
+from comodit_client.rest.client import HttpClient
+from comodit_client.rest.compression import decompress
+from test.mock.http_server import KeepAliveHandler, start_server, stop_server, api_url
+
+
+class CompressingHandler(KeepAliveHandler):
+    def _send(self, code, data):
+        body = json.dumps(data).encode("utf-8")
+        accepted = self.headers.get("Accept-Encoding", "")
+        encoding = None
+        if "gzip" in accepted and self.server.encoding == "gzip":
+            body = gzip.compress(body)
+            encoding = "gzip"
+        elif "deflate" in accepted and self.server.encoding == "deflate":
+            compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            encoding = "deflate"
+        self.server.response_encodings.append(encoding)
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _echo(self, method):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self.server.request_encodings.append(self.headers.get("Content-Encoding"))
+        body = decompress(body, self.headers.get("Content-Encoding"))
+        self._send(200, json.loads(body.decode("utf-8")))
+
+
+class CompressionTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server(CompressingHandler)
+        self._server.encoding = "gzip"
+        self._server.response_encodings = []
+        self._server.request_encodings = []
+        self._item = {"items": [{"name": "host-%d" % i, "state": "READY"} for i in range(200)]}
+
+    def tearDown(self):
+        stop_server(self._server)
+
+    def test_gzip_response(self):
+        client = HttpClient(api_url(self._server), "user", "pass", None)
+        self.assertEqual("/api/orgs/o", client.read("orgs/o")["path"])
+        self.assertEqual(["gzip"], self._server.response_encodings)
+        client.close()
+
+    def test_gzip_response_without_pool(self):
+        client = HttpClient(api_url(self._server), "user", "pass", None, pool_size = 0)
+        self.assertEqual("/api/orgs/o", client.read("orgs/o")["path"])
+        self.assertEqual(["gzip"], self._server.response_encodings)
+
+    def test_raw_deflate_response(self):
+        self._server.encoding = "deflate"
+        client = HttpClient(api_url(self._server), "user", "pass", None)
+        raw = client.read("orgs/o", decode = False)
+        self.assertEqual(b'{"name": ', raw.read(9))
+        self.assertEqual("/api/orgs/o", json.loads('{"name": ' + raw.read().decode("utf-8"))["path"])
+        client.close()
+
+    def test_compression_disabled(self):
+        client = HttpClient(api_url(self._server), "user", "pass", None, compression = False)
+        client.read("orgs/o")
+        self.assertEqual([None], self._server.response_encodings)
+        client.close()
+
+    def test_request_compression(self):
+        client = HttpClient(api_url(self._server), "user", "pass", None, compress_min_size = 1024)
+        self.assertEqual(self._item, client.update("orgs/o", item = self._item))
+        self.assertEqual({"name": "o"}, client.update("orgs/o", item = {"name": "o"}))
+        self.assertEqual(["gzip", None], self._server.request_encodings)
+        client.close()
+
+    def test_async(self):
+        async def run():
+            async with AsyncHttpClient(api_url(self._server), "user", "pass", None, compress_min_size = 1024) as client:
+                self.assertEqual("/api/orgs/o", (await client.read("orgs/o"))["path"])
+                self.assertEqual(self._item, await client.create("orgs/", self._item))
+        asyncio.run(run())
+        self.assertEqual(["gzip", "gzip"], self._server.response_encodings)
+        self.assertEqual(["gzip"], self._server.request_encodings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest, threading
+
+from comodit_client.rest.client import HttpClient
+from comodit_client.rest.exceptions import ApiException
+from comodit_client.util import urllibx
+from test.mock.http_server import start_server, stop_server, api_url
+from test.rest.compressiontests import CompressingHandler
+
+
+class CurlTransportTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server()
+        self._client = HttpClient(api_url(self._server), "user", "pass", None, transport = "curl")
+
+    def tearDown(self):
+        self._client.close()
+        stop_server(self._server)
+
+    def test_crud(self):
+        self.assertEqual("o", self._client.read("orgs/o")["name"])
+        self.assertEqual({"name": "p"}, self._client.create("orgs/", {"name": "p"}))
+        self.assertEqual({}, self._client.create("orgs/"))
+        self.assertEqual({"name": "q"}, self._client.update("orgs/o", {"name": "q"}))
+        self._client.delete("orgs/o")
+        self.assertEqual(["GET", "POST", "POST", "PUT", "DELETE"], [r[0] for r in self._server.requests])
+        self.assertEqual(1, len(self._server.connections))
+
+    def test_error(self):
+        with self.assertRaises(ApiException) as cm:
+            self._client.read("orgs/missing")
+        self.assertEqual(404, cm.exception.code)
+        self.assertEqual("[not found]", cm.exception.message)
+
+    def test_concurrent_requests(self):
+        results = []
+        threads = [threading.Thread(target = lambda i = i: results.append(self._client.read("orgs/o%d" % i)["name"]))
+                   for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted("o%d" % i for i in range(8)), sorted(results))
+
+    def test_urlopen_many(self):
+        requests = [urllibx.RequestWithMethod(self._client.endpoint + "/orgs/" + name, method = "GET")
+                    for name in ("a", "missing", "b")]
+        results = self._client._pool.urlopen_many(requests)
+        self.assertEqual(200, results[0].getcode())
+        self.assertEqual(404, results[1].code)
+        self.assertEqual(b'{"name": "b", "path": "/api/orgs/b"}', results[2].read())
+
+    def test_compression(self):
+        server = start_server(CompressingHandler)
+        server.encoding = "gzip"
+        server.response_encodings = []
+        client = HttpClient(api_url(server), "user", "pass", None, transport = "curl")
+        try:
+            self.assertEqual("o", client.read("orgs/o")["name"])
+            self.assertEqual(["gzip"], server.response_encodings)
+        finally:
+            client.close()
+            stop_server(server)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest, io
+
+from comodit_client.api import Client
+from comodit_client.rest.exceptions import ApiException
+from comodit_client.rest.instrumentation import TimingCollector, RequestEvent, url_template
+from test.mock.http_server import start_server, stop_server, api_url
+
+
+class InstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server()
+        self._client = Client(api_url(self._server), "user", "pass", None)
+        self._events = []
+        self._client.add_request_listener(self._events.append)
+
+    def tearDown(self):
+        self._client._http_client.close()
+        stop_server(self._server)
+
+    def test_url_template(self):
+        endpoint = "http://h/api"
+        self.assertEqual("organizations/{id}/environments/{id}/hosts/",
+                         url_template(endpoint + "/organizations/o/environments/e/hosts/?x=1", endpoint))
+        self.assertEqual("organizations/{id}/environments/{id}/hosts/{id}/instance/_start",
+                         url_template(endpoint + "/organizations/o/environments/e/hosts/h/instance/_start", endpoint))
+        self.assertEqual("api/organizations/{id}/environments/{id}/hosts/{id}/changes/{id}",
+                         url_template("http://h/api/organizations/o/environments/e/hosts/h/changes/12"))
+
+    def test_events(self):
+        http_client = self._client._http_client
+        http_client.read("organizations/o")
+        http_client.update("organizations/o", {"name": "o"})
+        http_client.delete("organizations/o")
+        self.assertRaises(ApiException, http_client.read, "organizations/missing")
+
+        self.assertEqual([("GET", 200), ("PUT", 200), ("DELETE", 204), ("GET", 404)],
+                         [(e.method, e.status) for e in self._events])
+        (get, put, delete, error) = self._events
+        self.assertEqual("organizations/{id}", get.template)
+        self.assertEqual(len(b'{"name": "o", "path": "/api/organizations/o"}'), get.bytes_in)
+        self.assertEqual(len(http_client.json_codec.dumps({"name": "o"})), put.bytes_out)
+        self.assertTrue(0 <= get.time_to_first_byte <= get.total_time)
+        self.assertEqual(None, get.error)
+        self.assertEqual("[not found]", error.error)
+
+    def test_iter_and_removal(self):
+        names = [o.name for o in self._client.organizations().iter()]
+        self.assertEqual(3, len(names))
+        self.assertEqual(1, len(self._events))
+        self._client.remove_request_listener(self._events.append)
+        self._client.organizations().list()
+        self.assertEqual(1, len(self._events))
+
+    def test_timing_collector(self):
+        collector = TimingCollector()
+        for duration in [0.1, 0.2, 0.3, 0.4, 1.0]:
+            event = RequestEvent("GET", "url", "hosts/{id}", 0)
+            event.total_time = duration
+            collector(event)
+        (row,) = collector.summary()
+        self.assertEqual(5, row["count"])
+        self.assertEqual(0.3, row["p50"])
+        self.assertEqual(1.0, row["p95"])
+        self.assertEqual(1.0, row["max"])
+        output = io.StringIO()
+        collector.print_summary(output)
+        self.assertTrue("hosts/{id}" in output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest, threading, time
+
+from comodit_client.api import Client
+from comodit_client.rest.limiter import RateLimiter, TokenBucket
+from test.mock.http_server import KeepAliveHandler, start_server, stop_server, api_url
+
+
+class SlowHandler(KeepAliveHandler):
+    def do_GET(self):
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        time.sleep(0.05)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        KeepAliveHandler.do_GET(self)
+
+
+class RecordingLimiter(RateLimiter):
+    def __init__(self, *args, **kwargs):
+        super(RecordingLimiter, self).__init__(*args, **kwargs)
+        self.delays = []
+
+    def _sleep(self, delay):
+        self.delays.append(delay)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server(SlowHandler)
+        self._server.lock = threading.Lock()
+        self._server.in_flight = 0
+        self._server.max_in_flight = 0
+
+    def tearDown(self):
+        stop_server(self._server)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(10, 2)
+        self.assertEqual(0, bucket.reserve())
+        self.assertEqual(0, bucket.reserve())
+        self.assertAlmostEqual(0.1, bucket.reserve(), places = 2)
+        self.assertAlmostEqual(0.2, bucket.reserve(), places = 2)
+
+    def test_method_rate(self):
+        limiter = RecordingLimiter(rate = 100)
+        limiter.set_method_limit("put", rate = 1)
+        client = Client(api_url(self._server), "user", "pass", None, rate_limiter = limiter)
+        client._http_client.read("orgs/o")
+        client._http_client.read("orgs/o")
+        self.assertEqual([], limiter.delays)
+        client._http_client.update("orgs/o", {"name": "o"})
+        client._http_client.update("orgs/o", {"name": "o"})
+        self.assertEqual(1, len(limiter.delays))
+        self.assertEqual(4, client.get_rate_limiter_stats()["requests"])
+        client._http_client.close()
+
+    def test_max_in_flight(self):
+        limiter = RateLimiter(max_in_flight = 2)
+        clients = [Client(api_url(self._server), "user", "pass", None, rate_limiter = limiter) for i in range(2)]
+        threads = [threading.Thread(target = clients[i % 2]._http_client.read, args = ("orgs/o",)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(2, self._server.max_in_flight)
+        stats = limiter.stats()
+        self.assertEqual(6, stats["requests"])
+        self.assertEqual(2, stats["max_in_flight"])
+        for client in clients:
+            client._http_client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest, threading, time
+
+from future import standard_library
+standard_library.install_aliases()
+from urllib.error import URLError
+from urllib.request import Request
+
+from comodit_client.rest.client import HttpClient
+from comodit_client.rest.exceptions import ApiException
+from comodit_client.rest.pool import ConnectionPool
+from test.mock.http_server import KeepAliveHandler, start_server, stop_server, api_url
+
+
+class DroppingHandler(KeepAliveHandler):
+    # Requests on "drop" URLs are read, then connection is closed without
+    # any response.
+    def do_GET(self):
+        if "drop" in self.path:
+            self._drop("GET")
+        else:
+            KeepAliveHandler.do_GET(self)
+
+    def do_POST(self):
+        if "drop" in self.path:
+            self._drop("POST")
+        else:
+            KeepAliveHandler.do_POST(self)
+
+    def _drop(self, method):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.server.requests.append((method, self.path))
+        self.close_connection = True
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server()
+        self._client = HttpClient(api_url(self._server), "user", "pass", None)
+
+    def tearDown(self):
+        self._client.close()
+        stop_server(self._server)
+
+    def test_connection_reused(self):
+        for i in range(5):
+            result = self._client.read("orgs/" + str(i))
+            self.assertEqual("/api/orgs/" + str(i), result["path"])
+        self._client.update("orgs/0", item = {"name": "x"})
+        self.assertEqual(1, len(self._server.connections))
+
+    def test_error_mapping(self):
+        try:
+            self._client.read("missing")
+        except ApiException as e:
+            self.assertEqual(404, e.code)
+            self.assertEqual("[not found]", e.message)
+            return
+        self.assertFalse(True)
+
+    def test_connection_reused_after_error(self):
+        self.assertRaises(ApiException, self._client.read, "missing")
+        self._client.read("orgs")
+        self.assertEqual(1, len(self._server.connections))
+
+    def test_pool_disabled(self):
+        client = HttpClient(self._client.endpoint, "user", "pass", None, pool_size = 0)
+        client.read("orgs")
+        client.read("orgs")
+        self.assertEqual(2, len(self._server.connections))
+
+    def test_concurrent_requests_bounded(self):
+        client = HttpClient(self._client.endpoint, "user", "pass", None, pool_size = 2)
+        errors = []
+        def worker():
+            try:
+                for i in range(10):
+                    client.read("orgs")
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target = worker) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        client.close()
+        self.assertEqual([], errors)
+        self.assertTrue(len(self._server.connections) <= 2)
+
+
+class ConnectionPoolResendTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server(DroppingHandler)
+        self._url = api_url(self._server)
+        self._pool = ConnectionPool(max_size = 1, acquire_timeout = 0.2)
+
+    def tearDown(self):
+        self._pool.close()
+        stop_server(self._server)
+
+    def _send(self, path, data = None):
+        return self._pool.urlopen(Request(self._url + "/" + path, data = data)).read()
+
+    def _count(self, path):
+        return len([r for r in self._server.requests if r[1].endswith(path)])
+
+    def test_post_not_resent(self):
+        self._send("orgs")
+        self.assertRaises(URLError, self._send, "drop", b"{}")
+        self.assertEqual(1, self._count("/drop"))
+
+    def test_get_resent(self):
+        self._send("orgs")
+        self.assertRaises(URLError, self._send, "drop")
+        self.assertEqual(2, self._count("/drop"))
+
+    def test_exhausted(self):
+        response = self._pool.urlopen(Request(self._url + "/orgs"))
+        start = time.time()
+        try:
+            self.assertRaises(URLError, self._send, "orgs")
+            self.assertTrue(time.time() - start < 2)
+        finally:
+            response.close()
+        self._send("orgs")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+
+from comodit_client.rest.client import HttpClient
+from comodit_client.rest.exceptions import ApiException, CircuitOpenException
+from comodit_client.rest.retry import RetryPolicy
+from test.mock.http_server import KeepAliveHandler, start_server, stop_server, api_url
+
+
+class FlakyHandler(KeepAliveHandler):
+    def do_GET(self):
+        if self._fail():
+            return
+        KeepAliveHandler.do_GET(self)
+
+    def do_PUT(self):
+        if self._fail():
+            return
+        KeepAliveHandler.do_PUT(self)
+
+    def do_POST(self):
+        if self._fail():
+            return
+        KeepAliveHandler.do_POST(self)
+
+    def _fail(self):
+        if self.server.failures <= 0:
+            return False
+        self.server.failures -= 1
+        self.server.requests.append((self.command, self.path))
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(503)
+        self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+
+class RecordingPolicy(RetryPolicy):
+    def __init__(self, *args, **kwargs):
+        super(RecordingPolicy, self).__init__(*args, **kwargs)
+        self.delays = []
+
+    def _sleep(self, delay):
+        self.delays.append(delay)
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server(FlakyHandler)
+        self._server.failures = 0
+        self._policy = RecordingPolicy(max_retries = 3)
+        self._client = HttpClient(api_url(self._server), "user", "pass", None, retry_policy = self._policy)
+
+    def tearDown(self):
+        self._client.close()
+        stop_server(self._server)
+
+    def test_retry_after(self):
+        self._server.failures = 2
+        self.assertEqual("o", self._client.read("orgs/o")["name"])
+        self.assertEqual([1.0, 1.0], self._policy.delays)
+        stats = self._policy.stats()
+        self.assertEqual(1, stats["requests"])
+        self.assertEqual(3, stats["attempts"])
+        self.assertEqual(2, stats["retries"])
+
+    def test_max_retries(self):
+        self._server.failures = 10
+        with self.assertRaises(ApiException) as cm:
+            self._client.read("orgs/o")
+        self.assertEqual(503, cm.exception.code)
+        self.assertEqual(4, len(self._server.requests))
+
+    def test_post_and_actions_not_retried(self):
+        self._server.failures = 2
+        self.assertRaises(ApiException, self._client.create, "orgs/", {"name": "o"})
+        self.assertRaises(ApiException, self._client.update, "orgs/o/hosts/h/instance/_start")
+        self.assertEqual([], self._policy.delays)
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff_factor = 1, max_backoff = 3)
+        for attempt in range(5):
+            self.assertTrue(0 <= policy._get_delay(attempt, None) <= min(3, 2 ** attempt))
+        self.assertEqual(None, policy._get_delay(0, {"Retry-After": "60"}))
+
+    def test_circuit_breaker(self):
+        self._policy.failure_threshold = 2
+        self._policy.reset_timeout = 60
+        self._policy.max_retries = 0
+        self._server.failures = 2
+        self.assertRaises(ApiException, self._client.read, "orgs/o")
+        self.assertRaises(ApiException, self._client.read, "orgs/o")
+        self.assertRaises(CircuitOpenException, self._client.read, "orgs/o")
+        self.assertEqual(2, len(self._server.requests))
+        stats = self._policy.stats()
+        self.assertEqual(1, stats["circuits_opened"])
+        self.assertEqual(1, stats["rejected"])
+
+        self._policy.get_breaker(self._client.endpoint)._opened_at = 0
+        self.assertEqual("o", self._client.read("orgs/o")["name"])
+        self.assertEqual("CLOSED", self._policy.get_breaker(self._client.endpoint).state)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# coding: utf-8
+import unittest, io, json
+
+from comodit_client.api import Client
+from comodit_client.api.exceptions import PythonApiException
+from comodit_client.rest.streaming import JsonItemStream
+from test.mock.http_server import start_server, stop_server, api_url
+
+
+class JsonItemStreamTest(unittest.TestCase):
+    def _stream(self, data, **kwargs):
+        return JsonItemStream(io.BytesIO(json.dumps(data).encode("utf-8")), chunk_size = 3, **kwargs)
+
+    def test_listing(self):
+        items = [{"name": u"hôte-%d" % i, "size": 12345 * i, "tags": [1.5, None, True]} for i in range(50)]
+        stream = self._stream({"count": 50, "items": items, "next": None})
+        self.assertEqual(items, list(stream))
+        self.assertEqual({"count": 50, "next": None}, dict(stream.fields))
+
+    def test_top_level_array(self):
+        self.assertEqual([1, 22, 333, "a"], list(self._stream([1, 22, 333, "a"])))
+
+    def test_empty(self):
+        self.assertEqual([], list(self._stream({"count": 0})))
+        self.assertEqual([], list(self._stream({"count": 0, "items": []})))
+        self.assertEqual([], list(self._stream({})))
+
+    def test_other_key(self):
+        stream = self._stream({"items": [1], "changes": [2, 3]}, key = "changes")
+        self.assertEqual([2, 3], list(stream))
+        self.assertEqual([1], stream.fields["items"])
+
+    def test_invalid(self):
+        stream = JsonItemStream(io.BytesIO(b'{"items": [{"a": 1}, {"b": '), chunk_size = 4)
+        iterator = iter(stream)
+        self.assertEqual({"a": 1}, next(iterator))
+        self.assertRaises(ValueError, next, iterator)
+
+
+class CollectionIterTest(unittest.TestCase):
+    def setUp(self):
+        self._server = start_server()
+        self._client = Client(api_url(self._server), "user", "pass", None)
+
+    def tearDown(self):
+        self._client._http_client.close()
+        stop_server(self._server)
+
+    def test_iter(self):
+        names = [o.name for o in self._client.organizations().iter()]
+        self.assertEqual(["a", "b", "c"], names)
+
+    def test_iter_error(self):
+        collection = self._client.organizations()
+        collection.url = "missing/"
+        self.assertRaises(PythonApiException, list, collection.iter())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# coding: utf-8
+import unittest, io, json
+from collections import OrderedDict
+
+from comodit_client.util import jsoncodec
+from comodit_client.util.jsoncodec import JsonCodec, available_backends
+from comodit_client.util.json_wrapper import JsonWrapper
+
+
+DATA = OrderedDict([("z", 1), ("a", [1.5, None, True, u"hôte"]), ("m", {"k": "http://x/y"})])
+
+
+class JsonCodecTest(unittest.TestCase):
+    def setUp(self):
+        self._default = jsoncodec.get_default_codec()
+
+    def tearDown(self):
+        jsoncodec.set_default_codec(self._default)
+
+    def test_backends(self):
+        self.assertEqual("json", available_backends()[-1])
+        for backend in available_backends():
+            for keep_key_order in (True, False):
+                codec = JsonCodec(backend, keep_key_order)
+                encoded = codec.dumps(DATA)
+                self.assertEqual(json.loads(json.dumps(DATA)), json.loads(encoded))
+                decoded = codec.loads(encoded)
+                self.assertEqual(["z", "a", "m"], list(decoded.keys()))
+                self.assertEqual(keep_key_order, isinstance(decoded, OrderedDict))
+                self.assertEqual(decoded, codec.loads(encoded.encode("utf-8")))
+
+    def test_ascii_output(self):
+        for backend in available_backends():
+            self.assertTrue(all(ord(c) < 128 for c in JsonCodec(backend).dumps(DATA)))
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, JsonCodec, "yaml")
+
+    def test_json_wrapper(self):
+        jsoncodec.set_default_codec(JsonCodec("json", True))
+        wrapper = JsonWrapper()
+        wrapper._json_data = wrapper._load_from_file_and_keep_key_order(io.StringIO(u'{"b": 1, "a": 2}'))
+        self.assertTrue(isinstance(wrapper.get_json(), OrderedDict))
+        self.assertEqual('{\n    "b": 1,\n    "a": 2\n}', wrapper.get_real_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
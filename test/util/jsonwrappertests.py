@@ -0,0 +1,72 @@
+import unittest
+
+from comodit_client.api.host import Property
+from comodit_client.util.json_wrapper import JsonWrapper
+
+
+class JsonWrapperTest(unittest.TestCase):
+    def setUp(self):
+        self._wrapper = JsonWrapper({"name": "n", "description": "d", "files": [{"name": "f"}],
+                                     "driver": {"name": "Static"}})
+
+    def test_unmodified(self):
+        self.assertEqual("n", self._wrapper._get_field("name"))
+        self.assertEqual({}, self._wrapper.get_changes())
+
+    def test_set_fields(self):
+        self._wrapper._set_field("description", "new")
+        self._wrapper._add_to_list_field("packages", "p")
+        self._wrapper._del_field("name")
+        self.assertEqual({"description": "new", "packages": ["p"], "name": None},
+                         self._wrapper.get_changes())
+        self._wrapper._mark_clean()
+        self.assertEqual({}, self._wrapper.get_changes())
+
+    def test_handed_out_values(self):
+        self._wrapper._get_field("driver")["name"] = "Other"
+        self._wrapper._get_list_field("files", lambda x: JsonWrapper(x))
+        self.assertEqual(["driver"], sorted(self._wrapper.get_changes()))
+        self._wrapper._get_list_field("files", lambda x: JsonWrapper(x))[0]._set_field("name", "g")
+        self.assertEqual(["driver", "files"], sorted(self._wrapper.get_changes()))
+
+    def test_read_then_set(self):
+        self._wrapper._get_list_field("files")
+        self._wrapper._get_field("driver")
+        self._wrapper._set_field("description", "new")
+        self.assertEqual({"description": "new"}, self._wrapper.get_changes())
+
+    def test_whole_state(self):
+        json_data = self._wrapper.get_json()
+        self.assertEqual({}, self._wrapper.get_changes())
+        json_data["description"] = "new"
+        json_data["files"].append({"name": "g"})
+        del json_data["name"]
+        self.assertEqual(["description", "files", "name"], sorted(self._wrapper.get_changes()))
+        self._wrapper._mark_clean()
+        self._wrapper.set_json({"name": "other"})
+        self.assertIsNone(self._wrapper.get_changes())
+
+    def test_memoized_lists(self):
+        files = self._files()
+        again = self._files()
+        self.assertIsNot(files, again)
+        self.assertIs(files[0], again[0])
+
+        self._wrapper._add_to_list_field("files", {"name": "g"})
+        files = self._files()
+        self.assertEqual(2, len(files))
+        self.assertIsNot(files[0], again[0])
+
+        self._wrapper.set_json({"files": [{"name": "h"}]})
+        files = self._files()
+        self.assertEqual({"name": "h"}, files[0].get_json())
+
+    def _files(self):
+        return self._wrapper._get_list_field("files", lambda x: JsonWrapper(x))
+
+    def test_slots(self):
+        self.assertFalse(hasattr(Property({"key": "k", "value": "v"}), "__dict__"))
+
+
+if __name__ == '__main__':
+    unittest.main()